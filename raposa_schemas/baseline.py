@@ -0,0 +1,105 @@
+# coding: utf-8
+
+"""
+Buy-and-hold baselines for the BuyAndHold schema: the account is split
+equally between the instruments on the first day and held to the end.
+Requires numpy: pip install raposa-schemas[numpy]
+
+    engine = BaselineEngine(load_closes)
+    result = engine.run(BuyAndHold(instr_list=["SPY", "QQQ"], account_size=10000))
+    result.total  # equity of the whole account per day
+
+load_closes(instruments, start_date, end_date) returns the trading days
+and the Close prices (one column per instrument, NaN before an instrument
+trades). All instruments are computed together with one cumulative
+product. Results are memoized by (instruments, dates, account_size) and
+their arrays are read-only, since the same baselines are asked for over
+and over.
+"""
+
+from functools import lru_cache
+from typing import Callable, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+from raposa_schemas import schemas
+
+Loader = Callable[[Tuple[str, ...], str, str], Tuple[np.ndarray, np.ndarray]]
+
+
+class BaselineResult(NamedTuple):
+    instruments: Tuple[str, ...]
+    dates: np.ndarray
+    equity: np.ndarray  # (days, instruments), each starting at its allocation
+    total: np.ndarray  # (days,)
+
+
+def price_growth(closes: np.ndarray) -> np.ndarray:
+    """
+    Close to close growth along the first axis. A missing close is filled
+    with the last one, so the move across a gap lands on the next price;
+    before an instrument's first price the growth is 1.
+    """
+    closes = np.asarray(closes, dtype=float)
+    bars = np.arange(len(closes)).reshape((-1,) + (1,) * (closes.ndim - 1))
+    last = np.maximum.accumulate(np.where(np.isfinite(closes), bars, 0), axis=0)
+    filled = np.take_along_axis(closes, last, axis=0)
+    growth = np.ones_like(closes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth[1:] = filled[1:] / filled[:-1]
+    # only bars up to the first price (or after a zero) are left
+    growth[~np.isfinite(growth)] = 1.0
+    return growth
+
+
+def equity_curves(closes: np.ndarray, account_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Equal-weight buy-and-hold equity of Close prices shaped (days, instruments).
+    An instrument's allocation stays in cash until its first price.
+    """
+    closes = np.asarray(closes, dtype=float)
+    if closes.ndim == 1:
+        closes = closes[:, None]
+    equity = np.cumprod(price_growth(closes), axis=0)
+    equity *= account_size / closes.shape[1]
+    return equity, equity.sum(axis=1)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+class BaselineEngine:
+    """Memoized buy-and-hold baselines over the prices load_closes returns."""
+
+    def __init__(self, load_closes: Loader, maxsize: int = 1024):
+        self.load_closes = load_closes
+        self._run = lru_cache(maxsize=maxsize)(self._compute)
+
+    def _compute(self, instruments: Tuple[str, ...], start_date: str, end_date: str,
+            account_size: float) -> BaselineResult:
+        dates, closes = self.load_closes(instruments, start_date, end_date)
+        equity, total = equity_curves(closes, account_size)
+        return BaselineResult(
+            instruments, _read_only(np.asarray(dates)), _read_only(equity), _read_only(total)
+        )
+
+    def run(self, request: Union[schemas.BuyAndHold, dict]) -> BaselineResult:
+        """Baseline of a BuyAndHold request. Instruments come back sorted."""
+        if isinstance(request, dict):
+            request = schemas.BuyAndHold(**request)
+        return self.baseline(
+            request.instr_list, request.start_date, request.end_date, request.account_size
+        )
+
+    def baseline(self, instruments: Sequence[str], start_date: str, end_date: str,
+            account_size: float) -> BaselineResult:
+        return self._run(tuple(sorted(set(instruments))), start_date, end_date, float(account_size))
+
+    def cache_info(self):
+        return self._run.cache_info()
+
+    def clear(self):
+        """Forget every baseline, e.g. after new prices were loaded."""
+        self._run.cache_clear()
@@ -0,0 +1,488 @@
+# coding: utf-8
+
+"""
+Columnar storage for large strategy populations (evolutionary search,
+analytics). Requires numpy: pip install raposa-schemas[numpy]
+
+A population is three NumPy structured arrays:
+    strategies  - one row per strategy: account_size, dates, trade and
+                  rebalance settings, sizing codes and params, and offsets
+                  into the other two arrays
+    signals     - one row per signal: owning strategy, side (0 buy, 1 sell),
+                  indicator / comparison codes and params, relation code
+    instruments - one instrument id per (strategy, instrument)
+
+Indicators, sizings and relations are stored as codes (their index in
+indicator_names, sizing_names and relation_names). Params are stored in
+fixed-width float slots in the order of registry.param_specs, with choices
+as the index of the choice and missing params as NaN.
+
+    columns = StrategyColumns.from_strategies(strategies)
+    ok = columns.validate()
+    columns.select(ok & (columns.strategies["account_size"] > 10000))
+    columns.save("population")
+    columns = StrategyColumns.load("population")  # memory-mapped
+    columns.strategy(0)  # -> CompleteStrategy
+
+needs_comp/valid_comps are rebuilt from the schema when a strategy is
+materialized (validation never uses the client's lists) and trade/rebalance
+days come back in week order.
+"""
+
+import json
+import os
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+
+from raposa_schemas import registry, schemas
+
+indicator_names = schemas.comp_matrix.names
+sizing_names = tuple(klass.__fields__["name"].default for klass in registry.sizing_classes)
+relation_names = tuple(schemas.relations.values())
+week_days = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+indicator_codes = {name: code for code, name in enumerate(indicator_names)}
+sizing_codes = {name: code for code, name in enumerate(sizing_names)}
+relation_codes = {name: code for code, name in enumerate(relation_names)}
+
+# codes for values that are not in the tables above
+UNKNOWN = -1
+NO_COMP = -2
+# reserved bit of a day mask with a day that is not in week_days
+INVALID_DAY = 1 << 7
+# a date that does not parse (an empty one is NaT)
+INVALID_DATE = np.datetime64(np.iinfo(np.int64).min + 1, "D")
+
+indicator_param_width = max(
+    len(registry.INFO_BY_NAME[name].param_specs) for name in indicator_names
+)
+sizing_param_width = max(
+    len(registry.INFO_BY_NAME[name].param_specs) for name in sizing_names
+)
+
+strategy_dtype = np.dtype(
+    [
+        ("account_size", "f8"),
+        ("init_date", "M8[D]"),
+        ("start_date", "M8[D]"),
+        ("end_date", "M8[D]"),
+        ("trade_days", "u1"),
+        ("trade_frequency", "i8"),
+        ("rebalance_days", "u1"),
+        ("rebalance_frequency", "i8"),
+        ("sizing", "i2"),
+        ("sizing_params", "f8", (sizing_param_width,)),
+        ("management", "i2"),
+        ("management_params", "f8", (sizing_param_width,)),
+        ("email", "i8"),
+        ("schema_version", "i2"),
+        ("signal_start", "i8"),
+        ("n_buy", "i2"),
+        ("n_sell", "i2"),
+        ("instrument_start", "i8"),
+        ("n_instruments", "i4"),
+    ]
+)
+
+signal_dtype = np.dtype(
+    [
+        ("strategy", "i8"),
+        ("side", "u1"),
+        ("indicator", "i2"),
+        ("indicator_params", "f8", (indicator_param_width,)),
+        ("comp", "i2"),
+        ("comp_params", "f8", (indicator_param_width,)),
+        ("rel", "i2"),
+        ("short", "?"),
+    ]
+)
+
+# registry layout the arrays were written with, checked on load
+_layout = {
+    "indicators": list(indicator_names),
+    "sizings": list(sizing_names),
+    "relations": list(relation_names),
+    "strategy_fields": list(strategy_dtype.names),
+    "params": {
+        name: [spec.name for spec in registry.INFO_BY_NAME[name].param_specs]
+        for name in indicator_names + sizing_names
+    },
+}
+
+
+def _encode_value(spec: registry.ParamSpec, value) -> float:
+    if spec.kind == "choice":
+        return float(spec.choices.index(value)) if value in spec.choices else np.nan
+    if spec.kind == "bool":
+        return float(value) if isinstance(value, bool) else np.nan
+    if spec.kind == "int" and not isinstance(value, int):
+        return np.nan
+    if not isinstance(value, (int, float)):
+        return np.nan
+    return float(value)
+
+
+def _decode_value(spec: registry.ParamSpec, value: float):
+    if spec.kind == "choice":
+        return spec.choices[int(value)]
+    if spec.kind == "bool":
+        return bool(value)
+    if spec.kind == "int":
+        return int(value)
+    return float(value)
+
+
+def _encode_params(name: Optional[str], params: Optional[dict], width: int, strict: bool) -> List[float]:
+    out = [np.nan] * width
+    info = registry.INFO_BY_NAME.get(name)
+    if info is None or not isinstance(params, dict):
+        return out
+    specs = info.param_specs
+    # indicator validators check the keys and their order, sizing ones don't
+    if strict and list(params) != [spec.name for spec in specs]:
+        return out
+    for n, spec in enumerate(specs):
+        if spec.name in params:
+            out[n] = _encode_value(spec, params[spec.name])
+    return out
+
+
+def _decode_params(name: str, values) -> dict:
+    params = {}
+    for spec, value in zip(registry.INFO_BY_NAME[name].param_specs, values):
+        if not np.isnan(value):
+            params[spec.name] = _decode_value(spec, value)
+    return params
+
+
+def _encode_days(days: Iterable[str]) -> int:
+    if not isinstance(days, (list, tuple)):
+        return INVALID_DAY
+    mask = 0
+    for day in days:
+        mask |= 1 << week_days.index(day) if day in week_days else INVALID_DAY
+    return mask
+
+
+def _decode_days(mask: int) -> List[str]:
+    return [day for n, day in enumerate(week_days) if mask & (1 << n)]
+
+
+def _date(value: str):
+    if not value:
+        return np.datetime64("NaT", "D")
+    try:
+        return np.datetime64(schemas.parse_date(value), "D")
+    except (TypeError, ValueError):
+        return INVALID_DATE
+
+
+def _date_str(value) -> str:
+    return "" if np.isnat(value) or value == INVALID_DATE else str(value)
+
+
+def _gather(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Indices of the concatenated ranges [start, start + length)"""
+    lengths = lengths.astype(np.int64)
+    if lengths.sum() == 0:
+        return np.zeros(0, dtype=np.int64)
+    shifts = starts - np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.repeat(shifts, lengths) + np.arange(lengths.sum())
+
+
+def _check_params(values: np.ndarray, info: registry.SchemaInfo) -> np.ndarray:
+    """Vectorized version of a schema's param validator, one row per schema."""
+    ok = np.ones(len(values), dtype=bool)
+    column = {}
+    for n, spec in enumerate(info.param_specs):
+        col = values[:, n]
+        column[spec.name] = col
+        if spec.kind == "choice":
+            valid = (col >= 0) & (col < len(spec.choices))
+        elif spec.kind == "bool":
+            valid = (col == 0) | (col == 1)
+        else:
+            valid = ~np.isnan(col)
+            if spec.kind == "int":
+                valid &= col == np.floor(col)
+            if spec.minimum is not None:
+                if spec.exclusive_minimum:
+                    valid &= col > spec.minimum
+                else:
+                    valid &= col >= spec.minimum
+            if spec.maximum is not None:
+                valid &= col <= spec.maximum
+        if spec.name == "risk_cap":
+            # sizings from before risk_cap are still accepted
+            valid |= np.isnan(col)
+        ok &= valid
+    for smaller, larger, strict in info.param_orderings:
+        if strict:
+            ok &= column[smaller] < column[larger]
+        else:
+            ok &= column[smaller] <= column[larger]
+    return ok
+
+
+class StrategyColumns:
+    """A population of strategies stored as columns, see the module docstring."""
+
+    def __init__(
+        self,
+        strategies: np.ndarray,
+        signals: np.ndarray,
+        instruments: np.ndarray,
+        symbols: List[str],
+        emails: List[str],
+    ):
+        self.strategies = strategies
+        self.signals = signals
+        self.instruments = instruments
+        self.symbols = symbols
+        self.emails = emails
+
+    def __len__(self) -> int:
+        return len(self.strategies)
+
+    @classmethod
+    def from_strategies(cls, strategies: Iterable[Union[schemas.CompleteStrategy, dict]]) -> "StrategyColumns":
+        """
+        Ingest CompleteStrategy instances or raw strategy dicts in bulk.
+        Dicts are not validated here, use validate() on the result: unknown
+        days and dates that do not parse are stored as INVALID_DAY and
+        INVALID_DATE for it to reject.
+        """
+        symbols, symbol_ids = [], {}
+        emails, email_ids = [], {}
+        strategy_rows, signal_rows, instrument_ids = [], [], []
+
+        for n, strategy in enumerate(strategies):
+            if not isinstance(strategy, dict):
+                strategy = strategy.dict()
+            settings = strategy["strategy_settings"]
+            sizing = settings.get("position_sizing_strategy") or {}
+            management = settings.get("position_management_strategy") or {}
+            signal_start = len(signal_rows)
+            for side, key in enumerate(("buy_signals", "sell_signals")):
+                for signal in strategy[key]["signals"]:
+                    indicator = signal["indicator"]
+                    comp = signal.get("comp_indicator")
+                    signal_rows.append(
+                        (
+                            n,
+                            side,
+                            indicator_codes.get(indicator.get("name"), UNKNOWN),
+                            _encode_params(indicator.get("name"), indicator.get("params"),
+                                indicator_param_width, True),
+                            NO_COMP if comp is None else indicator_codes.get(comp.get("name"), UNKNOWN),
+                            _encode_params(None if comp is None else comp.get("name"),
+                                None if comp is None else comp.get("params"),
+                                indicator_param_width, True),
+                            relation_codes.get(signal.get("rel", "leq"), UNKNOWN),
+                            signal.get("short", False),
+                        )
+                    )
+            instrument_start = len(instrument_ids)
+            for symbol in settings["instruments"]:
+                if symbol not in symbol_ids:
+                    symbol_ids[symbol] = len(symbols)
+                    symbols.append(symbol)
+                instrument_ids.append(symbol_ids[symbol])
+            email = strategy.get("email", "")
+            if email not in email_ids:
+                email_ids[email] = len(emails)
+                emails.append(email)
+            strategy_rows.append(
+                (
+                    settings["account_size"],
+                    _date(settings.get("init_date", "")),
+                    _date(settings.get("start_date", "2010-01-01")),
+                    _date(settings.get("end_date", "2015-12-31")),
+                    _encode_days(settings.get("trade_days", week_days[:5])),
+                    settings.get("trade_frequency", 1),
+                    _encode_days(settings.get("rebalance_days", week_days[:5])),
+                    settings.get("rebalance_frequency", 1),
+                    sizing_codes.get(sizing.get("name", "EqualAllocation"), UNKNOWN),
+                    _encode_params(sizing.get("name", "EqualAllocation"), sizing.get("params", {}),
+                        sizing_param_width, False),
+                    sizing_codes.get(management.get("name", "EqualAllocation"), UNKNOWN),
+                    _encode_params(management.get("name", "EqualAllocation"), management.get("params", {}),
+                        sizing_param_width, False),
+                    email_ids[email],
+                    strategy.get("schema_version", 0),
+                    signal_start,
+                    len(strategy["buy_signals"]["signals"]),
+                    len(strategy["sell_signals"]["signals"]),
+                    instrument_start,
+                    len(settings["instruments"]),
+                )
+            )
+
+        return cls(
+            np.array(strategy_rows, dtype=strategy_dtype),
+            np.array(signal_rows, dtype=signal_dtype),
+            np.array(instrument_ids, dtype=np.int32),
+            symbols,
+            emails,
+        )
+
+    def validate(self) -> np.ndarray:
+        """
+        Boolean mask of the strategies whose structure and params pass the
+        schema checks, computed column-wise across the whole population.
+        """
+        signals = self.signals
+        ok_signals = (signals["indicator"] >= 0) & (signals["rel"] >= 0)
+
+        for code_field, params_field in (("indicator", "indicator_params"), ("comp", "comp_params")):
+            codes = signals[code_field]
+            for code in np.unique(codes[codes >= 0]):
+                rows = codes == code
+                info = registry.INFO_BY_NAME[indicator_names[code]]
+                ok_signals[rows] &= _check_params(signals[params_field][rows], info)
+        ok_signals &= signals["comp"] != UNKNOWN
+
+        # comparisons come from the schema's compatibility matrix
+        matrix = schemas.comp_matrix
+        masks = np.array([matrix.masks[name] for name in indicator_names] + [0], dtype=np.int64)
+        needs_comp = np.array([matrix.needs_comp[name] for name in indicator_names] + [True])
+        indicator = signals["indicator"]  # UNKNOWN (-1) picks the trailing entry
+        comp = signals["comp"]
+        has_comp = comp >= 0
+        comp_bits = np.left_shift(1, np.where(has_comp, comp, 0).astype(np.int64))
+        ok_signals &= np.where(has_comp, (masks[indicator] & comp_bits) != 0, ~needs_comp[indicator])
+
+        failed = np.bincount(signals["strategy"][~ok_signals], minlength=len(self))
+        ok = failed == 0
+
+        strategies = self.strategies
+        for field in ("trade_days", "rebalance_days"):
+            ok &= (strategies[field] & INVALID_DAY) == 0
+        start, end, init = strategies["start_date"], strategies["end_date"], strategies["init_date"]
+        ok &= (start != INVALID_DATE) & (end != INVALID_DATE) & (init != INVALID_DATE)
+        # NaT compares False, so empty start and end dates fail here
+        ok &= start < end
+        ok &= np.isnat(init) | (init <= end)
+        ok &= strategies["trade_frequency"] > 0
+        ok &= strategies["rebalance_frequency"] >= 0
+        ok &= (strategies["n_instruments"] > 0) & (strategies["n_instruments"] < schemas.max_instruments)
+        ok &= strategies["n_buy"] <= schemas.max_signals
+        ok &= strategies["n_sell"] <= schemas.max_signals
+        ok &= (strategies["schema_version"] >= 0) & (strategies["schema_version"] <= schemas.SCHEMA_VERSION)
+        for code_field, params_field in (("sizing", "sizing_params"), ("management", "management_params")):
+            codes = strategies[code_field]
+            ok &= codes >= 0
+            for code in np.unique(codes[codes >= 0]):
+                rows = codes == code
+                info = registry.INFO_BY_NAME[sizing_names[code]]
+                ok[rows] &= _check_params(strategies[params_field][rows], info)
+        return ok
+
+    def select(self, which: np.ndarray) -> "StrategyColumns":
+        """New population with the strategies picked by a boolean mask or indices."""
+        which = np.asarray(which)
+        if which.dtype == bool:
+            which = np.flatnonzero(which)
+        strategies = self.strategies[which]
+
+        n_signals = strategies["n_buy"].astype(np.int64) + strategies["n_sell"]
+        signals = self.signals[_gather(strategies["signal_start"], n_signals)]
+        signals["strategy"] = np.repeat(np.arange(len(which)), n_signals)
+        instruments = self.instruments[
+            _gather(strategies["instrument_start"], strategies["n_instruments"])
+        ]
+        strategies["signal_start"] = np.concatenate([[0], np.cumsum(n_signals)[:-1]])
+        strategies["instrument_start"] = np.concatenate(
+            [[0], np.cumsum(strategies["n_instruments"])[:-1]]
+        )
+        return StrategyColumns(strategies, signals, instruments, self.symbols, self.emails)
+
+    def instruments_of(self, i: int) -> List[str]:
+        row = self.strategies[i]
+        start = row["instrument_start"]
+        return [self.symbols[n] for n in self.instruments[start:start + row["n_instruments"]]]
+
+    def _indicator_dict(self, code: int, values) -> dict:
+        name = indicator_names[code]
+        info = registry.INFO_BY_NAME[name]
+        return {
+            "name": name,
+            "params": _decode_params(name, values),
+            "needs_comp": info.needs_comp,
+            "valid_comps": list(info.valid_comps) if info.valid_comps else None,
+        }
+
+    def strategy_dict(self, i: int) -> dict:
+        """The CompleteStrategy dict of the i-th strategy."""
+        row = self.strategies[i]
+        signals = {"buy_signals": [], "sell_signals": []}
+        start = row["signal_start"]
+        for signal in self.signals[start:start + row["n_buy"] + row["n_sell"]]:
+            side = "sell_signals" if signal["side"] else "buy_signals"
+            signals[side].append(
+                {
+                    "indicator": self._indicator_dict(signal["indicator"], signal["indicator_params"]),
+                    "comp_indicator": None if signal["comp"] < 0
+                        else self._indicator_dict(signal["comp"], signal["comp_params"]),
+                    "rel": relation_names[signal["rel"]],
+                    "short": bool(signal["short"]),
+                }
+            )
+        sizing = sizing_names[row["sizing"]]
+        management = sizing_names[row["management"]]
+        return {
+            "strategy_settings": {
+                "account_size": float(row["account_size"]),
+                "init_date": _date_str(row["init_date"]),
+                "start_date": _date_str(row["start_date"]),
+                "end_date": _date_str(row["end_date"]),
+                "instruments": self.instruments_of(i),
+                "trade_days": _decode_days(row["trade_days"]),
+                "trade_frequency": int(row["trade_frequency"]),
+                "position_sizing_strategy": {
+                    "name": sizing,
+                    "params": _decode_params(sizing, row["sizing_params"]),
+                },
+                "position_management_strategy": {
+                    "name": management,
+                    "params": _decode_params(management, row["management_params"]),
+                },
+                "rebalance_days": _decode_days(row["rebalance_days"]),
+                "rebalance_frequency": int(row["rebalance_frequency"]),
+            },
+            "buy_signals": {"signals": signals["buy_signals"]},
+            "sell_signals": {"signals": signals["sell_signals"]},
+            "email": self.emails[row["email"]],
+            "schema_version": int(row["schema_version"]),
+        }
+
+    def strategy(self, i: int) -> schemas.CompleteStrategy:
+        """Validated CompleteStrategy of the i-th strategy."""
+        return schemas.CompleteStrategy(**self.strategy_dict(i))
+
+    def save(self, directory: str):
+        """Write the population as .npy files (plus a small json index) to directory."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "strategies.npy"), self.strategies)
+        np.save(os.path.join(directory, "signals.npy"), self.signals)
+        np.save(os.path.join(directory, "instruments.npy"), self.instruments)
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump({"layout": _layout, "symbols": self.symbols, "emails": self.emails}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> "StrategyColumns":
+        """Load a saved population, memory-mapped (read-only) by default."""
+        with open(os.path.join(directory, "index.json")) as f:
+            index = json.load(f)
+        if index["layout"] != _layout:
+            raise ValueError(
+                f"{directory} was saved with a different schema layout and cannot be loaded."
+            )
+        return cls(
+            np.load(os.path.join(directory, "strategies.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, "signals.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, "instruments.npy"), mmap_mode=mmap_mode),
+            index["symbols"],
+            index["emails"],
+        )
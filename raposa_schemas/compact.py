@@ -0,0 +1,264 @@
+# coding: utf-8
+
+"""
+Compact, immutable representations of strategies for holding very large
+populations in memory (e.g. the optimizer).
+
+Every piece is a NamedTuple, so there is no per-instance __dict__, and
+identical pieces are shared instead of copied: names and tickers are
+interned, params become tuples of (key, value) pairs, and equal
+indicators, sizings and instrument lists are the same object across every
+strategy compacted with the same SharedPool. A million strategies built
+from a handful of indicator settings only hold a handful of indicator
+objects. The pool belongs to the caller and lives as long as it is kept,
+e.g. for one optimizer run; without one, pieces are only shared within a
+strategy.
+
+Conversion is lossless in both directions:
+
+    pool = SharedPool()
+    compact = compact_strategy(complete_strategy, pool)
+    complete_strategy == to_model(compact)
+"""
+
+import sys
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+
+from raposa_schemas import schemas
+
+Params = Tuple[Tuple[str, Any], ...]
+
+
+class CompactIndicator(NamedTuple):
+    name: str
+    params: Params
+    needs_comp: bool
+    valid_comps: Optional[Tuple[str, ...]]
+
+
+class CompactSizing(NamedTuple):
+    name: str
+    params: Params
+
+
+class CompactSignal(NamedTuple):
+    indicator: CompactIndicator
+    comp_indicator: Optional[CompactIndicator]
+    rel: str
+    short: bool
+
+
+class CompactSettings(NamedTuple):
+    account_size: float
+    init_date: str
+    start_date: str
+    end_date: str
+    instruments: Tuple[str, ...]
+    trade_days: Tuple[str, ...]
+    trade_frequency: int
+    position_sizing_strategy: CompactSizing
+    position_management_strategy: CompactSizing
+    rebalance_days: Tuple[str, ...]
+    rebalance_frequency: int
+
+
+class CompactStrategy(NamedTuple):
+    strategy_settings: CompactSettings
+    buy_signals: Tuple[CompactSignal, ...]
+    sell_signals: Tuple[CompactSignal, ...]
+    email: str
+    schema_version: int = 0
+
+
+class SharedPool:
+    """
+    The shared pieces of the strategies compacted with it. Keys carry the
+    value types (and the ids of already shared parts, which the pool keeps
+    alive) so that e.g. 10 and 10.0 are never merged.
+    """
+
+    def __init__(self):
+        self._pieces: Dict[Any, Any] = {}
+
+    def __len__(self):
+        return len(self._pieces)
+
+    def share(self, key, value):
+        return self._pieces.setdefault(key, value)
+
+    def clear(self):
+        """Drop the shared pieces, e.g. between optimizer runs."""
+        self._pieces.clear()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _strings(values, pool: SharedPool) -> Tuple[str, ...]:
+    values = tuple(_intern(value) for value in values)
+    return pool.share(("strings", values), values)
+
+
+def _params(params: Optional[dict], pool: SharedPool) -> Params:
+    if params is None:
+        return None
+    pairs = tuple((_intern(key), _intern(value)) for key, value in params.items())
+    key = ("params",) + tuple((k, type(v), v) for k, v in pairs)
+    return pool.share(key, pairs)
+
+
+def _as_dict(value):
+    return value if isinstance(value, dict) else value.dict()
+
+
+def compact_indicator(indicator: Union[dict, Any], pool: Optional[SharedPool] = None) -> CompactIndicator:
+    pool = SharedPool() if pool is None else pool
+    indicator = _as_dict(indicator)
+    valid_comps = indicator.get("valid_comps")
+    compact = CompactIndicator(
+        _intern(indicator["name"]),
+        _params(indicator.get("params"), pool),
+        indicator.get("needs_comp"),
+        None if valid_comps is None else _strings(valid_comps, pool),
+    )
+    key = ("indicator", compact.name, id(compact.params), type(compact.needs_comp),
+        compact.needs_comp, id(compact.valid_comps))
+    return pool.share(key, compact)
+
+
+def compact_sizing(sizing: Union[dict, Any], pool: Optional[SharedPool] = None) -> CompactSizing:
+    pool = SharedPool() if pool is None else pool
+    sizing = _as_dict(sizing)
+    compact = CompactSizing(_intern(sizing["name"]), _params(sizing.get("params"), pool))
+    return pool.share(("sizing", compact.name, id(compact.params)), compact)
+
+
+def compact_signal(signal: Union[dict, schemas.Signal], pool: Optional[SharedPool] = None) -> CompactSignal:
+    pool = SharedPool() if pool is None else pool
+    signal = _as_dict(signal)
+    comp = signal.get("comp_indicator")
+    compact = CompactSignal(
+        compact_indicator(signal["indicator"], pool),
+        None if comp is None else compact_indicator(comp, pool),
+        _intern(signal["rel"]),
+        signal["short"],
+    )
+    key = ("signal", id(compact.indicator), id(compact.comp_indicator), compact.rel,
+        compact.short)
+    return pool.share(key, compact)
+
+
+def compact_settings(
+    settings: Union[dict, schemas.StrategySettings], pool: Optional[SharedPool] = None
+) -> CompactSettings:
+    pool = SharedPool() if pool is None else pool
+    settings = _as_dict(settings)
+    return CompactSettings(
+        account_size=settings["account_size"],
+        init_date=_intern(settings["init_date"]),
+        start_date=_intern(settings["start_date"]),
+        end_date=_intern(settings["end_date"]),
+        instruments=_strings(settings["instruments"], pool),
+        trade_days=_strings(settings["trade_days"], pool),
+        trade_frequency=settings["trade_frequency"],
+        position_sizing_strategy=compact_sizing(settings["position_sizing_strategy"], pool),
+        position_management_strategy=compact_sizing(settings["position_management_strategy"], pool),
+        rebalance_days=_strings(settings["rebalance_days"], pool),
+        rebalance_frequency=settings["rebalance_frequency"],
+    )
+
+
+def compact_strategy(
+    strategy: Union[dict, schemas.CompleteStrategy], pool: Optional[SharedPool] = None
+) -> CompactStrategy:
+    """
+    Compact form of a validated CompleteStrategy (or its dict). Dicts are
+    not validated here, validate them first. Pieces are shared with every
+    strategy compacted with the same pool.
+    """
+    pool = SharedPool() if pool is None else pool
+    strategy = _as_dict(strategy)
+    return CompactStrategy(
+        strategy_settings=compact_settings(strategy["strategy_settings"], pool),
+        buy_signals=tuple(compact_signal(s, pool) for s in strategy["buy_signals"]["signals"]),
+        sell_signals=tuple(compact_signal(s, pool) for s in strategy["sell_signals"]["signals"]),
+        email=_intern(strategy["email"]),
+        schema_version=strategy.get("schema_version", 0),
+    )
+
+
+def _params_dict(params: Params) -> Optional[dict]:
+    return None if params is None else dict(params)
+
+
+def _indicator_dict(indicator: Optional[CompactIndicator]) -> Optional[dict]:
+    if indicator is None:
+        return None
+    return {
+        "name": indicator.name,
+        "params": _params_dict(indicator.params),
+        "needs_comp": indicator.needs_comp,
+        "valid_comps": None if indicator.valid_comps is None else list(indicator.valid_comps),
+    }
+
+
+def _sizing_dict(sizing: CompactSizing) -> dict:
+    return {"name": sizing.name, "params": _params_dict(sizing.params)}
+
+
+def _signal_dict(signal: CompactSignal) -> dict:
+    return {
+        "indicator": _indicator_dict(signal.indicator),
+        "comp_indicator": _indicator_dict(signal.comp_indicator),
+        "rel": signal.rel,
+        "short": signal.short,
+    }
+
+
+def to_dict(strategy: CompactStrategy) -> dict:
+    """The CompleteStrategy dict of a compact strategy."""
+    settings = strategy.strategy_settings
+    return {
+        "strategy_settings": {
+            "account_size": settings.account_size,
+            "init_date": settings.init_date,
+            "start_date": settings.start_date,
+            "end_date": settings.end_date,
+            "instruments": list(settings.instruments),
+            "trade_days": list(settings.trade_days),
+            "trade_frequency": settings.trade_frequency,
+            "position_sizing_strategy": _sizing_dict(settings.position_sizing_strategy),
+            "position_management_strategy": _sizing_dict(settings.position_management_strategy),
+            "rebalance_days": list(settings.rebalance_days),
+            "rebalance_frequency": settings.rebalance_frequency,
+        },
+        "buy_signals": {"signals": [_signal_dict(s) for s in strategy.buy_signals]},
+        "sell_signals": {"signals": [_signal_dict(s) for s in strategy.sell_signals]},
+        "email": strategy.email,
+        "schema_version": strategy.schema_version,
+    }
+
+
+def _construct_signals(klass, signals):
+    return klass.construct(
+        signals=[schemas.Signal.construct(**_signal_dict(s)) for s in signals]
+    )
+
+
+def to_model(strategy: CompactStrategy, validate: bool = False) -> schemas.CompleteStrategy:
+    """
+    CompleteStrategy of a compact strategy. Compact strategies are built from
+    validated ones, so validation is skipped unless asked for.
+    """
+    if validate:
+        return schemas.CompleteStrategy(**to_dict(strategy))
+    settings = to_dict(strategy)["strategy_settings"]
+    settings["instruments"] = schemas.Instruments(settings["instruments"])
+    return schemas.CompleteStrategy.construct(
+        strategy_settings=schemas.StrategySettings.construct(**settings),
+        buy_signals=_construct_signals(schemas.BuySignals, strategy.buy_signals),
+        sell_signals=_construct_signals(schemas.SellSignals, strategy.sell_signals),
+        email=strategy.email,
+        schema_version=strategy.schema_version,
+    )
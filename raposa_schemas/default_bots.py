@@ -3,280 +3,351 @@ This is a very rudimentary way to create the default bots for
 users without accounts. (or who have not saved their bots).
 
 Currently hard-coded. But we could maek it more dynamic.
+
+The presets are validated once, on first use, into read-only
+CompleteStrategy instances along with their fingerprint, warm-up lookback
+and indicator plan. Look them up by number or name with
+get_default_strategy(); get_default_bot() still returns a raw dict.
 """
 
+from copy import deepcopy
+from typing import Dict, NamedTuple, Optional, Tuple, Union
 
-def get_default_bot(bot_number):
-    preset1 = {
-        "email": "test@test.com",
-        "buy_signals": {
-            "signals": [
-                {
-                    "rel": "leq",
-                    "short": False,
-                    "indicator": {
-                        "name": "EMA",
-                        "params": {"period": 3},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
-                    "comp_indicator": {
-                        "name": "PRICE",
-                        "params": {"price_type": "Close"},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
-                    },
-                }
-            ]
-        },
-        "sell_signals": {
-            "signals": [
-                {
-                    "rel": "geq",
-                    "short": False,
-                    "indicator": {
-                        "name": "EMA",
-                        "params": {"period": 5},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
-                    "comp_indicator": {
-                        "name": "PRICE",
-                        "params": {"price_type": "Close"},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
-                    },
-                }
-            ]
-        },
-        "strategy_settings": {
-            "end_date": "2019-12-31",
-            "init_date": "",
-            "start_date": "2018-01-01",
-            "trade_days": ["mon", "tue", "wed", "thu", "fri"],
-            "instruments": ["TSLA"],
-            "account_size": 5000,
-            "rebalance_days": ["mon", "tue", "wed", "thu", "fri"],
-            "trade_frequency": 1,
-            "rebalance_frequency": 1,
-            "position_sizing_strategy": {"name": "EqualAllocation", "params": {}},
-            "position_management_strategy": {"name": "NoRiskManagement", "params": {}},
-        },
-    }
-    preset2 = {
-        "email": "test@test.com",
-        "buy_signals": {
-            "signals": [
-                {
-                    "rel": "geq",
-                    "short": False,
-                    "indicator": {
-                        "name": "PRICE",
-                        "params": {"price_type": "Close"},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
-                    },
-                    "comp_indicator": {
-                        "name": "SMA",
-                        "params": {"period": 20},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
-                }
-            ]
-        },
-        "sell_signals": {
-            "signals": [
-                {
-                    "rel": "leq",
-                    "short": False,
-                    "indicator": {
-                        "name": "PRICE",
-                        "params": {"price_type": "Close"},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
-                    },
-                    "comp_indicator": {
-                        "name": "SMA",
-                        "params": {"period": 100},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
-                }
-            ]
-        },
-        "strategy_settings": {
-            "end_date": "2020-12-31",
-            "init_date": "",
-            "start_date": "2019-01-01",
-            "trade_days": ["mon", "tue", "wed", "thu", "fri"],
-            "instruments": ["ABT", "ABBV", "HCA"],
-            "account_size": 15000,
-            "rebalance_days": ["mon", "tue", "wed", "thu", "fri"],
-            "trade_frequency": 1,
-            "rebalance_frequency": 1,
-            "position_sizing_strategy": {"name": "NoRiskManagement", "params": {}},
-            "position_management_strategy": {
-                "name": "ATRSizing",
-                "params": {
-                    "period": 15,
-                    "risk_coefficient": 0.9,
-                    "max_position_risk_frac": 0.15,
+from raposa_schemas import registry, schemas, strategy_info
+from raposa_schemas.frozen import freeze_model
+
+_preset1 = {
+    "email": "test@test.com",
+    "buy_signals": {
+        "signals": [
+            {
+                "rel": "leq",
+                "short": False,
+                "indicator": {
+                    "name": "EMA",
+                    "params": {"period": 3},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
+                },
+                "comp_indicator": {
+                    "name": "PRICE",
+                    "params": {"price_type": "Close"},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
+                },
+            }
+        ]
+    },
+    "sell_signals": {
+        "signals": [
+            {
+                "rel": "geq",
+                "short": False,
+                "indicator": {
+                    "name": "EMA",
+                    "params": {"period": 5},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
+                },
+                "comp_indicator": {
+                    "name": "PRICE",
+                    "params": {"price_type": "Close"},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
                 },
+            }
+        ]
+    },
+    "strategy_settings": {
+        "end_date": "2019-12-31",
+        "init_date": "",
+        "start_date": "2018-01-01",
+        "trade_days": ["mon", "tue", "wed", "thu", "fri"],
+        "instruments": ["TSLA"],
+        "account_size": 5000,
+        "rebalance_days": ["mon", "tue", "wed", "thu", "fri"],
+        "trade_frequency": 1,
+        "rebalance_frequency": 1,
+        "position_sizing_strategy": {"name": "EqualAllocation", "params": {}},
+        "position_management_strategy": {"name": "NoRiskManagement", "params": {}},
+    },
+}
+_preset2 = {
+    "email": "test@test.com",
+    "buy_signals": {
+        "signals": [
+            {
+                "rel": "geq",
+                "short": False,
+                "indicator": {
+                    "name": "PRICE",
+                    "params": {"price_type": "Close"},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
+                },
+                "comp_indicator": {
+                    "name": "SMA",
+                    "params": {"period": 20},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
+                },
+            }
+        ]
+    },
+    "sell_signals": {
+        "signals": [
+            {
+                "rel": "leq",
+                "short": False,
+                "indicator": {
+                    "name": "PRICE",
+                    "params": {"price_type": "Close"},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
+                },
+                "comp_indicator": {
+                    "name": "SMA",
+                    "params": {"period": 100},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
+                },
+            }
+        ]
+    },
+    "strategy_settings": {
+        "end_date": "2020-12-31",
+        "init_date": "",
+        "start_date": "2019-01-01",
+        "trade_days": ["mon", "tue", "wed", "thu", "fri"],
+        "instruments": ["ABT", "ABBV", "HCA"],
+        "account_size": 15000,
+        "rebalance_days": ["mon", "tue", "wed", "thu", "fri"],
+        "trade_frequency": 1,
+        "rebalance_frequency": 1,
+        "position_sizing_strategy": {"name": "NoRiskManagement", "params": {}},
+        "position_management_strategy": {
+            "name": "ATRSizing",
+            "params": {
+                "period": 15,
+                "risk_coefficient": 0.9,
+                "max_position_risk_frac": 0.15,
+                "risk_cap": False,
             },
         },
-    }
+    },
+}
 
-    preset3 = {
-        "email": "test@test.com",
-        "buy_signals": {
-            "signals": [
-                {
-                    "rel": "lt",
-                    "short": False,
-                    "indicator": {
-                        "name": "ATR",
-                        "params": {"period": 15, "multiple": 1.2},
-                        "needs_comp": True,
-                        "valid_comps": ["ATR"],
-                    },
-                    "comp_indicator": {
-                        "name": "ATR",
-                        "params": {"period": 25, "multiple": 2.5},
-                        "needs_comp": True,
-                        "valid_comps": ["ATR"],
-                    },
-                }
-            ]
-        },
-        "sell_signals": {
-            "signals": [
-                {
-                    "rel": "lt",
-                    "short": False,
-                    "indicator": {
-                        "name": "EMA",
-                        "params": {"period": 4},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
-                    "comp_indicator": {
-                        "name": "EMA",
-                        "params": {"period": 10},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
-                }
-            ]
-        },
-        "strategy_settings": {
-            "end_date": "2021-12-31",
-            "init_date": "",
-            "start_date": "2020-01-01",
-            "trade_days": ["wed", "tue", "thu"],
-            "instruments": ["SEDG"],
-            "account_size": 10000,
-            "rebalance_days": ["mon", "tue", "wed", "thu", "fri"],
-            "trade_frequency": 1,
-            "rebalance_frequency": 3,
-            "position_sizing_strategy": {
-                "name": "VOLATILITYSizing",
-                "params": {
-                    "period": 12,
-                    "risk_coefficient": 2,
-                    "max_position_risk_frac": 0.15,
+_preset3 = {
+    "email": "test@test.com",
+    "buy_signals": {
+        "signals": [
+            {
+                "rel": "lt",
+                "short": False,
+                "indicator": {
+                    "name": "ATR",
+                    "params": {"period": 15, "multiple": 1.2},
+                    "needs_comp": True,
+                    "valid_comps": ["ATR"],
+                },
+                "comp_indicator": {
+                    "name": "ATR",
+                    "params": {"period": 25, "multiple": 2.5},
+                    "needs_comp": True,
+                    "valid_comps": ["ATR"],
+                },
+            }
+        ]
+    },
+    "sell_signals": {
+        "signals": [
+            {
+                "rel": "lt",
+                "short": False,
+                "indicator": {
+                    "name": "EMA",
+                    "params": {"period": 4},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
                 },
+                "comp_indicator": {
+                    "name": "EMA",
+                    "params": {"period": 10},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
+                },
+            }
+        ]
+    },
+    "strategy_settings": {
+        "end_date": "2021-12-31",
+        "init_date": "",
+        "start_date": "2020-01-01",
+        "trade_days": ["wed", "tue", "thu"],
+        "instruments": ["SEDG"],
+        "account_size": 10000,
+        "rebalance_days": ["mon", "tue", "wed", "thu", "fri"],
+        "trade_frequency": 1,
+        "rebalance_frequency": 3,
+        "position_sizing_strategy": {
+            "name": "VOLATILITYSizing",
+            "params": {
+                "period": 12,
+                "risk_coefficient": 2,
+                "max_position_risk_frac": 0.15,
+                "risk_cap": False,
             },
-            "position_management_strategy": {"name": "NoRiskManagement", "params": {}},
         },
-    }
+        "position_management_strategy": {"name": "NoRiskManagement", "params": {}},
+    },
+}
 
-    preset4 = {
-        "email": "test@test.com",
-        "buy_signals": {
-            "signals": [
-                {
-                    "rel": "lt",
-                    "short": False,
-                    "indicator": {
-                        "name": "VOLATILITY",
-                        "params": {"period": 30, "multiple": 1.5},
-                        "needs_comp": True,
-                        "valid_comps": ["VOLATILITY", "LEVEL"],
-                    },
-                    "comp_indicator": {
-                        "name": "VOLATILITY",
-                        "params": {"period": 15, "multiple": 1.5},
-                        "needs_comp": True,
-                        "valid_comps": ["VOLATILITY", "LEVEL"],
-                    },
+_preset4 = {
+    "email": "test@test.com",
+    "buy_signals": {
+        "signals": [
+            {
+                "rel": "lt",
+                "short": False,
+                "indicator": {
+                    "name": "VOLATILITY",
+                    "params": {"period": 30, "multiple": 1.5},
+                    "needs_comp": True,
+                    "valid_comps": ["VOLATILITY", "LEVEL"],
                 },
-                {
-                    "rel": "gt",
-                    "short": False,
-                    "indicator": {
-                        "name": "PRICE",
-                        "params": {"price_type": "Close"},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
-                    },
-                    "comp_indicator": {
-                        "name": "EMA",
-                        "params": {"period": 26},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
+                "comp_indicator": {
+                    "name": "VOLATILITY",
+                    "params": {"period": 15, "multiple": 1.5},
+                    "needs_comp": True,
+                    "valid_comps": ["VOLATILITY", "LEVEL"],
                 },
-            ]
-        },
-        "sell_signals": {
-            "signals": [
-                {
-                    "rel": "lt",
-                    "short": False,
-                    "indicator": {
-                        "name": "EMA",
-                        "params": {"period": 12},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
-                    "comp_indicator": {
-                        "name": "EMA",
-                        "params": {"period": 26},
-                        "needs_comp": True,
-                        "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
-                    },
-                }
-            ]
-        },
-        "strategy_settings": {
-            "end_date": "2022-12-31",
-            "init_date": "",
-            "start_date": "2021-01-01",
-            "trade_days": ["tue", "wed", "thu", "fri"],
-            "instruments": ["AAPL", "AMZN", "NFLX", "GOOGL", "META"],
-            "account_size": 30000,
-            "rebalance_days": ["mon", "tue", "wed", "thu", "fri"],
-            "trade_frequency": 4,
-            "rebalance_frequency": 4,
-            "position_sizing_strategy": {
-                "name": "TurtleUnitSizing",
-                "params": {
-                    "period": 60,
-                    "num_turtle_units": 5,
-                    "risk_coefficient": 4,
-                    "max_position_risk_frac": 0.08,
+            },
+            {
+                "rel": "gt",
+                "short": False,
+                "indicator": {
+                    "name": "PRICE",
+                    "params": {"price_type": "Close"},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
+                },
+                "comp_indicator": {
+                    "name": "EMA",
+                    "params": {"period": 26},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
+                },
+            },
+        ]
+    },
+    "sell_signals": {
+        "signals": [
+            {
+                "rel": "lt",
+                "short": False,
+                "indicator": {
+                    "name": "EMA",
+                    "params": {"period": 12},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
                 },
+                "comp_indicator": {
+                    "name": "EMA",
+                    "params": {"period": 26},
+                    "needs_comp": True,
+                    "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
+                },
+            }
+        ]
+    },
+    "strategy_settings": {
+        "end_date": "2022-12-31",
+        "init_date": "",
+        "start_date": "2021-01-01",
+        "trade_days": ["tue", "wed", "thu", "fri"],
+        "instruments": ["AAPL", "AMZN", "NFLX", "GOOGL", "META"],
+        "account_size": 30000,
+        "rebalance_days": ["mon", "tue", "wed", "thu", "fri"],
+        "trade_frequency": 4,
+        "rebalance_frequency": 4,
+        "position_sizing_strategy": {
+            "name": "TurtleUnitSizing",
+            "params": {
+                "period": 60,
+                "num_turtle_units": 5,
+                "risk_coefficient": 4,
+                "max_position_risk_frac": 0.08,
+                "risk_cap": False,
             },
-            "position_management_strategy": {"name": "EqualAllocation", "params": {}},
         },
-    }
+        "position_management_strategy": {"name": "EqualAllocation", "params": {}},
+    },
+}
+
+
+# bot number -> (name, raw preset)
+_presets = {
+    1: ("ema_price_cross", _preset1),
+    2: ("sma_trend", _preset2),
+    3: ("atr_contraction", _preset3),
+    4: ("low_volatility_momentum", _preset4),
+}
+
+
+class DefaultBot(NamedTuple):
+    number: int
+    name: str
+    strategy: schemas.CompleteStrategy  # read-only, see frozen.py
+    fingerprint: str
+    lookback: int
+    indicator_plan: Tuple[strategy_info.IndicatorSpec, ...]
+    price_columns: Tuple[str, ...]
 
-    if bot_number == 1:
-        return preset1
-    elif bot_number == 2:
-        return preset2
-    elif bot_number == 3:
-        return preset3
-    elif bot_number == 4:
-        return preset4
+
+_default_bots: Optional[Dict[Union[int, str], DefaultBot]] = None
+
+
+def _build_default_bots() -> Dict[Union[int, str], DefaultBot]:
+    bots = {}
+    for number, (name, preset) in _presets.items():
+        strategy = schemas.CompleteStrategy(**preset)
+        settings = strategy.strategy_settings
+        registry.resolve_sizing(settings.position_sizing_strategy, strategy.schema_version)
+        registry.resolve_sizing(settings.position_management_strategy, strategy.schema_version)
+        bot = DefaultBot(
+            number=number,
+            name=name,
+            strategy=freeze_model(strategy),
+            fingerprint=strategy_info.fingerprint(strategy),
+            lookback=strategy_info.required_lookback(strategy),
+            indicator_plan=strategy_info.indicator_plan(strategy),
+            price_columns=strategy_info.required_price_columns(strategy),
+        )
+        bots[number] = bot
+        bots[name] = bot
+    return bots
+
+
+def get_default_strategy(bot: Union[int, str]) -> DefaultBot:
+    """
+    Validated, read-only default bot by number (1-4) or name,
+    e.g. "sma_trend".
+    """
+    global _default_bots
+    if _default_bots is None:
+        _default_bots = _build_default_bots()
+    try:
+        return _default_bots[bot]
+    except KeyError:
+        raise ValueError(f"{bot} is not a default bot.")
+
+
+def default_strategies() -> Tuple[DefaultBot, ...]:
+    """Every default bot, in bot number order."""
+    return tuple(get_default_strategy(number) for number in _presets)
+
+
+def get_default_bot(bot_number):
+    """Raw dict of a default bot that the caller is free to modify."""
+    if bot_number in _presets:
+        return deepcopy(_presets[bot_number][1])
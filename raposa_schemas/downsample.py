@@ -0,0 +1,147 @@
+# coding: utf-8
+
+"""
+Downsampling of PricePlot responses to about as many points as the chart
+can show. Requires numpy: pip install raposa-schemas[numpy]
+
+Two methods (schemas.downsample_methods):
+    lttb    Largest-Triangle-Three-Buckets, keeps the visual shape
+    minmax  the low and the high of each bucket, keeps every extreme
+
+A PricePyramid holds an instrument's full series downsampled by 2, 4, 8...
+so a request over any range picks the level that fits its point budget
+with a binary search and slices it, instead of touching every bar:
+
+    plots = PlotCache(load_closes)
+    dates, values = plots.plot(PricePlot(instr="SPY", start_date="1993-01-29",
+        end_date="2021-06-30", points=800))
+
+load_closes(instr) returns the instrument's trading days (datetime64) and
+Close prices. Pyramids are built once per (instrument, method) and cached.
+"""
+
+from functools import lru_cache
+from typing import Callable, Tuple, Union
+
+import numpy as np
+
+from raposa_schemas import schemas
+
+# levels stop once they are shorter than this
+min_level_points = 64
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n points Largest-Triangle-Three-Buckets keeps."""
+    length = len(y)
+    if n >= length or n < 3:
+        return np.arange(length)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # the first and last points are always kept, the rest is split in n - 2 buckets
+    edges = (np.arange(n - 1) * (length - 2) / (n - 2)).astype(np.int64) + 1
+    edges[-1] = length - 1
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, length - 1
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else length
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax(y: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the low and high of n // 2 equal buckets, in order."""
+    length = len(y)
+    buckets = max(n // 2, 1)
+    if n >= length:
+        return np.arange(length)
+    y = np.asarray(y, dtype=float)
+    edges = (np.arange(buckets + 1) * length / buckets).astype(np.int64)
+    lows = np.minimum.reduceat(y, edges[:-1])
+    highs = np.maximum.reduceat(y, edges[:-1])
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    low_idx = np.flatnonzero(y == lows[bucket_of])
+    high_idx = np.flatnonzero(y == highs[bucket_of])
+    # first low and first high of each bucket
+    low_idx = low_idx[np.unique(bucket_of[low_idx], return_index=True)[1]]
+    high_idx = high_idx[np.unique(bucket_of[high_idx], return_index=True)[1]]
+    return np.unique(np.concatenate([low_idx, high_idx]))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n: int, method: str = "lttb") -> np.ndarray:
+    """Indices of about n points of (x, y), at most n."""
+    if method == "lttb":
+        return lttb(x, y, n)
+    if method == "minmax":
+        return minmax(y, n)
+    raise ValueError(f"Downsampling method must be one of {list(schemas.downsample_methods)}.")
+
+
+class PricePyramid:
+    """An instrument's series at full resolution and downsampled by 2, 4, 8..."""
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray, method: str = "lttb"):
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        values = np.asarray(values, dtype=float)
+        x = dates.astype(np.int64)
+        self.method = method
+        # (dates, values, points per bar) for every level
+        self.levels = [(dates, values, 1.0)]
+        factor = 2
+        while len(values) // factor >= min_level_points:
+            idx = downsample(x, values, len(values) // factor, method)
+            self.levels.append((dates[idx], values[idx], len(idx) / len(values)))
+            factor *= 2
+        for level_dates, level_values, _ in self.levels:
+            level_dates.setflags(write=False)
+            level_values.setflags(write=False)
+
+    def query(self, start_date: str, end_date: str, points: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Dates and values between the dates (inclusive), at most points of them."""
+        start, end = np.datetime64(start_date, "D"), np.datetime64(end_date, "D")
+        dates = self.levels[0][0]
+        bars = np.searchsorted(dates, end, "right") - np.searchsorted(dates, start, "left")
+        level_dates, level_values = dates, self.levels[0][1]
+        if points is not None:
+            for level_dates, level_values, density in self.levels:
+                if bars * density <= points:
+                    break
+        lo = np.searchsorted(level_dates, start, "left")
+        hi = np.searchsorted(level_dates, end, "right")
+        level_dates, level_values = level_dates[lo:hi], level_values[lo:hi]
+        if points is not None and len(level_values) > points:
+            idx = downsample(level_dates.astype(np.int64), level_values, points, self.method)
+            level_dates, level_values = level_dates[idx], level_values[idx]
+        return level_dates, level_values
+
+
+class PlotCache:
+    """PricePlot responses from cached per-instrument pyramids."""
+
+    def __init__(self, load_closes: Callable[[str], Tuple[np.ndarray, np.ndarray]],
+            maxsize: int = 512):
+        self.load_closes = load_closes
+        self.pyramid = lru_cache(maxsize=maxsize)(self._build)
+
+    def _build(self, instr: str, method: str) -> PricePyramid:
+        dates, values = self.load_closes(instr)
+        return PricePyramid(dates, values, method)
+
+    def plot(self, request: Union[schemas.PricePlot, dict]) -> Tuple[np.ndarray, np.ndarray]:
+        if isinstance(request, dict):
+            request = schemas.PricePlot(**request)
+        return self.pyramid(request.instr, request.method).query(
+            request.start_date, request.end_date, request.points
+        )
+
+    def clear(self):
+        """Forget every pyramid, e.g. after new prices were loaded."""
+        self.pyramid.cache_clear()
@@ -0,0 +1,127 @@
+# coding: utf-8
+
+"""
+Build-time export of everything the API and the website derive from the
+schemas: the JSON Schema of every model, the dropdown options, the default
+params of every indicator and sizing strategy and the valid comparisons.
+
+The export is a single JSON artifact stamped with the package version and a
+sha256 of its content, so workers and clients can load it instead of
+rebuilding it and HTTP caches can serve it with the hash as its ETag.
+
+    python -m raposa_schemas.export schemas.json
+
+    artifact = load_artifact("schemas.json")
+    etag(artifact)  # -> '"<sha256>"'
+"""
+
+import hashlib
+import json
+import sys
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import BaseModel
+
+from raposa_schemas import registry, schemas
+from raposa_schemas.version import VERSION
+
+# dropdowns built from the label -> value dicts in schemas.py
+dropdown_sources = {
+    "every_indicator": schemas.every_indicator,
+    "buy_indicators": schemas.buy_indicators,
+    "sell_indicators": schemas.sell_indicators,
+    "position_sizings": schemas.position_sizings,
+    "position_managements": schemas.position_managements,
+    "relations": schemas.relations,
+}
+
+
+def _models():
+    for name, klass in vars(schemas).items():
+        if (
+            isinstance(klass, type)
+            and issubclass(klass, BaseModel)
+            and klass.__module__ == schemas.__name__
+        ):
+            yield name, klass
+
+
+def _content_hash(content: dict) -> str:
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def build_artifact() -> dict:
+    """Build the artifact from the schemas in this package."""
+    content = {
+        "version": VERSION,
+        "schemas": {name: klass.schema() for name, klass in _models()},
+        "dropdowns": {
+            name: [{"label": label, "value": label} for label in source]
+            for name, source in dropdown_sources.items()
+        },
+        "labels": {name: dict(source) for name, source in dropdown_sources.items()},
+        "default_params": {
+            name: dict(info.default_params) for name, info in registry.INFO_BY_NAME.items()
+        },
+        "valid_comps": {
+            name: list(schemas.comp_matrix.comps[name]) for name in schemas.comp_matrix.names
+        },
+        "limits": {
+            "max_signals": schemas.max_signals,
+            "max_instruments": schemas.max_instruments,
+        },
+    }
+    content["hash"] = _content_hash(content)
+    return content
+
+
+def etag(artifact: dict) -> str:
+    """HTTP ETag of an artifact."""
+    return f'"{artifact["hash"]}"'
+
+
+def artifact_json(artifact: Optional[dict] = None) -> str:
+    return json.dumps(artifact or get_artifact(), sort_keys=True, separators=(",", ":"))
+
+
+def write_artifact(path: str, artifact: Optional[dict] = None) -> dict:
+    artifact = artifact or get_artifact()
+    with open(path, "w") as f:
+        f.write(artifact_json(artifact))
+    return artifact
+
+
+def load_artifact(path: str) -> dict:
+    """
+    Load an exported artifact. Raises ValueError if it was not built from
+    this version of the schemas or its content does not match its hash.
+    """
+    with open(path) as f:
+        artifact = json.load(f)
+    content = {key: value for key, value in artifact.items() if key != "hash"}
+    if artifact.get("version") != VERSION:
+        raise ValueError(
+            f"{path} was built for raposa-schemas {artifact.get('version')}, not {VERSION}."
+        )
+    if _content_hash(content) != artifact.get("hash"):
+        raise ValueError(f"{path} does not match its content hash.")
+    return artifact
+
+
+@lru_cache(maxsize=None)
+def get_artifact() -> dict:
+    """The artifact for this process, built once. Treat it as read-only."""
+    return build_artifact()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else "raposa_schemas.json"
+    artifact = write_artifact(path)
+    print(f"Wrote {path} (version {artifact['version']}, hash {artifact['hash'][:12]})")
+
+
+if __name__ == "__main__":
+    main()
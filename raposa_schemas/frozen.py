@@ -0,0 +1,92 @@
+# coding: utf-8
+
+"""
+Read-only versions of the schema models for state that is shared between
+callers, e.g. the default bots.
+
+freeze_model() returns a copy of a validated model where every model is an
+instance of a frozen subclass of its schema (so isinstance checks and
+.dict()/.json() still work), dicts are FrozenDicts, Instruments are
+FrozenInstruments and other lists are tuples.
+Nothing is re-validated. .dict() still returns a plain, mutable copy.
+"""
+
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+from raposa_schemas import schemas
+from raposa_schemas.schemas import FrozenDict, FrozenInstruments, Instruments  # noqa: F401
+
+
+class _FrozenConfig:
+    allow_mutation = False
+    frozen = True
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _thawed_dict(self, **kwargs) -> Dict[str, Any]:
+    """Plain, mutable dict of the model, same as the unfrozen schema returns."""
+    return _thaw(super(type(self), self).dict(**kwargs))
+
+
+_frozen_classes: Dict[Type[BaseModel], Type[BaseModel]] = {}
+
+
+def frozen_class(klass: Type[BaseModel]) -> Type[BaseModel]:
+    """Read-only subclass of a schema class"""
+    if klass.__config__.frozen:
+        return klass
+    try:
+        return _frozen_classes[klass]
+    except KeyError:
+        pass
+    frozen = type(
+        f"Frozen{klass.__name__}",
+        (klass,),
+        {"Config": _FrozenConfig, "__module__": __name__, "dict": _thawed_dict},
+    )
+    _frozen_classes[klass] = frozen
+    # module level so frozen models can be pickled
+    globals()[frozen.__name__] = frozen
+    return frozen
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of a value: dicts, lists and models all the way down."""
+    if isinstance(value, BaseModel):
+        return freeze_model(value)
+    if isinstance(value, (FrozenDict, FrozenInstruments)):
+        return value
+    if isinstance(value, Instruments):
+        return FrozenInstruments(value)
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def freeze_model(model: BaseModel) -> BaseModel:
+    """Read-only copy of a validated model. No validation is re-run."""
+    klass = frozen_class(type(model))
+    if type(model) is klass:
+        return model
+    values = {name: freeze(value) for name, value in model.__dict__.items()}
+    return klass.construct(_fields_set=set(model.__fields_set__), **values)
+
+
+for _klass in list(vars(schemas).values()):
+    if (
+        isinstance(_klass, type)
+        and issubclass(_klass, BaseModel)
+        and _klass.__module__ == schemas.__name__
+    ):
+        frozen_class(_klass)
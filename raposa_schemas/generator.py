@@ -0,0 +1,367 @@
+# coding: utf-8
+
+"""
+Seeded generator of random, valid CompleteStrategy payloads, e.g. for load
+testing the API.
+
+Values are sampled straight from the schema constraints in registry.py
+(param order, bounds and cross-param orderings like MACD fast < slow) and
+schemas.comp_matrix, so no payload has to be validated and thrown away:
+
+    generator = PayloadGenerator(seed=0)
+    payloads = list(generator.payloads(100000))
+
+Payloads share their read-only parts (valid_comps tuples) and dates come
+from a precomputed table; one core streams 20-30k payloads/s on a recent
+x86 machine, and tests/generator_schemas.py checks at least 5k/s.
+
+Every indicator, sizing, relation and instrument count (1 to
+max_instruments - 1) can come up. Pass invalid={case: fraction} to replace
+that fraction of the payloads with a known invalid one:
+
+    generator = PayloadGenerator(seed=0, invalid={"date_range": 0.05, "macd_order": 0.01})
+    for case, payload in generator.samples(1000):
+        ...  # case is None for valid payloads
+
+CompleteStrategy rejects every case except those in param_cases, which it
+does not look into; registry.resolve_indicator rejects those.
+"""
+
+import random
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from raposa_schemas import registry, schemas
+
+default_symbols = (
+    "AAPL", "ABBV", "ADBE", "AMD", "AMZN", "BA", "BAC", "BRK.B", "C", "CAT",
+    "COST", "CRM", "CSCO", "CVX", "DIS", "GE", "GLD", "GOOG", "GS", "HD",
+    "IBM", "INTC", "IWM", "JNJ", "JPM", "KO", "MA", "MCD", "META", "MRK",
+    "MSFT", "NFLX", "NKE", "NVDA", "ORCL", "PEP", "PFE", "PG", "QQQ", "SPY",
+    "T", "TLT", "TSLA", "UNH", "V", "VZ", "WFC", "WMT", "XOM", "XLF",
+)
+weekdays = ("mon", "tue", "wed", "thu", "fri")
+first_day = date(2000, 1, 3).toordinal()
+last_day = date(2021, 12, 31).toordinal()
+max_time_param = 252  # a year of bars
+number_scale = (0.25, 4.0)  # numbers are sampled around their default
+# ISO strings of every day a payload can use (init_date goes back a year),
+# _iso_days[day - _iso_first_day] is date.fromordinal(day).isoformat()
+_iso_first_day = first_day - 365
+_iso_days = tuple(date.fromordinal(day).isoformat() for day in range(_iso_first_day, last_day + 1))
+
+# Samplers take random.Random().random: one float call per value is several
+# times faster than randint() and choice().
+Sampler = Callable[[Callable[[], float]], object]
+
+
+def _randint(random: Callable[[], float], low: int, high: int) -> int:
+    return low + int(random() * (high - low + 1))
+
+
+def _choice(random: Callable[[], float], values: Sequence):
+    return values[int(random() * len(values))]
+
+
+def param_bounds(spec: registry.ParamSpec, default, is_time_param: bool) -> Tuple[float, float]:
+    """
+    Lowest and highest value sampled for an "int" or "number" param, both
+    valid: the schema's bounds where it has them, otherwise time params up
+    to max_time_param and other params around their default.
+    """
+    if spec.kind == "int":
+        low = 1 if spec.minimum is None else int(spec.minimum) + (1 if spec.exclusive_minimum else 0)
+        low = max(low, 2) if is_time_param else low
+        if spec.maximum is not None:
+            high = int(spec.maximum)
+        elif is_time_param:
+            high = max_time_param
+        else:
+            high = max(low, 3 * (default if isinstance(default, int) else 1))
+        return low, high
+    if spec.maximum is not None:
+        low = 0.0 if spec.minimum is None else float(spec.minimum)
+        if spec.minimum is None or spec.exclusive_minimum:
+            # round up to stay above an exclusive minimum
+            low = round(low + 0.0001, 4)
+        return low, float(spec.maximum)
+    default = default if isinstance(default, (int, float)) and default else 1.0
+    low, high = sorted((default * number_scale[0], default * number_scale[1]))
+    return low, high
+
+
+def _int_sampler(spec: registry.ParamSpec, default, is_time_param: bool) -> Sampler:
+    low, high = param_bounds(spec, default, is_time_param)
+    span = high - low + 1
+    return lambda random: low + int(random() * span)
+
+
+def _number_sampler(spec: registry.ParamSpec, default) -> Sampler:
+    low, high = param_bounds(spec, default, False)
+    span = high - low
+    return lambda random: round(low + span * random(), 4)
+
+
+def _param_sampler(spec: registry.ParamSpec, default, is_time_param: bool) -> Sampler:
+    if spec.kind == "choice":
+        choices, n = spec.choices, len(spec.choices)
+        return lambda random: choices[int(random() * n)]
+    if spec.kind == "bool":
+        return lambda random: random() < 0.5
+    if spec.kind == "int":
+        return _int_sampler(spec, default, is_time_param)
+    return _number_sampler(spec, default)
+
+
+class _SchemaSampler:
+    """Samples the params of one indicator or sizing schema, in key order."""
+
+    def __init__(self, name: str):
+        info = registry.INFO_BY_NAME[name]
+        self.name = name
+        self.keys = tuple(spec.name for spec in info.param_specs)
+        self.samplers = tuple(
+            _param_sampler(spec, info.default_params.get(spec.name), spec.name in info.time_params)
+            for spec in info.param_specs
+        )
+        self.orderings = info.param_orderings
+        klass = info.klass
+        self.needs_comp = klass.__fields__["needs_comp"].default if "needs_comp" in klass.__fields__ else None
+        # a tuple, so every payload can share it
+        valid_comps = klass.__fields__["valid_comps"].default if "valid_comps" in klass.__fields__ else None
+        self.valid_comps = None if valid_comps is None else tuple(valid_comps)
+
+    def params(self, random: Callable[[], float]) -> dict:
+        params = dict(zip(self.keys, [sampler(random) for sampler in self.samplers]))
+        for smaller, larger, strict in self.orderings:
+            low, high = sorted((params[smaller], params[larger]))
+            if strict and low == high:
+                high += 1
+            params[smaller], params[larger] = low, high
+        return params
+
+
+class PayloadGenerator:
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        symbols: Sequence[str] = default_symbols,
+        invalid: Optional[Mapping[str, float]] = None,
+    ):
+        self.rng = random.Random(seed)
+        self.random = self.rng.random
+        self.symbols = tuple(symbols)
+        if len(self.symbols) < schemas.max_instruments:
+            raise ValueError(f"At least {schemas.max_instruments} symbols are needed.")
+        self.samplers = {name: _SchemaSampler(name) for name in registry.INFO_BY_NAME}
+        # indicators each side can use that have a legal way to be compared
+        self.side_indicators = {
+            side: tuple(
+                name for name in dict.fromkeys(label_map.values())
+                if name in schemas.comp_matrix.bits
+                and (schemas.comp_matrix.comps[name] or not schemas.comp_matrix.needs_comp[name])
+            )
+            for side, label_map in (("buy", schemas.buy_indicators), ("sell", schemas.sell_indicators))
+        }
+        self.sizings = tuple(dict.fromkeys(schemas.position_sizings.values()))
+        self.managements = tuple(dict.fromkeys(schemas.position_managements.values()))
+        self.relations = tuple(schemas.relations.values())
+        invalid = dict(invalid or {})
+        unknown = set(invalid) - set(invalid_cases)
+        if unknown:
+            raise ValueError(f"Unknown invalid cases {sorted(unknown)}, see invalid_cases.")
+        if sum(invalid.values()) > 1:
+            raise ValueError("The invalid fractions add up to more than 1.")
+        self.invalid = tuple(invalid.items())
+        self.count = 0
+
+    def indicator(self, name: str) -> dict:
+        sampler = self.samplers[name]
+        return {
+            "name": name,
+            "params": sampler.params(self.random),
+            "needs_comp": sampler.needs_comp,
+            "valid_comps": sampler.valid_comps,
+        }
+
+    def sizing(self, name: str) -> dict:
+        return {"name": name, "params": self.samplers[name].params(self.random)}
+
+    def signal(self, side: str) -> dict:
+        random = self.random
+        name = _choice(random, self.side_indicators[side])
+        comps = schemas.comp_matrix.comps[name]
+        with_comp = comps and (schemas.comp_matrix.needs_comp[name] or random() < 0.5)
+        return {
+            "rel": _choice(random, self.relations),
+            "short": random() < 0.1,
+            "indicator": self.indicator(name),
+            "comp_indicator": self.indicator(_choice(random, comps)) if with_comp else None,
+        }
+
+    def signals(self, side: str) -> dict:
+        n = _randint(self.random, 1, schemas.max_signals)
+        return {"signals": [self.signal(side) for _ in range(n)]}
+
+    def instruments(self, n: int) -> List[str]:
+        """n distinct symbols (a partial Fisher-Yates shuffle)."""
+        random = self.random
+        symbols = list(self.symbols)
+        for i in range(n):
+            j = i + int(random() * (len(symbols) - i))
+            symbols[i], symbols[j] = symbols[j], symbols[i]
+        return symbols[:n]
+
+    def settings(self) -> dict:
+        random = self.random
+        start = _randint(random, first_day, last_day - 30)
+        end = _randint(random, start + 1, min(start + 3650, last_day))
+        init_date = ""
+        if random() < 0.25:
+            init_date = _iso_days[_randint(random, start - 365, end) - _iso_first_day]
+        days = [day for day in weekdays if random() < 0.8] or [_choice(random, weekdays)]
+        return {
+            "account_size": 500.0 * _randint(random, 2, 2000),
+            "init_date": init_date,
+            "start_date": _iso_days[start - _iso_first_day],
+            "end_date": _iso_days[end - _iso_first_day],
+            "instruments": self.instruments(_randint(random, 1, schemas.max_instruments - 1)),
+            "trade_days": days,
+            "trade_frequency": _randint(random, 1, 20),
+            "position_sizing_strategy": self.sizing(_choice(random, self.sizings)),
+            "position_management_strategy": self.sizing(_choice(random, self.managements)),
+            "rebalance_days": list(days),
+            "rebalance_frequency": _randint(random, 0, 20),
+        }
+
+    def strategy(self) -> dict:
+        """A valid CompleteStrategy payload."""
+        self.count += 1
+        return {
+            "strategy_settings": self.settings(),
+            "buy_signals": self.signals("buy"),
+            "sell_signals": self.signals("sell"),
+            "email": f"user{self.count}@example.com",
+            "schema_version": schemas.SCHEMA_VERSION,
+        }
+
+    def sample(self) -> Tuple[Optional[str], dict]:
+        """(invalid case or None, payload)"""
+        payload = self.strategy()
+        draw = self.random()
+        for case, fraction in self.invalid:
+            if draw < fraction:
+                invalid_cases[case](self, payload)
+                return case, payload
+            draw -= fraction
+        return None, payload
+
+    def samples(self, n: Optional[int] = None) -> Iterator[Tuple[Optional[str], dict]]:
+        """n samples, or an endless stream of them."""
+        count = 0
+        while n is None or count < n:
+            yield self.sample()
+            count += 1
+
+    def payloads(self, n: Optional[int] = None) -> Iterator[dict]:
+        for _, payload in self.samples(n):
+            yield payload
+
+
+def _first_buy_signal(generator: PayloadGenerator, payload: dict, name: str) -> dict:
+    """Replace the first buy signal with one using indicator name."""
+    comps = schemas.comp_matrix.comps[name]
+    signal = {
+        "rel": "leq",
+        "short": False,
+        "indicator": generator.indicator(name),
+        "comp_indicator": generator.indicator(_choice(generator.random, comps)) if comps else None,
+    }
+    payload["buy_signals"]["signals"][0] = signal
+    return signal
+
+
+def _no_instruments(generator, payload):
+    payload["strategy_settings"]["instruments"] = []
+
+
+def _too_many_instruments(generator, payload):
+    payload["strategy_settings"]["instruments"] = list(generator.symbols[:schemas.max_instruments])
+
+
+def _too_many_signals(generator, payload):
+    payload["buy_signals"]["signals"] = [generator.signal("buy") for _ in range(schemas.max_signals + 1)]
+
+
+def _invalid_comparison(generator, payload):
+    signal = payload["buy_signals"]["signals"][0]
+    name = signal["indicator"]["name"]
+    invalid = [comp for comp in schemas.comp_matrix.names if not schemas.comp_matrix.is_valid(name, comp)]
+    signal["comp_indicator"] = generator.indicator(_choice(generator.random, invalid))
+
+
+def _missing_comparison(generator, payload):
+    names = [name for name in generator.side_indicators["buy"] if schemas.comp_matrix.needs_comp[name]]
+    _first_buy_signal(generator, payload, _choice(generator.random, names))["comp_indicator"] = None
+
+
+def _bad_relation(generator, payload):
+    payload["buy_signals"]["signals"][0]["rel"] = "neq"
+
+
+def _date_range(generator, payload):
+    settings = payload["strategy_settings"]
+    settings["start_date"], settings["end_date"] = settings["end_date"], settings["start_date"]
+
+
+def _bad_date(generator, payload):
+    payload["strategy_settings"]["end_date"] = "2019-02-30"
+
+
+def _trade_frequency(generator, payload):
+    payload["strategy_settings"]["trade_frequency"] = 0
+
+
+def _macd_order(generator, payload):
+    params = _first_buy_signal(generator, payload, "MACD")["indicator"]["params"]
+    params["fastEMA_period"] = params["slowEMA_period"] + _randint(generator.random, 0, 10)
+
+
+def _hurst_lags(generator, payload):
+    params = _first_buy_signal(generator, payload, "HURST")["indicator"]["params"]
+    params["minLags"] = params["maxLags"] + _randint(generator.random, 0, 10)
+
+
+def _param_key_order(generator, payload):
+    signal = _first_buy_signal(generator, payload, "MACD_SIGNAL")
+    signal["indicator"]["params"] = dict(reversed(list(signal["indicator"]["params"].items())))
+
+
+def _param_bounds(generator, payload):
+    _first_buy_signal(generator, payload, "SMA")["indicator"]["params"]["period"] = -_randint(generator.random, 0, 100)
+
+
+# case -> function making a valid payload invalid in place
+invalid_cases: Dict[str, Callable[[PayloadGenerator, dict], None]] = {
+    "no_instruments": _no_instruments,
+    "too_many_instruments": _too_many_instruments,
+    "too_many_signals": _too_many_signals,
+    "invalid_comparison": _invalid_comparison,
+    "missing_comparison": _missing_comparison,
+    "bad_relation": _bad_relation,
+    "date_range": _date_range,
+    "bad_date": _bad_date,
+    "trade_frequency": _trade_frequency,
+    "macd_order": _macd_order,
+    "hurst_lags": _hurst_lags,
+    "param_key_order": _param_key_order,
+    "param_bounds": _param_bounds,
+}
+
+# cases in the params of an indicator, which only its own schema checks
+param_cases = ("macd_order", "hurst_lags", "param_key_order", "param_bounds")
+
+
+def generate(n: int, seed: Optional[int] = None, **kwargs) -> List[dict]:
+    """n valid (or, with invalid=..., partly invalid) payloads."""
+    return list(PayloadGenerator(seed, **kwargs).payloads(n))
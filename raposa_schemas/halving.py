@@ -0,0 +1,314 @@
+# coding: utf-8
+
+"""
+Successive-halving search over the numeric params of a strategy.
+Requires numpy: pip install raposa-schemas[numpy]
+
+The search space comes from the schema bounds in registry.py: the time
+params and numbers of every indicator and sizing in the strategy, plus
+trade_frequency and rebalance_frequency. Candidates are first scored on a
+short window at the start of the strategy's dates; each stage keeps the
+best 1/eta of them and scores those on a window eta times longer, until
+the last stage runs the full period:
+
+    space = SearchSpace.of(strategy)
+    objective = LockstepObjective(dates, prices)
+    result = successive_halving(strategy, objective, n_candidates=243, eta=3, workers=8)
+    result.best, result.score, result.cost / grid_cost(space, 10, objective.dates, strategy)
+
+An objective takes a list of strategy dicts and a (start_date, end_date)
+window and returns one score per strategy, higher is better. It runs in
+worker processes, so it must be picklable. LockstepObjective scores the
+total return of a batch of candidates in lockstep (see lockstep.py), which
+only sizes with EqualAllocation; searching the risk coefficients of the
+other sizings takes an objective backed by the backtester.
+"""
+
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from raposa_schemas import generator, registry, schemas, strategy_info
+from raposa_schemas.lockstep import Lockstep
+
+Path = Tuple[Union[str, int], ...]
+Window = Tuple[str, str]
+Objective = Callable[[List[dict], Window], Sequence[float]]
+
+# bounds of the settings the search can change
+frequency_bounds = {"trade_frequency": (1, 20), "rebalance_frequency": (0, 20)}
+min_window_bars = 20
+
+
+class Dimension(NamedTuple):
+    path: Path  # keys from the strategy dict down to the value
+    kind: str  # "int" or "number"
+    low: float
+    high: float
+
+
+def _numeric_dimensions(prefix: Path, schema: dict, default_bounds) -> List[Dimension]:
+    info = registry.get_info(schema)
+    params = schema.get("params") or {}
+    dimensions = []
+    for spec in info.param_specs:
+        if spec.kind not in ("int", "number") or spec.name not in params:
+            continue
+        path = prefix + ("params", spec.name)
+        if path in default_bounds:
+            low, high = default_bounds[path]
+        else:
+            # the same bounds the payload generator samples from
+            low, high = generator.param_bounds(spec, info.default_params.get(spec.name), spec.name in info.time_params)
+        dimensions.append(Dimension(path, spec.kind, low, high))
+    return dimensions
+
+
+def _get(value, path: Path):
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _set(value, path: Path, item):
+    _get(value, path[:-1])[path[-1]] = item
+
+
+class SearchSpace:
+    """The numeric params of one strategy and their bounds."""
+
+    def __init__(self, strategy: Union[schemas.CompleteStrategy, dict], dimensions: Sequence[Dimension]):
+        self.base = strategy_info.as_dict(strategy)
+        self.dimensions = tuple(dimensions)
+        self._by_path = {dimension.path: dimension for dimension in self.dimensions}
+        # (smaller path, larger path, strict) of params that must stay ordered
+        self.orderings = []
+        for prefix, schema in self._schemas():
+            for smaller, larger, strict in registry.get_info(schema).param_orderings:
+                paths = (prefix + ("params", smaller), prefix + ("params", larger))
+                if all(path in self._by_path for path in paths):
+                    if self._by_path[paths[0]].low + strict > self._by_path[paths[1]].high:
+                        raise ValueError(f"The bounds of {smaller} and {larger} leave no ordered values.")
+                    self.orderings.append(paths + (strict,))
+
+    @classmethod
+    def of(
+        cls,
+        strategy: Union[schemas.CompleteStrategy, dict],
+        bounds: Optional[Dict[Path, Tuple[float, float]]] = None,
+        exclude: Sequence[Path] = (),
+    ) -> "SearchSpace":
+        """Every numeric param of strategy, bounds overrides the defaults by path."""
+        bounds = dict(bounds or {})
+        space = cls(strategy, ())
+        dimensions = []
+        for prefix, schema in space._schemas():
+            dimensions.extend(_numeric_dimensions(prefix, schema, bounds))
+        for name, (low, high) in frequency_bounds.items():
+            path = ("strategy_settings", name)
+            low, high = bounds.get(path, (low, high))
+            dimensions.append(Dimension(path, "int", low, high))
+        return cls(strategy, [dimension for dimension in dimensions if dimension.path not in exclude])
+
+    def _schemas(self):
+        for side in ("buy_signals", "sell_signals"):
+            for n, signal in enumerate(self.base[side]["signals"]):
+                for key in ("indicator", "comp_indicator"):
+                    if signal.get(key):
+                        yield (side, "signals", n, key), signal[key]
+        settings = self.base["strategy_settings"]
+        for key in ("position_sizing_strategy", "position_management_strategy"):
+            yield ("strategy_settings", key), settings[key]
+
+    @property
+    def paths(self) -> Tuple[Path, ...]:
+        return tuple(dimension.path for dimension in self.dimensions)
+
+    def __len__(self):
+        return len(self.dimensions)
+
+    def _value(self, dimension: Dimension, u: float):
+        if dimension.kind == "int":
+            return int(dimension.low) + min(int(u * (dimension.high - dimension.low + 1)), int(dimension.high - dimension.low))
+        return round(dimension.low + u * (dimension.high - dimension.low), 4)
+
+    def _order(self, point: Dict[Path, float]) -> Dict[Path, float]:
+        """Orders the params that must be, as close to the point as their bounds allow."""
+        for smaller, larger, strict in self.orderings:
+            a, b = self._by_path[smaller], self._by_path[larger]
+            gap = 1 if strict else 0
+            low, high = sorted((point[smaller], point[larger]))
+            low, high = min(max(low, a.low), a.high), min(max(high, b.low), b.high)
+            if high - low < gap:
+                if low + gap <= b.high:
+                    high = low + gap
+                elif high - gap >= a.low:
+                    low = high - gap
+                else:
+                    low, high = a.low, max(a.low + gap, b.low)
+            point[smaller], point[larger] = low, high
+        return point
+
+    def sample(self, n: int, seed: Optional[int] = None) -> List[Dict[Path, float]]:
+        """n random points, each dimension uniform over its bounds."""
+        rng = random.Random(seed)
+        return [
+            self._order({dimension.path: self._value(dimension, rng.random()) for dimension in self.dimensions})
+            for _ in range(n)
+        ]
+
+    def grid(self, steps: int) -> List[Dict[Path, float]]:
+        """Every combination of steps evenly spaced values per dimension (duplicates dropped)."""
+        axes = [
+            sorted({self._value(dimension, u) for u in np.linspace(0, 0.999999, steps)})
+            for dimension in self.dimensions
+        ]
+        points = {}
+        for values in np.array(np.meshgrid(*axes, indexing="ij"), dtype=object).reshape(len(axes), -1).T:
+            point = self._order(dict(zip(self.paths, values)))
+            points[tuple(point.values())] = point
+        return list(points.values())
+
+    def strategy(self, point: Dict[Path, float]) -> dict:
+        """The base strategy with a point's values."""
+        out = deepcopy(self.base)
+        for path, value in point.items():
+            _set(out, path, value)
+        return out
+
+
+def _window_strategies(strategies: List[dict], window: Window) -> List[dict]:
+    out = []
+    for strategy in strategies:
+        settings = dict(strategy["strategy_settings"], start_date=window[0], end_date=window[1])
+        out.append(dict(strategy, strategy_settings=settings))
+    return out
+
+
+class LockstepObjective:
+    """Total return over the window, all candidates in one lockstep run."""
+
+    def __init__(self, dates, prices, instruments: Optional[Sequence[str]] = None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.prices = prices
+        self.instruments = instruments
+
+    def __call__(self, strategies: List[dict], window: Window) -> np.ndarray:
+        result = Lockstep(_window_strategies(strategies, window), self.dates, self.prices, self.instruments).run()
+        accounts = np.array([strategy["strategy_settings"]["account_size"] for strategy in strategies])
+        return result.total[:, -1] / accounts - 1
+
+
+class Stage(NamedTuple):
+    window: Window
+    bars: int
+    points: Tuple[Dict[Path, float], ...]
+    scores: np.ndarray
+
+
+class HalvingResult(NamedTuple):
+    best: dict  # the best strategy, as a dict
+    point: Dict[Path, float]
+    score: float  # over the full period
+    stages: Tuple[Stage, ...]
+
+    @property
+    def cost(self) -> int:
+        """Strategy-bars simulated."""
+        return sum(len(stage.points) * stage.bars for stage in self.stages)
+
+
+def stage_windows(dates: np.ndarray, start_date: str, end_date: str, n_stages: int, eta: float) -> List[Tuple[Window, int]]:
+    """
+    Windows from start_date, eta times longer each stage, the last one
+    reaching end_date, with their number of bars.
+    """
+    start = int(np.searchsorted(dates, np.datetime64(start_date)))
+    stop = int(np.searchsorted(dates, np.datetime64(end_date), side="right"))
+    if stop - start < 2:
+        raise ValueError("The strategy's dates cover less than two bars of the data.")
+    windows = []
+    for stage in range(n_stages):
+        bars = max(min(min_window_bars, stop - start), int(round((stop - start) / eta ** (n_stages - 1 - stage))))
+        windows.append(((str(dates[start]), str(dates[start + bars - 1])), bars))
+    return windows
+
+
+def grid_cost(space: SearchSpace, steps: int, dates, strategy: Union[schemas.CompleteStrategy, dict]) -> int:
+    """Strategy-bars of backtesting every grid point over the full period."""
+    settings = strategy_info.as_dict(strategy)["strategy_settings"]
+    (_, bars), = stage_windows(np.asarray(dates, dtype="datetime64[D]"), settings["start_date"], settings["end_date"], 1, 1)
+    return len(space.grid(steps)) * bars
+
+
+_worker_objective = None
+
+
+def _init_worker(objective: Objective):
+    global _worker_objective
+    _worker_objective = objective
+
+
+def _score_chunk(strategies: List[dict], window: Window) -> Sequence[float]:
+    return _worker_objective(strategies, window)
+
+
+def successive_halving(
+    strategy: Union[schemas.CompleteStrategy, dict],
+    objective: Objective,
+    dates=None,
+    space: Optional[SearchSpace] = None,
+    n_candidates: int = 81,
+    eta: int = 3,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> HalvingResult:
+    """
+    Score n_candidates random points of space (every numeric param of the
+    strategy by default) with successive halving. dates are the bars of
+    the objective's data (objective.dates by default). workers=0 scores in
+    this process, otherwise each stage is split into chunks of chunk_size
+    candidates scored in a process pool.
+    """
+    if eta < 2:
+        raise ValueError("eta must be >= 2.")
+    space = space or SearchSpace.of(strategy)
+    dates = np.asarray(getattr(objective, "dates", None) if dates is None else dates, dtype="datetime64[D]")
+    settings = space.base["strategy_settings"]
+    n_stages = max(1, math.ceil(math.log(n_candidates, eta))) if n_candidates > 1 else 1
+    windows = stage_windows(dates, settings["start_date"], settings["end_date"], n_stages, eta)
+    points = space.sample(n_candidates, seed)
+
+    pool = None if workers == 0 else ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1, initializer=_init_worker, initargs=(objective,)
+    )
+    stages = []
+    try:
+        for n, (window, bars) in enumerate(windows):
+            strategies = [space.strategy(point) for point in points]
+            chunks = [strategies[i:i + chunk_size] for i in range(0, len(strategies), chunk_size)]
+            if pool is None:
+                scores = [objective(chunk, window) for chunk in chunks]
+            else:
+                scores = list(pool.map(_score_chunk, chunks, [window] * len(chunks)))
+            scores = np.concatenate([np.asarray(chunk, dtype=float) for chunk in scores])
+            scores[np.isnan(scores)] = -np.inf
+            stages.append(Stage(window, bars, tuple(points), scores))
+            if n < len(windows) - 1:
+                keep = max(1, len(points) // eta)
+                # stable, so ties keep the sampling order
+                order = np.argsort(-scores, kind="stable")[:keep]
+                points = [points[i] for i in order]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    last = stages[-1]
+    best = int(np.argmax(last.scores))
+    return HalvingResult(space.strategy(last.points[best]), last.points[best], float(last.scores[best]), tuple(stages))
@@ -0,0 +1,402 @@
+# coding: utf-8
+
+"""
+NumPy implementations of the indicators in schemas.py, for the tools in
+this package that evaluate strategies (walk-forward, signal evaluation).
+Requires numpy: pip install raposa-schemas[numpy]
+
+Prices are a mapping of column name ("Open", "High", "Low", "Close",
+"Volume") to arrays with bars along axis 0, either one instrument (T,) or
+several side by side (T, N). Every indicator comes back with the same
+shape, NaN while it is still warming up, so comparisons during the warm-up
+are False. At most registry.lookback() bars come before the first valid one.
+
+An IndicatorEngine computes each indicator once and shares the pieces
+indicators have in common (Typical price, True Range, moving averages and
+rolling deviations of the same series) between them:
+
+    engine = IndicatorEngine({"High": high, "Low": low, "Close": close})
+    engine.compute({"name": "EMA", "params": {"period": 26}})
+    engine.compute({"name": "ATR", "params": {"period": 20, "multiple": 1}})
+
+STOP_PRICE and ATR_STOP_PRICE depend on the entry price of an open
+position, so they are left to the backtester.
+"""
+
+from typing import Callable, Dict, Mapping, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from raposa_schemas import registry
+
+trading_days_per_year = 252
+
+# indicators whose value depends on an open position
+position_indicators = ("STOP_PRICE", "ATR_STOP_PRICE")
+
+# A node is a hashable key for one intermediate series, e.g.
+# ("sma", CLOSE, 20): its kind followed by its input nodes and settings.
+# Nodes are shared by every indicator that uses them.
+Node = Tuple
+
+HIGH = ("column", "High")
+LOW = ("column", "Low")
+CLOSE = ("column", "Close")
+TYPICAL = ("typical", HIGH, LOW, CLOSE)
+TRUE_RANGE = ("true_range", HIGH, LOW, CLOSE)
+LOG_RETURN = ("log_return", CLOSE)
+
+
+def _nan_like(x: np.ndarray) -> np.ndarray:
+    return np.full(x.shape, np.nan)
+
+
+def rolling_mean(x: np.ndarray, n: int) -> np.ndarray:
+    out = _nan_like(x)
+    if n <= len(x):
+        out[n - 1:] = sliding_window_view(x, n, axis=0).mean(axis=-1)
+    return out
+
+
+def rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    out = _nan_like(x)
+    if n <= len(x):
+        out[n - 1:] = sliding_window_view(x, n, axis=0).std(axis=-1)
+    return out
+
+
+def rolling_max(x: np.ndarray, n: int) -> np.ndarray:
+    out = _nan_like(x)
+    if n <= len(x):
+        out[n - 1:] = sliding_window_view(x, n, axis=0).max(axis=-1)
+    return out
+
+
+def rolling_min(x: np.ndarray, n: int) -> np.ndarray:
+    out = _nan_like(x)
+    if n <= len(x):
+        out[n - 1:] = sliding_window_view(x, n, axis=0).min(axis=-1)
+    return out
+
+
+def smoothed(x: np.ndarray, n: int, alpha: float) -> np.ndarray:
+    """
+    Exponential smoothing seeded with the mean of the first n valid values
+    (leading NaNs are skipped), as EMA and Wilder's averages are.
+    """
+    out = _nan_like(x)
+    valid = ~np.isnan(x)
+    first = int(np.argmax(valid.all(axis=tuple(range(1, x.ndim))))) if valid.any() else len(x)
+    if first + n > len(x):
+        return out
+    value = x[first:first + n].mean(axis=0)
+    out[first + n - 1] = value
+    for t in range(first + n, len(x)):
+        value = value + alpha * (x[t] - value)
+        out[t] = value
+    return out
+
+
+def ema(x: np.ndarray, n: int) -> np.ndarray:
+    return smoothed(x, n, 2.0 / (n + 1))
+
+
+def wilder(x: np.ndarray, n: int) -> np.ndarray:
+    return smoothed(x, n, 1.0 / n)
+
+
+def typical_price(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    return (high + low + close) / 3
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    out = high - low
+    prev_close = close[:-1]
+    np.maximum(out[1:], np.abs(high[1:] - prev_close), out=out[1:])
+    np.maximum(out[1:], np.abs(low[1:] - prev_close), out=out[1:])
+    return out
+
+
+def hurst(x: np.ndarray, window: int, min_lags: int, max_lags: int) -> np.ndarray:
+    """
+    Rolling Hurst exponent of log prices: the slope of log std(x[t] - x[t-lag])
+    against log lag for lags in [min_lags, max_lags), over the last window bars.
+    """
+    out = _nan_like(x)
+    if window > len(x):
+        return out
+    lags = np.arange(min_lags, max_lags)
+    log_lags = np.log(lags)
+    log_lags = log_lags - log_lags.mean()
+    log_x = np.log(x)
+    slope = 0.0
+    for lag, weight in zip(lags, log_lags):
+        diffs = log_x[lag:] - log_x[:-lag]
+        # the diffs that fit inside each window of prices
+        tau = sliding_window_view(diffs, window - lag, axis=0).std(axis=-1)
+        with np.errstate(divide="ignore"):
+            slope = slope + weight * np.log(tau)
+    out[window - 1:] = slope / (log_lags ** 2).sum()
+    return out
+
+
+class PsarTracker:
+    """Parabolic SAR of one instrument, one bar at a time."""
+
+    def __init__(self, init_af: float, af_step: float, max_af: float):
+        self.init_af, self.af_step, self.max_af = init_af, af_step, max_af
+        self.prev = self.prev2 = None  # (high, low) of the last two bars
+        self.uptrend = None
+
+    def update(self, high: float, low: float) -> int:
+        """1 if the SAR reversed to an uptrend on this bar, -1 to a downtrend, else 0."""
+        reversal = 0
+        if self.prev is not None:
+            prev_high, prev_low = self.prev
+            before_high, before_low = self.prev2 or self.prev
+            if self.uptrend is None:
+                # the trend starts with the direction of the second bar
+                self.uptrend = high >= prev_high
+                self.sar = prev_low if self.uptrend else prev_high
+                self.extreme = prev_high if self.uptrend else prev_low
+                self.af = self.init_af
+            self.sar = self.sar + self.af * (self.extreme - self.sar)
+            if self.uptrend:
+                self.sar = min(self.sar, prev_low, before_low)
+                if low < self.sar:
+                    self.uptrend, self.sar, self.extreme, self.af = False, self.extreme, low, self.init_af
+                    reversal = -1
+                elif high > self.extreme:
+                    self.extreme, self.af = high, min(self.af + self.af_step, self.max_af)
+            else:
+                self.sar = max(self.sar, prev_high, before_high)
+                if high > self.sar:
+                    self.uptrend, self.sar, self.extreme, self.af = True, self.extreme, high, self.init_af
+                    reversal = 1
+                elif low < self.extreme:
+                    self.extreme, self.af = low, min(self.af + self.af_step, self.max_af)
+        self.prev2, self.prev = self.prev, (high, low)
+        return reversal
+
+
+def psar_reversals(
+    high: np.ndarray,
+    low: np.ndarray,
+    init_af: float,
+    af_step: float,
+    max_af: float,
+    to_uptrend: bool,
+    period: int,
+) -> np.ndarray:
+    """
+    1.0 where Parabolic SAR reversed to an uptrend (or to a downtrend if not
+    to_uptrend) in the last period bars, else 0.0.
+    """
+    if high.ndim > 1:
+        return np.stack(
+            [psar_reversals(high[:, i], low[:, i], init_af, af_step, max_af, to_uptrend, period)
+             for i in range(high.shape[1])],
+            axis=1,
+        )
+    if len(high) < 2:
+        return _nan_like(high)
+    tracker = PsarTracker(init_af, af_step, max_af)
+    wanted = 1 if to_uptrend else -1
+    reversal = np.array([tracker.update(h, l) == wanted for h, l in zip(high, low)], dtype=float)
+    out = rolling_max(reversal, period)
+    out[0] = np.nan
+    return out
+
+
+class IndicatorEngine:
+    """
+    Computes indicators over one block of prices, each intermediate series
+    once. Results are cached, treat them as read-only.
+    """
+
+    def __init__(self, prices: Mapping[str, np.ndarray]):
+        self.prices = {key: np.asarray(value, dtype=float) for key, value in prices.items()}
+        lengths = {len(value) for value in self.prices.values()}
+        if len(lengths) > 1:
+            raise ValueError("All price columns must have the same number of bars.")
+        self.length = lengths.pop() if lengths else 0
+        self.shape = next(iter(self.prices.values())).shape if self.prices else (0,)
+        self._nodes: Dict[Node, np.ndarray] = {}
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, key: Node) -> bool:
+        """True if the node has already been computed."""
+        return key in self._nodes
+
+    def node(self, key: Node) -> np.ndarray:
+        """The series of a node, computed on first use."""
+        if key not in self._nodes:
+            self._nodes[key] = _node_builders[key[0]](self, *key[1:])
+        return self._nodes[key]
+
+    def compute(self, schema: Union[dict, object]) -> np.ndarray:
+        """Series of an indicator schema (dict or model)."""
+        return self.node(indicator_node(schema))
+
+    @property
+    def computed(self) -> Tuple[Node, ...]:
+        return tuple(self._nodes)
+
+
+def _column(engine, name):
+    if name not in engine.prices:
+        raise ValueError(f"{name} prices are needed but were not given.")
+    return engine.prices[name]
+
+
+def _constant(engine, value):
+    return np.full(engine.shape, float(value))
+
+
+def _log_return(engine, close):
+    close = engine.node(close)
+    out = _nan_like(close)
+    out[1:] = np.log(close[1:] / close[:-1])
+    return out
+
+
+_node_builders: Dict[str, Callable] = {
+    "column": _column,
+    "constant": _constant,
+    "typical": lambda e, h, l, c: typical_price(e.node(h), e.node(l), e.node(c)),
+    "true_range": lambda e, h, l, c: true_range(e.node(h), e.node(l), e.node(c)),
+    "log_return": _log_return,
+    "sma": lambda e, src, n: rolling_mean(e.node(src), n),
+    "std": lambda e, src, n: rolling_std(e.node(src), n),
+    "max": lambda e, src, n: rolling_max(e.node(src), n),
+    "min": lambda e, src, n: rolling_min(e.node(src), n),
+    "ema": lambda e, src, n: ema(e.node(src), n),
+    "wilder": lambda e, src, n: wilder(e.node(src), n),
+    "add": lambda e, a, b: e.node(a) + e.node(b),
+    "sub": lambda e, a, b: e.node(a) - e.node(b),
+    "mul": lambda e, a, b: e.node(a) * e.node(b),
+    "div": lambda e, a, b: e.node(a) / e.node(b),
+    "scale": lambda e, src, k: e.node(src) * k,
+    "rsi": lambda e, close, n: _rsi(e.node(close), n),
+    "hurst": lambda e, close, window, lo, hi: hurst(e.node(close), window, lo, hi),
+    "psar": lambda e, high, low, up, init_af, step, max_af, n: psar_reversals(
+        e.node(high), e.node(low), init_af, step, max_af, up, n
+    ),
+}
+
+
+def _rsi(close, n):
+    change = np.zeros_like(close)
+    change[0] = np.nan
+    change[1:] = close[1:] - close[:-1]
+    gains = np.where(change > 0, change, 0.0)
+    losses = np.where(change < 0, -change, 0.0)
+    # the first bar has no change, so the averages start on the second
+    gains[0] = losses[0] = np.nan
+    gains, losses = wilder(gains, n), wilder(losses, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(losses == 0, 100.0, 100 - 100 / (1 + gains / losses))
+
+
+def _params(schema) -> dict:
+    if isinstance(schema, dict):
+        return schema.get("params") or {}
+    return getattr(schema, "params", None) or {}
+
+
+def _name(schema) -> str:
+    return schema["name"] if isinstance(schema, dict) else schema.name
+
+
+def _price(params: dict, default: str = "Close") -> Node:
+    price_type = params.get("price_type", default)
+    return TYPICAL if price_type == "Typical" else ("column", price_type)
+
+
+def _bands(source: Node, n: int, upper: float, lower: float):
+    middle = ("sma", source, n)
+    std = ("std", source, n)
+    return (
+        ("add", middle, ("scale", std, float(upper))),
+        middle,
+        ("sub", middle, ("scale", std, float(lower))),
+    )
+
+
+def _macd(p: dict) -> Node:
+    return ("sub", ("ema", CLOSE, p["fastEMA_period"]), ("ema", CLOSE, p["slowEMA_period"]))
+
+
+def _atr(p: dict) -> Node:
+    return ("scale", ("wilder", TRUE_RANGE, p["period"]), float(p["multiple"]))
+
+
+def _donchian(p: dict) -> Node:
+    upper = ("max", HIGH, p["period"])
+    lower = ("min", LOW, p["period"])
+    return {
+        "upper": upper,
+        "lower": lower,
+        "middle": ("scale", ("add", upper, lower), 0.5),
+    }[p["channel"]]
+
+
+# indicator name -> params -> node of its series
+indicator_nodes: Dict[str, Callable[[dict], Node]] = {
+    "SMA": lambda p: ("sma", CLOSE, p["period"]),
+    "EMA": lambda p: ("ema", CLOSE, p["period"]),
+    "MACD": _macd,
+    "MACD_SIGNAL": lambda p: ("ema", _macd(p), p["signalEMA_period"]),
+    "RSI": lambda p: ("rsi", CLOSE, p["period"]),
+    "PRICE": lambda p: _price(p),
+    "PRICE_WINDOW": lambda p: (p["max_or_min"], _price(p, "High"), p["period"]),
+    "ATR": _atr,
+    "ATRP": lambda p: ("scale", ("div", _atr(p), CLOSE), 100.0),
+    "LEVEL": lambda p: ("constant", float(p["level"])),
+    "BOOLEAN": lambda p: ("constant", float(p["boolean"])),
+    "VOLATILITY": lambda p: (
+        "scale",
+        ("std", LOG_RETURN, p["period"]),
+        float(p["multiple"]) * trading_days_per_year ** 0.5,
+    ),
+    "PSAR": lambda p: (
+        "psar",
+        HIGH,
+        LOW,
+        p["type_indicator"] == "reversal_toUptrend",
+        float(p["init_acceleration_factor"]),
+        float(p["acceleration_factor_step"]),
+        float(p["max_acceleration_factor"]),
+        p["period"],
+    ),
+    "HURST": lambda p: ("hurst", CLOSE, max(p["period"], p["maxLags"] + 1), p["minLags"], p["maxLags"]),
+    "BOLLINGER": lambda p: dict(
+        zip(("upper", "middle", "lower"), _bands(_price(p, "Typical"), p["period"], p["numSTD"], p["numSTD"]))
+    )[p["band"]],
+    "BAND_WIDTH": lambda p: (
+        lambda upper, middle, lower: ("div", ("sub", upper, lower), middle)
+    )(*_bands(_price(p, "Typical"), p["period"], p["numStdDevUpper"], p["numStdDevLower"])),
+    "DONCHIAN": _donchian,
+    "MAD": lambda p: (
+        "div",
+        ("sma", CLOSE, p["fastSMA_period"]),
+        ("sma", CLOSE, p["slowSMA_period"]),
+    ),
+}
+
+
+def indicator_node(schema) -> Node:
+    """The node an indicator schema (dict or model) computes."""
+    name = _name(schema)
+    if name in position_indicators:
+        raise ValueError(
+            f"{name} depends on the open position and is computed by the backtester."
+        )
+    if name not in indicator_nodes:
+        raise ValueError(f"{name} is not a recognized indicator.")
+    params = dict(registry.INFO_BY_NAME[name].default_params)
+    params.update(_params(schema))
+    return indicator_nodes[name](params)
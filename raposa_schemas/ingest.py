@@ -0,0 +1,149 @@
+# coding: utf-8
+
+"""
+Streaming ingestion of strategy archives in NDJSON (one CompleteStrategy
+dict per line). Lines are read in chunks, validated in a process pool and
+yielded in file order, with only a bounded number of chunks in flight:
+
+    for line_no, result in ingest("strategies.ndjson", workers=8):
+        if isinstance(result, IngestError):
+            ...
+        else:
+            ...  # a CompleteStrategy
+
+Stored payloads are upgraded first (see migrations.py), so legacy
+strategies validate without warnings. From the command line:
+
+    raposa-ingest strategies.ndjson --output valid.ndjson
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from raposa_schemas import migrations, schemas
+
+Line = Tuple[int, bytes]
+
+
+class IngestError(NamedTuple):
+    """A line that could not be parsed or validated."""
+
+    kind: str  # "json" or "validation"
+    message: str
+    errors: tuple = ()  # pydantic's error dicts for validation errors
+
+
+def iter_lines(source: Union[str, IO[bytes]]) -> Iterator[Line]:
+    """(line number, line) of the non-blank lines of a path ("-" is stdin) or binary file."""
+    if isinstance(source, str):
+        if source == "-":
+            yield from iter_lines(sys.stdin.buffer)
+            return
+        with open(source, "rb") as f:
+            yield from iter_lines(f)
+        return
+    for line_no, line in enumerate(source, 1):
+        if line.strip():
+            yield line_no, line
+
+
+def validate_line(line: Union[bytes, str]) -> Union[schemas.CompleteStrategy, IngestError]:
+    try:
+        payload = json.loads(line)
+    except ValueError as e:
+        return IngestError("json", str(e))
+    if not isinstance(payload, dict):
+        return IngestError("json", "Line is not a JSON object.")
+    try:
+        return migrations.validate(payload)
+    except ValidationError as e:
+        return IngestError("validation", str(e), tuple(e.errors()))
+    except (ValueError, TypeError) as e:
+        return IngestError("validation", str(e))
+
+
+def validate_chunk(chunk: List[Line]) -> list:
+    return [(line_no, validate_line(line)) for line_no, line in chunk]
+
+
+def _chunks(lines: Iterable[Line], chunk_size: int) -> Iterator[List[Line]]:
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ingest(
+    source: Union[str, IO[bytes], Iterable[Line]],
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    max_pending: Optional[int] = None,
+) -> Iterator[Tuple[int, Union[schemas.CompleteStrategy, IngestError]]]:
+    """
+    (line number, CompleteStrategy or IngestError) for every non-blank line,
+    in file order. workers=0 validates in this process; otherwise at most
+    max_pending chunks (2 per worker by default) are read ahead of the
+    caller.
+    """
+    if isinstance(source, str) or hasattr(source, "read"):
+        source = iter_lines(source)
+    chunks = _chunks(source, chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            yield from validate_chunk(chunk)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(validate_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="raposa-ingest", description="Validate an NDJSON archive of strategies."
+    )
+    parser.add_argument("source", help="NDJSON file, - for stdin")
+    parser.add_argument("--output", help="write the upgraded valid strategies here as NDJSON")
+    parser.add_argument("--workers", type=int, default=None,
+        help="validation processes, 0 to validate in this process")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w") if args.output else None
+    valid = invalid = 0
+    try:
+        for line_no, result in ingest(args.source, args.workers, args.chunk_size):
+            if isinstance(result, IngestError):
+                invalid += 1
+                message = result.message.replace("\n", " ")
+                print(f"line {line_no}: {result.kind} error: {message}", file=sys.stderr)
+            else:
+                valid += 1
+                if output:
+                    output.write(result.json() + "\n")
+    finally:
+        if output:
+            output.close()
+    print(f"{valid} valid, {invalid} invalid")
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+# coding: utf-8
+
+"""
+Local throughput harness: how many strategy submissions a worker absorbs.
+
+LocalApp is a minimal stand-in for the API on 127.0.0.1 (stdlib
+ThreadingHTTPServer, no external services). It accepts CompleteStrategy,
+PricePlot and BuyAndHold bodies, answers 422 when they do not validate and
+reports how long parsing and the handler took in a Server-Timing header.
+run_load() drives it with concurrent keep-alive clients:
+
+    with LocalApp() as app:
+        report = run_load(app.url, clients=8, rate=500, duration=10)
+    print(report.summary())
+
+With a rate, requests are sent on a fixed schedule and latency is measured
+from the scheduled time, so a slow server is not hidden by clients that
+wait for it (coordinated omission). Without one, every client sends as fast
+as it gets answers. From the command line:
+
+    raposa-loadtest --clients 8 --rate 500 --duration 10 --invalid 0.05
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel, ValidationError
+
+from raposa_schemas import generator, metrics, schemas, strategy_info
+
+Handler = Callable[[BaseModel], dict]
+
+
+def _strategy(strategy: schemas.CompleteStrategy) -> dict:
+    return {
+        "fingerprint": strategy_info.fingerprint(strategy),
+        "lookback": strategy_info.required_lookback(strategy),
+    }
+
+
+def _price_plot(request: schemas.PricePlot) -> dict:
+    return {"instr": request.instr, "days": request.end_date.ordinal - request.start_date.ordinal}
+
+
+def _buy_and_hold(request: schemas.BuyAndHold) -> dict:
+    return {"instruments": list(request.instr_list.ids)}
+
+
+# path -> (schema, handler)
+default_routes: Dict[str, Tuple[type, Handler]] = {
+    "/strategy": (schemas.CompleteStrategy, _strategy),
+    "/price_plot": (schemas.PricePlot, _price_plot),
+    "/buy_and_hold": (schemas.BuyAndHold, _buy_and_hold),
+}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # headers and body are written separately, don't let Nagle's algorithm
+    # hold the body back for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status: int, body: dict, timing: str = ""):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if timing:
+            self.send_header("Server-Timing", timing)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        route = self.server.routes.get(self.path)
+        if route is None:
+            self._respond(404, {"detail": "Not Found"})
+            return
+        klass, handler = route
+        start = time.perf_counter()
+        try:
+            # through metrics.validate, as the API should, so the run is counted
+            model = metrics.validate(klass, json.loads(body))
+        except (ValueError, TypeError) as e:
+            parse = time.perf_counter() - start
+            detail = e.errors() if isinstance(e, ValidationError) else str(e)
+            self._respond(422, {"detail": detail}, f"parse;dur={parse * 1000:.4f}")
+            return
+        parsed = time.perf_counter()
+        out = handler(model)
+        handled = time.perf_counter()
+        timing = f"parse;dur={(parsed - start) * 1000:.4f}, handler;dur={(handled - parsed) * 1000:.4f}"
+        self._respond(200, out, timing)
+
+
+class LocalApp:
+    """The stand-in API, served from a background thread."""
+
+    def __init__(
+        self,
+        routes: Optional[Mapping[str, Tuple[type, Handler]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self.server.daemon_threads = True
+        self.server.routes = dict(default_routes if routes is None else routes)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalApp":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class Request(NamedTuple):
+    path: str
+    body: bytes
+
+
+def make_requests(
+    n: int,
+    mix: Optional[Mapping[str, float]] = None,
+    seed: Optional[int] = 0,
+    invalid: float = 0.0,
+) -> List[Request]:
+    """
+    n request bodies, serialized up front so the clients only send. mix is
+    the share of each path ("/strategy" only by default); invalid is the
+    share of strategies replaced by generator.invalid_cases.
+    """
+    mix = dict(mix or {"/strategy": 1.0})
+    cases = {case: invalid / len(generator.invalid_cases) for case in generator.invalid_cases}
+    payloads = generator.PayloadGenerator(seed, invalid=cases if invalid else None)
+    random = payloads.random
+    paths = list(mix)
+    cumulative, total = [], 0.0
+    for path in paths:
+        total += mix[path]
+        cumulative.append(total)
+    requests = []
+    for _ in range(n):
+        draw = random() * total
+        path = next((p for p, c in zip(paths, cumulative) if draw < c), paths[-1])
+        if path == "/strategy":
+            body = payloads.sample()[1]
+        else:
+            settings = payloads.settings()
+            body = {"start_date": settings["start_date"], "end_date": settings["end_date"]}
+            if path == "/price_plot":
+                body["instr"] = settings["instruments"][0]
+            else:
+                body["instr_list"] = settings["instruments"]
+                body["account_size"] = int(settings["account_size"])
+        requests.append(Request(path, json.dumps(body).encode()))
+    return requests
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _server_timing(header: Optional[str]) -> Dict[str, float]:
+    out = {}
+    for metric in (header or "").split(","):
+        name, _, duration = metric.strip().partition(";dur=")
+        if duration:
+            out[name] = float(duration) / 1000
+    return out
+
+
+class LoadReport(NamedTuple):
+    requests: int
+    errors: int  # transport errors and 5xx
+    statuses: Dict[int, int]
+    seconds: float
+    latencies: Tuple[float, ...]  # sorted, in seconds
+    parse_seconds: float  # summed over requests, as reported by the server
+    handler_seconds: float
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    @property
+    def p50(self) -> float:
+        return _percentile(self.latencies, 0.50)
+
+    @property
+    def p99(self) -> float:
+        return _percentile(self.latencies, 0.99)
+
+    @property
+    def parse_share(self) -> float:
+        """Share of the server's time spent parsing (the rest is the handler)."""
+        total = self.parse_seconds + self.handler_seconds
+        return self.parse_seconds / total if total else 0.0
+
+    @property
+    def server_share(self) -> float:
+        """Share of latency spent parsing and handling, the rest is HTTP and queueing."""
+        total = sum(self.latencies)
+        return (self.parse_seconds + self.handler_seconds) / total if total else 0.0
+
+    def summary(self) -> str:
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses.items()))
+        return (
+            f"{self.requests} requests in {self.seconds:.2f}s, {self.throughput:.0f} req/s ({statuses})\n"
+            f"latency p50 {self.p50 * 1000:.2f} ms, p99 {self.p99 * 1000:.2f} ms, errors {self.errors}\n"
+            f"server time: {self.parse_share:.0%} parsing, {1 - self.parse_share:.0%} handler "
+            f"({self.server_share:.0%} of latency)"
+        )
+
+
+def _client(url, requests, start, interval, deadline, out):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    latencies, statuses, timings = [], {}, [0.0, 0.0]
+    errors = 0
+    n = 0
+    try:
+        while True:
+            now = time.perf_counter()
+            if interval:
+                scheduled = start + n * interval
+                if scheduled > now:
+                    time.sleep(scheduled - now)
+            else:
+                scheduled = now
+            if scheduled >= deadline:
+                break
+            request = requests[n % len(requests)]
+            n += 1
+            try:
+                connection.request("POST", request.path, request.body, headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                continue
+            latencies.append(time.perf_counter() - scheduled)
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+            errors += response.status >= 500
+            timing = _server_timing(response.getheader("Server-Timing"))
+            timings[0] += timing.get("parse", 0.0)
+            timings[1] += timing.get("handler", 0.0)
+    finally:
+        connection.close()
+    out.append((latencies, statuses, timings, errors))
+
+
+def run_load(
+    url: str,
+    requests: Optional[Sequence[Request]] = None,
+    clients: int = 8,
+    rate: Optional[float] = None,
+    duration: float = 10.0,
+) -> LoadReport:
+    """
+    Send requests (make_requests(10000) by default, cycled) from clients
+    threads for duration seconds, at rate requests/s in total or as fast
+    as possible when rate is None.
+    """
+    requests = requests or make_requests(10000)
+    interval = clients / rate if rate else None
+    results: list = []
+    start = time.perf_counter() + 0.05
+    deadline = start + duration
+    threads = [
+        threading.Thread(
+            target=_client,
+            # clients start staggered so a fixed rate is spread evenly
+            args=(url, requests[n::clients] or requests, start + (interval or 0) * n / clients,
+                  interval, deadline, results),
+        )
+        for n in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    latencies, statuses, parse, handler, errors = [], {}, 0.0, 0.0, 0
+    for client_latencies, client_statuses, timings, client_errors in results:
+        latencies.extend(client_latencies)
+        for status, count in client_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+        parse += timings[0]
+        handler += timings[1]
+        errors += client_errors
+    latencies.sort()
+    return LoadReport(len(latencies), errors, statuses, seconds, tuple(latencies), parse, handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="raposa-loadtest", description="Load test a local stand-in of the strategy API."
+    )
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=None, help="requests/s in total, as fast as possible if not set")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=10000, help="distinct request bodies to cycle through")
+    parser.add_argument("--invalid", type=float, default=0.0, help="share of invalid strategies")
+    parser.add_argument("--mix", default="/strategy=1",
+        help="share of each path, e.g. /strategy=0.8,/price_plot=0.1,/buy_and_hold=0.1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="load test a running server instead of a LocalApp")
+    args = parser.parse_args(argv)
+
+    mix = {}
+    for part in args.mix.split(","):
+        path, _, share = part.partition("=")
+        if path not in default_routes:
+            parser.error(f"unknown path {path}, choose from {', '.join(default_routes)}")
+        mix[path] = float(share or 1)
+    requests = make_requests(args.requests, mix, args.seed, args.invalid)
+    if args.url:
+        report = run_load(args.url, requests, args.clients, args.rate, args.duration)
+    else:
+        with LocalApp() as app:
+            report = run_load(app.url, requests, args.clients, args.rate, args.duration)
+    print(report.summary())
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
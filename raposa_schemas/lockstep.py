@@ -0,0 +1,187 @@
+# coding: utf-8
+
+"""
+Backtests many strategies over the same instruments and dates in lockstep,
+with a leading strategy axis: signals, positions, sizing and equity are
+(strategies, bars, instruments) arrays.
+Requires numpy: pip install raposa-schemas[numpy]
+
+    lockstep = Lockstep(strategies, dates, prices)  # prices as in indicators.py
+    result = lockstep.run()
+    result.total[:, -1]  # final equity of every strategy
+
+The prices are loaded once and every strategy's signals are evaluated over
+one IndicatorEngine, so an indicator used by several strategies (SMA(50)
+in 500 variants of a crossover) is computed once. Strategies with the same
+signals share one evaluation.
+
+This is a reference simulation for comparing strategies with each other,
+not a replacement for the backtester:
+    - long only: a buy signal opens a position in a flat instrument and a
+      sell signal closes it, at the close of the signal's bar. A bar with
+      both signals does nothing.
+    - signals only act on the strategy's trade_days, every
+      trade_frequency-th bar from its start_date.
+    - each instrument gets an equal share of account_size (EqualAllocation
+      and NoRiskManagement). Risk-based sizings and the position
+      indicators (STOP_PRICE, ATR_STOP_PRICE) are left to the backtester.
+"""
+
+from typing import Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from raposa_schemas import migrations, schemas
+from raposa_schemas.baseline import price_growth
+from raposa_schemas.indicators import IndicatorEngine
+from raposa_schemas.signal_plan import compile_strategy
+
+supported_sizings = ("EqualAllocation", "NoRiskManagement")
+weekday_names = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class LockstepResult(NamedTuple):
+    dates: np.ndarray  # (bars,) from start_date to end_date
+    instruments: Tuple[str, ...]
+    buy: np.ndarray  # (strategies, bars, instruments) bool
+    sell: np.ndarray
+    positions: np.ndarray  # held at the close of the bar
+    equity: np.ndarray  # (strategies, bars, instruments) of each instrument's share
+    total: np.ndarray  # (strategies, bars)
+
+    @property
+    def trades(self) -> np.ndarray:
+        """Entries and exits of each strategy."""
+        changes = np.count_nonzero(self.positions[:, 1:] != self.positions[:, :-1], axis=(1, 2))
+        return changes + np.count_nonzero(self.positions[:, 0], axis=-1)
+
+
+def _weekdays(dates: np.ndarray) -> np.ndarray:
+    # 1970-01-01 was a Thursday
+    return (dates.astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+
+def positions(buy: np.ndarray, sell: np.ndarray, tradable: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Long positions held at each bar's close, from buy and sell masks with
+    bars along axis 1. tradable (strategies, bars) masks the bars signals
+    may act on.
+    """
+    events = np.where(buy & ~sell, 1, np.where(sell & ~buy, 0, -1)).astype(np.int8)
+    if tradable is not None:
+        events[~np.broadcast_to(tradable[..., None], events.shape)] = -1
+    # index of the last bar with an event, carried forward
+    bars = np.arange(events.shape[1]).reshape((1, -1) + (1,) * (events.ndim - 2))
+    last = np.maximum.accumulate(np.where(events >= 0, bars, 0), axis=1)
+    return np.take_along_axis(events, last, axis=1) == 1
+
+
+def equity_curves(closes: np.ndarray, positions: np.ndarray, allocation: np.ndarray) -> np.ndarray:
+    """
+    Equity of each instrument's share of the account: allocation
+    (strategies, instruments) grows with the close while a position is
+    held from the previous bar. A missing close is filled with the last
+    one, as in baseline.equity_curves.
+    """
+    growth = price_growth(closes)
+    factors = np.ones(positions.shape)
+    np.copyto(factors[:, 1:], np.broadcast_to(growth[1:], factors[:, 1:].shape), where=positions[:, :-1])
+    equity = np.cumprod(factors, axis=1)
+    equity *= allocation[:, None, :]
+    return equity
+
+
+class Lockstep:
+    def __init__(
+        self,
+        strategies: Sequence[Union[schemas.CompleteStrategy, dict]],
+        dates: Sequence,
+        prices: Mapping[str, np.ndarray],
+        instruments: Optional[Sequence[str]] = None,
+    ):
+        """
+        prices have one column per instrument, in the order of instruments
+        (the first strategy's by default), over dates, which may start
+        before start_date to warm up the indicators.
+        """
+        if not strategies:
+            raise ValueError("No strategies to run.")
+        self.strategies = [
+            migrations.validate(strategy) if isinstance(strategy, dict) else strategy
+            for strategy in strategies
+        ]
+        first = self.strategies[0].strategy_settings
+        self.instruments = tuple(instruments or first.instruments)
+        for strategy in self.strategies:
+            settings = strategy.strategy_settings
+            if set(settings.instruments) != set(self.instruments):
+                raise ValueError("Lockstep strategies must trade the same instruments.")
+            if (settings.start_date, settings.end_date) != (first.start_date, first.end_date):
+                raise ValueError("Lockstep strategies must share their start and end dates.")
+            for sizing in (settings.position_sizing_strategy, settings.position_management_strategy):
+                if sizing["name"] not in supported_sizings:
+                    raise ValueError(
+                        f"{sizing['name']} is left to the backtester, "
+                        f"lockstep supports {', '.join(supported_sizings)}."
+                    )
+
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.engine = IndicatorEngine(
+            {key: np.asarray(value, dtype=float).reshape(len(self.dates), -1) for key, value in prices.items()}
+        )
+        if len(self.engine) != len(self.dates):
+            raise ValueError("prices and dates must have the same number of bars.")
+        if self.engine.shape[1] != len(self.instruments):
+            raise ValueError("prices must have one column per instrument.")
+        self.window = slice(
+            int(np.searchsorted(self.dates, first.start_date.datetime64)),
+            int(np.searchsorted(self.dates, first.end_date.datetime64, side="right")),
+        )
+
+        # strategies with the same comparisons share one plan
+        self.plans = []
+        self.plan_of = []
+        by_signals = {}
+        for strategy in self.strategies:
+            plan = compile_strategy(strategy)
+            n = by_signals.setdefault((plan.buy, plan.sell), len(self.plans))
+            if n == len(self.plans):
+                self.plans.append(plan)
+            self.plan_of.append(n)
+
+    def __len__(self):
+        return len(self.strategies)
+
+    def signals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Buy and sell masks shaped (strategies, bars, instruments) from start_date to end_date."""
+        shape = (len(self.plans),) + self.engine.shape
+        buy, sell = np.empty(shape, dtype=bool), np.empty(shape, dtype=bool)
+        for n, plan in enumerate(self.plans):
+            plan.evaluate(self.engine, out=(buy[n], sell[n]))
+        return buy[:, self.window][self.plan_of], sell[:, self.window][self.plan_of]
+
+    def tradable(self) -> np.ndarray:
+        """(strategies, bars) of the bars from start_date to end_date signals may act on."""
+        dates = self.dates[self.window]
+        weekdays = _weekdays(dates)
+        bars = np.arange(len(dates))
+        out = np.empty((len(self.strategies), len(dates)), dtype=bool)
+        for n, strategy in enumerate(self.strategies):
+            settings = strategy.strategy_settings
+            days = [weekday_names.index(day) for day in settings.trade_days if day in weekday_names]
+            out[n] = np.isin(weekdays, days) & (bars % settings.trade_frequency == 0)
+        return out
+
+    def allocation(self) -> np.ndarray:
+        """(strategies, instruments) share of the account of each instrument."""
+        accounts = np.array([strategy.strategy_settings.account_size for strategy in self.strategies])
+        return np.repeat(accounts[:, None] / len(self.instruments), len(self.instruments), axis=1)
+
+    def run(self) -> LockstepResult:
+        buy, sell = self.signals()
+        held = positions(buy, sell, self.tradable())
+        closes = self.engine.prices["Close"][self.window]
+        equity = equity_curves(closes, held, self.allocation())
+        return LockstepResult(
+            self.dates[self.window], self.instruments, buy, sell, held, equity, equity.sum(axis=-1)
+        )
@@ -0,0 +1,258 @@
+# coding: utf-8
+
+"""
+In-process metrics for validation: counters and fixed-bucket histograms,
+read with exposition() in the Prometheus text format (version 0.0.4).
+
+    from raposa_schemas import metrics
+
+    strategy = migrations.validate(payload)  # counted and timed
+    print(metrics.exposition())
+    metrics.write_textfile("/var/lib/metrics/raposa.prom")
+
+Only payloads validated through validate() are counted (migrations.validate
+and registry's resolve functions use it). Models built directly, e.g. by
+FastAPI from a typed body parameter, are not: an endpoint that should be
+counted takes its body as a dict and validates it here.
+
+Metrics are kept by label values. A metric stops adding series after
+max_series label combinations and counts the rest under "other", so error
+messages with user input in them cannot grow it without bound.
+"""
+
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+default_buckets = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+default_max_series = 1000
+overflow_label = "other"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), max_series: int = default_max_series):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.max_series = max_series
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = Lock()
+
+    def _key(self, values: Tuple) -> Tuple[str, ...]:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} takes the labels {self.labels}.")
+        key = tuple(str(value) for value in values)
+        if key not in self._series and len(self._series) >= self.max_series:
+            return (overflow_label,) * len(self.labels)
+        return key
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def exposition(self) -> str:
+        help = self.help.replace("\\", "\\\\").replace("\n", "\\n")
+        lines = [f"# HELP {self.name} {help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._lines(key, value))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A count that only goes up, per combination of label values."""
+
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._series.get(tuple(str(label) for label in labels), 0)
+
+    def _lines(self, key, value):
+        yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into fixed buckets (upper bounds, in seconds for
+    latencies), plus their sum and count.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = default_buckets,
+        max_series: int = default_max_series,
+    ):
+        super().__init__(name, help, labels, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        key = self._key(labels)
+        n = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (the last is +Inf), sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][n] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels) -> int:
+        series = self._series.get(tuple(str(label) for label in labels))
+        return 0 if series is None else sum(series[0])
+
+    def _lines(self, key, value):
+        counts, total = value
+        names = self.labels + ("le",)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            yield f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}"
+        yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"{metric.name} is already registered.")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), **kwargs) -> Counter:
+        return self._add(Counter(name, help, labels, **kwargs))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), **kwargs) -> Histogram:
+        return self._add(Histogram(name, help, labels, **kwargs))
+
+    def clear(self):
+        """Zero every metric, e.g. between tests."""
+        for metric in self.metrics.values():
+            metric.clear()
+
+    def exposition(self) -> str:
+        return "\n".join(metric.exposition() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+validations = REGISTRY.counter(
+    "raposa_validations_total", "Payloads validated, by model and result (ok or error).", ("model", "result")
+)
+validation_seconds = REGISTRY.histogram(
+    "raposa_validation_seconds", "Time to validate a payload, by model.", ("model",)
+)
+validation_errors = REGISTRY.counter(
+    "raposa_validation_errors_total",
+    "Validation errors, by model, failing field and message.",
+    ("model", "location", "message"),
+)
+deprecated_risk_cap = REGISTRY.counter(
+    "raposa_deprecated_risk_cap_total", "Sizings validated without a risk_cap.", ("sizing",)
+)
+indicator_uses = REGISTRY.counter(
+    "raposa_indicator_uses_total",
+    "Indicators in validated strategies, by name and side (buy or sell).",
+    ("name", "side"),
+)
+
+
+def validate(klass, payload: dict):
+    """
+    klass(**payload), counted and timed. Validation errors are counted per
+    failing field and message and then raised as usual. This is the only
+    place validations are counted, so callers that want them in the metrics
+    must validate through it rather than build klass themselves.
+    """
+    model = klass.__name__
+    start = time.perf_counter()
+    try:
+        out = klass(**payload)
+    except Exception as e:
+        validation_seconds.observe(time.perf_counter() - start, model)
+        validations.inc(model, "error")
+        errors = getattr(e, "errors", None)
+        for error in errors() if callable(errors) else ({"loc": (), "msg": str(e)},):
+            location = ".".join(str(part) for part in error.get("loc", ())) or "__root__"
+            validation_errors.inc(model, location, error.get("msg", ""))
+        raise
+    validation_seconds.observe(time.perf_counter() - start, model)
+    validations.inc(model, "ok")
+    return out
+
+
+def count_indicators(strategy):
+    """Add the indicators of a validated CompleteStrategy to indicator_uses."""
+    for side, signals in (("buy", strategy.buy_signals), ("sell", strategy.sell_signals)):
+        for signal in signals.signals:
+            indicator_uses.inc(signal.indicator.get("name"), side)
+            if signal.comp_indicator:
+                indicator_uses.inc(signal.comp_indicator.get("name"), side)
+
+
+def exposition(registry: Optional[MetricsRegistry] = None) -> str:
+    """Every metric in the Prometheus text format."""
+    return (registry or REGISTRY).exposition()
+
+
+def write_textfile(path: str, registry: Optional[MetricsRegistry] = None):
+    """
+    Write the exposition to path atomically (for textfile collectors that
+    read a directory of .prom files).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(exposition(registry))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
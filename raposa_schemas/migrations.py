@@ -0,0 +1,116 @@
+# coding: utf-8
+
+"""
+Upgrades stored strategy payloads to the current schema.
+
+Every payload carries a "schema_version" (missing means 0, never stamped).
+Each migration takes a payload of one version to the next and copies only
+what it changes. Payloads already at schemas.SCHEMA_VERSION are returned
+as they are, without being walked or copied, so re-validating an up to date
+table costs nothing extra.
+
+    for payload in upgrade_many(rows):
+        store(payload)
+
+    strategy = validate(payload)  # upgrade + CompleteStrategy
+
+Migrations never warn: an upgraded payload no longer has the deprecated
+shapes that the schema validators warn about. CompleteStrategy keeps its
+sizings as dicts; registry.resolve_sizing(sizing, schema_version) validates
+one and, for a current-version strategy, rejects a missing risk_cap instead
+of filling it in with a DeprecationWarning. A sizing model built without a
+version (e.g. ATRSizing(params=...)) still takes the legacy fallback.
+
+Version history
+    0 -> 1  ATRSizing, VOLATILITYSizing, TurtleUnitSizing and TurtlePyramiding
+            params without risk_cap get risk_cap=False
+"""
+
+from typing import Callable, Dict, Iterable, Iterator, Union
+
+from raposa_schemas import metrics, registry, schemas
+
+SCHEMA_VERSION = schemas.SCHEMA_VERSION
+
+# from version -> migration to from version + 1
+_migrations: Dict[int, Callable[[dict], dict]] = {}
+
+
+def migration(from_version: int):
+    """Register a migration from from_version to from_version + 1."""
+
+    def register(function):
+        _migrations[from_version] = function
+        return function
+
+    return register
+
+
+_sizing_fields = ("position_sizing_strategy", "position_management_strategy")
+_sizings_with_risk_cap = tuple(
+    name
+    for name, info in registry.INFO_BY_NAME.items()
+    if any(spec.name == "risk_cap" for spec in info.param_specs)
+)
+
+
+@migration(0)
+def _add_risk_cap(payload: dict) -> dict:
+    settings = payload.get("strategy_settings")
+    if not isinstance(settings, dict):
+        return payload
+    new_settings = None
+    for key in _sizing_fields:
+        sizing = settings.get(key)
+        if (
+            isinstance(sizing, dict)
+            and sizing.get("name") in _sizings_with_risk_cap
+            and isinstance(sizing.get("params"), dict)
+            and "risk_cap" not in sizing["params"]
+        ):
+            if new_settings is None:
+                new_settings = dict(settings)
+            new_settings[key] = dict(sizing, params=dict(sizing["params"], risk_cap=False))
+    if new_settings is None:
+        return payload
+    return dict(payload, strategy_settings=new_settings)
+
+
+def version_of(payload: dict) -> int:
+    return payload.get("schema_version", 0)
+
+
+def needs_upgrade(payload: dict) -> bool:
+    return version_of(payload) != SCHEMA_VERSION
+
+
+def upgrade(payload: dict) -> dict:
+    """
+    Payload upgraded to SCHEMA_VERSION and stamped with it. The input is
+    never modified, and is returned unchanged if it is already current.
+    """
+    version = version_of(payload)
+    if version == SCHEMA_VERSION:
+        return payload
+    if not isinstance(version, int) or not 0 <= version <= SCHEMA_VERSION:
+        raise ValueError(
+            f"Schema version {version} is not supported, the current version is {SCHEMA_VERSION}."
+        )
+    for from_version in range(version, SCHEMA_VERSION):
+        payload = _migrations[from_version](payload)
+    return dict(payload, schema_version=SCHEMA_VERSION)
+
+
+def upgrade_many(payloads: Iterable[dict]) -> Iterator[dict]:
+    """Stream of upgraded payloads, one at a time."""
+    for payload in payloads:
+        yield upgrade(payload)
+
+
+def validate(payload: Union[dict, schemas.CompleteStrategy]) -> schemas.CompleteStrategy:
+    """Upgrade a stored payload and validate it into a CompleteStrategy."""
+    if isinstance(payload, schemas.CompleteStrategy):
+        payload = payload.dict()
+    strategy = metrics.validate(schemas.CompleteStrategy, upgrade(payload))
+    metrics.count_indicators(strategy)
+    return strategy
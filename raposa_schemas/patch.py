@@ -0,0 +1,156 @@
+# coding: utf-8
+
+"""
+Edit-in-place for the strategy builder: apply one change to an already
+validated CompleteStrategy and only re-run the validation it affects.
+
+    strategy = apply_patch(strategy, "buy_signals.signals.0.comp_indicator.params.period", 30)
+
+A path is a dotted string (or a sequence of keys) into the strategy dict.
+What gets revalidated depends on where the path points:
+    buy_signals.signals.N.indicator...     - that indicator and Signal N
+    buy_signals.signals.N.comp_indicator...  (comp_indicator_check)
+    buy_signals.signals.N.<field>          - Signal N
+    buy_signals[.signals]                  - BuySignals and every Signal
+    strategy_settings.position_*_strategy... - that sizing and StrategySettings
+    strategy_settings...                   - StrategySettings
+    email                                  - CompleteStrategy's email field
+
+The result is read-only (see frozen.py) and shares every part the change
+did not touch with the strategy it came from.
+"""
+
+from typing import Any, Sequence, Union
+
+from pydantic import ValidationError
+
+from raposa_schemas import registry, schemas
+from raposa_schemas.frozen import freeze, freeze_model
+
+Path = Union[str, Sequence[Union[str, int]]]
+
+_signal_sides = {"buy_signals": schemas.BuySignals, "sell_signals": schemas.SellSignals}
+_sizing_fields = ("position_sizing_strategy", "position_management_strategy")
+
+
+def _parts(path: Path) -> list:
+    parts = path.split(".") if isinstance(path, str) else list(path)
+    if not parts or parts == [""]:
+        raise ValueError("Patch path must not be empty.")
+    return parts
+
+
+def _set_in(container: Any, parts: list, value: Any) -> Any:
+    """Copy of container with value set at parts, copying only along the path."""
+    if not parts:
+        return value
+    key, rest = parts[0], parts[1:]
+    if isinstance(container, dict):
+        if rest and key not in container:
+            raise ValueError(f"{key} is not in the strategy.")
+        out = dict(container)
+        out[key] = _set_in(container.get(key), rest, value)
+        return out
+    if isinstance(container, (list, tuple)):
+        try:
+            index = int(key)
+            out = list(container)
+            out[index] = _set_in(container[index], rest, value)
+        except (ValueError, IndexError):
+            raise ValueError(f"{key} is not a valid index.")
+        return out
+    raise ValueError(f"Cannot set {key} on {type(container).__name__}.")
+
+
+def _fields(model) -> dict:
+    return dict(model.__dict__)
+
+
+def _thawed(schema: dict) -> dict:
+    # validators may fill in missing params, so they get their own copy
+    out = dict(schema)
+    if isinstance(out.get("params"), dict):
+        out["params"] = dict(out["params"])
+    return out
+
+
+def _validate_field(klass, name: str, value: Any, values: dict) -> Any:
+    """Run the validation of a single field of klass."""
+    value, errors = klass.__fields__[name].validate(value, values, loc=name, cls=klass)
+    if errors:
+        raise ValidationError([errors], klass)
+    return value
+
+
+def _patch_signal(signal: schemas.Signal, parts: list, value: Any) -> schemas.Signal:
+    values = _set_in(_fields(signal), parts, value)
+    if parts[0] in ("indicator", "comp_indicator") and values[parts[0]] is not None:
+        registry.resolve_indicator(_thawed(values[parts[0]]))
+    return freeze_model(schemas.Signal(**values))
+
+
+def _patch_signals(signals, side: str, parts: list, value: Any):
+    klass = _signal_sides[side]
+    if len(parts) < 2 or parts[0] != "signals":
+        # the whole list (or the whole side) changes
+        values = _set_in({"signals": signals.signals}, parts, value)
+        return freeze_model(klass(**values))
+    try:
+        index = int(parts[1])
+        signal = signals.signals[index]
+    except (ValueError, IndexError):
+        raise ValueError(f"{parts[1]} is not a valid signal index.")
+    if len(parts) == 2:
+        new_signal = freeze_model(schemas.Signal(**value)) if isinstance(value, dict) \
+            else freeze_model(schemas.Signal(**value.dict()))
+    else:
+        new_signal = _patch_signal(signal, parts[2:], value)
+    new_list = list(signals.signals)
+    new_list[index] = new_signal
+    return signals.copy(update={"signals": tuple(new_list)})
+
+
+def _patch_settings(settings: schemas.StrategySettings, parts: list, value: Any, schema_version: int):
+    values = _set_in(_fields(settings), parts, value)
+    if parts[0] in _sizing_fields:
+        registry.resolve_sizing(_thawed(values[parts[0]]), schema_version)
+    return freeze_model(schemas.StrategySettings(**values))
+
+
+def apply_patch(strategy: schemas.CompleteStrategy, path: Path, value: Any) -> schemas.CompleteStrategy:
+    """
+    New read-only strategy with value set at path. Only the sub-model the
+    path points into (and the models that depend on it) are revalidated;
+    pydantic's ValidationError is raised if the change is invalid.
+    """
+    strategy = freeze_model(strategy)
+    parts = _parts(path)
+    field, rest = parts[0], parts[1:]
+
+    if field in _signal_sides:
+        if not rest:
+            new = freeze_model(_signal_sides[field](**value)) if isinstance(value, dict) \
+                else freeze_model(value)
+        else:
+            new = _patch_signals(getattr(strategy, field), field, rest, value)
+    elif field == "strategy_settings":
+        if not rest:
+            new = freeze_model(schemas.StrategySettings(**value)) if isinstance(value, dict) \
+                else freeze_model(value)
+        else:
+            new = _patch_settings(strategy.strategy_settings, rest, value, strategy.schema_version)
+    elif field in schemas.CompleteStrategy.__fields__:
+        if rest:
+            raise ValueError(f"{field} has no nested fields.")
+        new = freeze(_validate_field(schemas.CompleteStrategy, field, value, _fields(strategy)))
+    else:
+        raise ValueError(f"{field} is not a field of CompleteStrategy.")
+
+    return strategy.copy(update={field: new})
+
+
+def apply_patches(strategy: schemas.CompleteStrategy, patches: Sequence) -> schemas.CompleteStrategy:
+    """Apply (path, value) pairs in order."""
+    for path, value in patches:
+        strategy = apply_patch(strategy, path, value)
+    return strategy
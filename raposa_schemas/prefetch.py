@@ -0,0 +1,154 @@
+# coding: utf-8
+
+"""
+Plans the price data a batch of strategies needs, so the data layer can
+read each instrument once instead of once per backtest.
+
+    plan = plan_prefetch(strategies)
+    frames = [read(r.instrument, r.start, r.end, r.columns) for r in plan.reads]
+    for strategy, slices in zip(strategies, plan.slices):
+        data = {s.instrument: frames[s.read].loc[s.start:s.end, list(s.columns)] for s in slices}
+
+Each strategy needs its instruments from its warm-up start (start_date, or
+init_date if earlier, less the bars its indicators look back) to end_date,
+and the price columns its indicators read. The ranges of all strategies
+are merged per instrument into bulk reads; by default every instrument is
+read in one go, pass max_gap_days to split reads around long gaps instead.
+
+Lookbacks are in bars. With a TradingCalendar the warm-up starts exactly
+that many trading days before the start, without one warmup_days() converts
+bars to calendar days conservatively.
+"""
+
+import math
+from datetime import date, timedelta
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from raposa_schemas import schemas, strategy_info
+from raposa_schemas.trading_calendar import TradingCalendar
+
+trading_days_per_year = 252
+# covers holidays the bar to day conversion does not know about
+warmup_padding_days = 7
+
+
+class BulkRead(NamedTuple):
+    """One sequential read of an instrument's price data."""
+
+    instrument: str
+    start: date
+    end: date
+    columns: Tuple[str, ...]
+
+
+class DataSlice(NamedTuple):
+    """The part of a bulk read one strategy needs for one instrument."""
+
+    instrument: str
+    read: int  # index into PrefetchPlan.reads
+    start: date
+    end: date
+    columns: Tuple[str, ...]
+
+
+class PrefetchPlan(NamedTuple):
+    reads: Tuple[BulkRead, ...]
+    # one tuple of DataSlice per strategy (strategies in the order they were
+    # given, slices in instrument order)
+    slices: Tuple[Tuple[DataSlice, ...], ...]
+
+
+def warmup_days(bars: int) -> int:
+    """Calendar days that safely contain the given number of trading bars."""
+    if bars <= 0:
+        return 0
+    return math.ceil(bars * 365 / trading_days_per_year) + warmup_padding_days
+
+
+def _setting(settings: dict, key: str):
+    if key in settings:
+        return settings[key]
+    return schemas.StrategySettings.__fields__[key].default
+
+
+def _parse(value: Union[str, date]) -> date:
+    return value if isinstance(value, date) else schemas.parse_date(value)
+
+
+def data_range(
+    strategy: Union[schemas.CompleteStrategy, dict],
+    warmup: Callable[[int], int] = warmup_days,
+    calendar: Optional[TradingCalendar] = None,
+) -> Tuple[date, date]:
+    """First and last day of price data a strategy needs, warm-up included."""
+    strategy = strategy_info.as_dict(strategy)
+    settings = strategy["strategy_settings"]
+    start = _parse(_setting(settings, "start_date"))
+    init_date = _setting(settings, "init_date")
+    if init_date:
+        start = min(start, _parse(init_date))
+    lookback = strategy_info.required_lookback(strategy)
+    if calendar is not None:
+        start = calendar.shift(start, -lookback).date
+    else:
+        start -= timedelta(days=warmup(lookback))
+    return start, _parse(_setting(settings, "end_date"))
+
+
+def plan_prefetch(
+    strategies: Iterable[Union[schemas.CompleteStrategy, dict]],
+    max_gap_days: Optional[int] = None,
+    warmup: Callable[[int], int] = warmup_days,
+    calendar: Optional[TradingCalendar] = None,
+) -> PrefetchPlan:
+    """
+    Bulk reads covering every (instrument, date range, columns) the
+    strategies need, plus the slice of those reads each strategy uses.
+    Ranges of one instrument closer than max_gap_days are merged into one
+    read; with max_gap_days=None each instrument is read once.
+    """
+    # (instrument, start, end, columns, strategy index)
+    needs = []
+    n_strategies = 0
+    for n, strategy in enumerate(strategies):
+        strategy = strategy_info.as_dict(strategy)
+        start, end = data_range(strategy, warmup, calendar)
+        columns = strategy_info.required_price_columns(strategy)
+        for instrument in dict.fromkeys(strategy["strategy_settings"]["instruments"]):
+            needs.append((instrument, start, end, columns, n))
+        n_strategies = n + 1
+
+    reads: List[BulkRead] = []
+    slices: List[List[DataSlice]] = [[] for _ in range(n_strategies)]
+    needs.sort(key=lambda need: (need[0], need[1]))
+
+    group: list = []
+    group_end = None
+
+    def flush():
+        columns = set()
+        for need in group:
+            columns.update(need[3])
+        read = BulkRead(
+            group[0][0],
+            group[0][1],
+            group_end,
+            tuple(c for c in ("Open", "High", "Low", "Close", "Volume") if c in columns),
+        )
+        for instrument, start, end, need_columns, n in group:
+            slices[n].append(DataSlice(instrument, len(reads), start, end, need_columns))
+        reads.append(read)
+        group.clear()
+
+    for need in needs:
+        if group and (
+            need[0] != group[0][0]
+            or (max_gap_days is not None and (need[1] - group_end).days > max_gap_days)
+        ):
+            flush()
+        group_end = need[2] if not group else max(group_end, need[2])
+        group.append(need)
+    if group:
+        flush()
+
+    return PrefetchPlan(tuple(reads), tuple(tuple(s) for s in slices))
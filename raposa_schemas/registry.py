@@ -0,0 +1,424 @@
+# coding: utf-8
+
+"""
+Registry of the schema classes defined in schemas.py.
+
+Everything here is built once at import time and is read-only, so
+consumers can go from an indicator name, a dropdown label or a class to
+the matching schema (and its metadata) with a single dict lookup instead
+of ``globals()[name]`` or scanning the module.
+
+    from raposa_schemas import registry
+
+    klass = registry.get_class("PRICE")
+    indicator = registry.resolve_indicator({"name": "SMA", "params": {"period": 20}})
+    registry.lookback(indicator)  # -> 20
+"""
+
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from raposa_schemas import metrics, schemas
+
+indicator_classes = schemas.indicator_classes
+
+# Position sizing and position management share the same classes.
+sizing_classes = (
+    schemas.NoRiskManagement,
+    schemas.EqualAllocation,
+    schemas.VOLATILITYSizing,
+    schemas.ATRSizing,
+    schemas.TurtleUnitSizing,
+    schemas.TurtlePyramiding,
+)
+
+sizings_with_time_params = {
+    "VOLATILITYSizing": ["period"],
+    "ATRSizing": ["period"],
+    "TurtleUnitSizing": ["period"],
+    "TurtlePyramiding": ["period"],
+}
+
+# Price columns each schema reads from the data layer. Schemas with a
+# "price_type" param read whatever column(s) that param points to instead.
+HLC = ("High", "Low", "Close")
+price_type_columns = {
+    "High": ("High",),
+    "Low": ("Low",),
+    "Close": ("Close",),
+    "Typical": HLC,
+}
+_static_price_columns = {
+    "SMA": ("Close",),
+    "EMA": ("Close",),
+    "MACD": ("Close",),
+    "MACD_SIGNAL": ("Close",),
+    "RSI": ("Close",),
+    "STOP_PRICE": ("Close",),
+    "ATR_STOP_PRICE": HLC,
+    "ATR": HLC,
+    "ATRP": HLC,
+    "LEVEL": (),
+    "BOOLEAN": (),
+    "VOLATILITY": ("Close",),
+    "PSAR": ("High", "Low"),
+    "HURST": ("Close",),
+    "DONCHIAN": ("High", "Low"),
+    "MAD": ("Close",),
+    "NoRiskManagement": (),
+    "EqualAllocation": (),
+    "VOLATILITYSizing": ("Close",),
+    "ATRSizing": HLC,
+    "TurtleUnitSizing": HLC,
+    "TurtlePyramiding": HLC,
+}
+
+
+class ParamSpec(NamedTuple):
+    """
+    What a schema's validator accepts for one param. kind is "int",
+    "number" (int or float), "bool" or "choice".
+    """
+
+    name: str
+    kind: str
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    exclusive_minimum: bool = False
+    choices: Tuple = ()
+
+    def accepts(self, value) -> bool:
+        if self.kind == "choice":
+            return value in self.choices
+        if self.kind == "bool":
+            return isinstance(value, bool)
+        if self.kind == "int" and not isinstance(value, int):
+            return False
+        if not isinstance(value, (int, float)):
+            return False
+        if self.minimum is not None:
+            if value < self.minimum or (self.exclusive_minimum and value == self.minimum):
+                return False
+        if self.maximum is not None and value > self.maximum:
+            return False
+        return True
+
+
+price_types = ("High", "Low", "Close", "Typical")
+
+
+def _positive_int(name):
+    return ParamSpec(name, "int", minimum=0, exclusive_minimum=True)
+
+
+def _positive_number(name):
+    return ParamSpec(name, "number", minimum=0, exclusive_minimum=True)
+
+
+def _fraction(name):
+    return ParamSpec(name, "number", minimum=0, maximum=1, exclusive_minimum=True)
+
+
+# Mirrors the param validators in schemas.py. PSAR has no validator, so
+# only its types are described.
+param_specs = {
+    "SMA": (_positive_int("period"),),
+    "EMA": (_positive_int("period"),),
+    "MACD": (_positive_int("fastEMA_period"), _positive_int("slowEMA_period")),
+    "MACD_SIGNAL": (
+        _positive_int("fastEMA_period"),
+        _positive_int("slowEMA_period"),
+        _positive_int("signalEMA_period"),
+    ),
+    "RSI": (_positive_int("period"),),
+    "STOP_PRICE": (ParamSpec("percent_change", "number"), ParamSpec("trailing", "bool")),
+    "ATR_STOP_PRICE": (
+        _positive_int("period"),
+        ParamSpec("stop_price_ATR_frac", "number"),
+        ParamSpec("trailing", "bool"),
+    ),
+    "PRICE": (ParamSpec("price_type", "choice", choices=price_types),),
+    "PRICE_WINDOW": (
+        _positive_int("period"),
+        ParamSpec("max_or_min", "choice", choices=("max", "min")),
+        ParamSpec("price_type", "choice", choices=price_types),
+    ),
+    "ATR": (_positive_int("period"), _positive_number("multiple")),
+    "ATRP": (_positive_int("period"), _positive_number("multiple")),
+    "LEVEL": (_positive_number("level"),),
+    "BOOLEAN": (ParamSpec("boolean", "bool"),),
+    "VOLATILITY": (_positive_int("period"), _positive_number("multiple")),
+    "PSAR": (
+        ParamSpec("type_indicator", "choice",
+            choices=("reversal_toUptrend", "reversal_toDowntrend")),
+        ParamSpec("init_acceleration_factor", "number"),
+        ParamSpec("acceleration_factor_step", "number"),
+        ParamSpec("max_acceleration_factor", "number"),
+        ParamSpec("period", "int"),
+    ),
+    "HURST": (_positive_int("period"), _positive_int("minLags"), _positive_int("maxLags")),
+    "BOLLINGER": (
+        _positive_int("period"),
+        _positive_number("numSTD"),
+        ParamSpec("band", "choice", choices=("upper", "middle", "lower")),
+        ParamSpec("price_type", "choice", choices=price_types),
+    ),
+    "BAND_WIDTH": (
+        _positive_int("period"),
+        _positive_number("numStdDevUpper"),
+        _positive_number("numStdDevLower"),
+        ParamSpec("price_type", "choice", choices=price_types),
+    ),
+    "DONCHIAN": (
+        ParamSpec("period", "int"),
+        ParamSpec("channel", "choice", choices=("upper", "lower", "middle")),
+    ),
+    "MAD": (_positive_int("fastSMA_period"), _positive_int("slowSMA_period")),
+    "NoRiskManagement": (),
+    "EqualAllocation": (),
+    "VOLATILITYSizing": (
+        _positive_int("period"),
+        _positive_number("risk_coefficient"),
+        _fraction("max_position_risk_frac"),
+        ParamSpec("risk_cap", "bool"),
+    ),
+    "ATRSizing": (
+        _positive_int("period"),
+        _positive_number("risk_coefficient"),
+        _fraction("max_position_risk_frac"),
+        ParamSpec("risk_cap", "bool"),
+    ),
+    "TurtleUnitSizing": (
+        _positive_int("period"),
+        _positive_number("risk_coefficient"),
+        _fraction("max_position_risk_frac"),
+        _positive_int("num_turtle_units"),
+        ParamSpec("risk_cap", "bool"),
+    ),
+    "TurtlePyramiding": (
+        _positive_int("period"),
+        _positive_number("risk_coefficient"),
+        _fraction("max_position_risk_frac"),
+        _positive_int("max_num_entry_points"),
+        _fraction("delta_N_frac"),
+        ParamSpec("stop_price_N_frac", "number"),
+        ParamSpec("risk_cap", "bool"),
+    ),
+}
+
+# (smaller param, larger param, strictly smaller) checked across params
+param_orderings = {
+    "MACD": (("fastEMA_period", "slowEMA_period", True),),
+    "MACD_SIGNAL": (("fastEMA_period", "slowEMA_period", True),),
+    "HURST": (("minLags", "maxLags", True),),
+    "MAD": (("fastSMA_period", "slowSMA_period", False),),
+}
+
+
+class SchemaInfo(NamedTuple):
+    """Static metadata about an indicator or sizing schema class."""
+
+    name: str
+    klass: Type[BaseModel]
+    kind: str  # "indicator" or "sizing"
+    labels: Tuple[str, ...]
+    default_params: Mapping
+    time_params: Tuple[str, ...]
+    price_columns: Tuple[str, ...]  # with the default params
+    uses_price_type: bool
+    needs_comp: bool
+    valid_comps: Tuple[str, ...]
+    param_specs: Tuple[ParamSpec, ...]
+    param_orderings: Tuple[Tuple[str, str, bool], ...]
+
+
+def _default(klass, field):
+    return klass.__fields__[field].default if field in klass.__fields__ else None
+
+
+def _build_info(klass, kind, time_params, label_maps):
+    name = _default(klass, "name")
+    params = _default(klass, "params") or {}
+    uses_price_type = "price_type" in params
+    if uses_price_type:
+        columns = price_type_columns[params["price_type"]]
+    else:
+        columns = _static_price_columns[name]
+    labels = []
+    for label_map in label_maps:
+        for label, value in label_map.items():
+            if value == name and label not in labels:
+                labels.append(label)
+    return SchemaInfo(
+        name=name,
+        klass=klass,
+        kind=kind,
+        labels=tuple(labels),
+        default_params=MappingProxyType(dict(params)),
+        time_params=tuple(time_params.get(name, ())),
+        price_columns=columns,
+        uses_price_type=uses_price_type,
+        needs_comp=bool(_default(klass, "needs_comp")),
+        valid_comps=tuple(_default(klass, "valid_comps") or ()),
+        param_specs=param_specs[name],
+        param_orderings=param_orderings.get(name, ()),
+    )
+
+
+def _labels_to_classes(label_map, by_name):
+    return MappingProxyType({label: by_name[name] for label, name in label_map.items()})
+
+
+_infos = [
+    _build_info(
+        klass,
+        "indicator",
+        schemas.indicators_with_time_params,
+        [schemas.every_indicator],
+    )
+    for klass in indicator_classes
+] + [
+    _build_info(
+        klass,
+        "sizing",
+        sizings_with_time_params,
+        [schemas.position_sizings, schemas.position_managements],
+    )
+    for klass in sizing_classes
+]
+
+# name -> class
+INDICATORS = MappingProxyType(
+    {info.name: info.klass for info in _infos if info.kind == "indicator"}
+)
+SIZINGS = MappingProxyType(
+    {info.name: info.klass for info in _infos if info.kind == "sizing"}
+)
+
+# dropdown label -> class
+INDICATOR_LABELS = _labels_to_classes(schemas.every_indicator, INDICATORS)
+BUY_INDICATOR_LABELS = _labels_to_classes(schemas.buy_indicators, INDICATORS)
+SELL_INDICATOR_LABELS = _labels_to_classes(schemas.sell_indicators, INDICATORS)
+POSITION_SIZING_LABELS = _labels_to_classes(schemas.position_sizings, SIZINGS)
+POSITION_MANAGEMENT_LABELS = _labels_to_classes(schemas.position_managements, SIZINGS)
+
+# class -> metadata, and name -> metadata for callers holding a dict
+INFO = MappingProxyType({info.klass: info for info in _infos})
+INFO_BY_NAME = MappingProxyType({info.name: info for info in _infos})
+
+# int bitsets of which indicator can be compared with which
+COMP_MATRIX = schemas.comp_matrix
+
+
+def get_class(name: str) -> Type[BaseModel]:
+    """Return the schema class for an indicator or sizing name, e.g. "SMA"."""
+    try:
+        return INFO_BY_NAME[name].klass
+    except KeyError:
+        raise ValueError(f"{name} is not a recognized indicator or sizing strategy.")
+
+
+def get_info(schema: Union[str, Type[BaseModel], BaseModel, dict]) -> SchemaInfo:
+    """
+    Return the SchemaInfo for a name, a schema class, a schema instance or
+    an indicator/sizing dict.
+    """
+    if isinstance(schema, str):
+        name = schema
+    elif isinstance(schema, type):
+        if schema in INFO:
+            return INFO[schema]
+        name = _default(schema, "name")
+    elif isinstance(schema, dict):
+        name = schema.get("name")
+    else:
+        name = schema.name
+    try:
+        return INFO_BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"{name} is not a recognized indicator or sizing strategy.")
+
+
+def _resolve(value, by_name, kind):
+    if isinstance(value, BaseModel):
+        if type(value) in INFO and INFO[type(value)].kind == kind:
+            return value
+        value = value.dict()
+    try:
+        klass = by_name[value["name"]]
+    except KeyError:
+        raise ValueError(f"{value.get('name')} is not a recognized {kind}.")
+    return metrics.validate(klass, value)
+
+
+def resolve_indicator(indicator: Union[dict, BaseModel]) -> BaseModel:
+    """
+    Validate an indicator dict (as found in Signal.indicator and
+    Signal.comp_indicator) into an instance of its schema class.
+    """
+    return _resolve(indicator, INDICATORS, "indicator")
+
+
+def resolve_sizing(sizing: Union[dict, BaseModel], schema_version: Optional[int] = None) -> BaseModel:
+    """
+    Validate a position sizing/management dict (as found in
+    StrategySettings) into an instance of its schema class. With the
+    schema_version of the strategy it comes from, a current-version sizing
+    is held to the current shape: a missing risk_cap is an error instead of
+    the deprecated fallback (and its warning).
+    """
+    if schema_version == schemas.SCHEMA_VERSION and isinstance(sizing, dict):
+        info = INFO_BY_NAME.get(sizing.get("name"))
+        params = sizing.get("params")
+        if (
+            info is not None
+            and isinstance(params, dict)
+            and "risk_cap" not in params
+            and any(spec.name == "risk_cap" for spec in info.param_specs)
+        ):
+            raise ValueError(
+                f"{info.name} params must set risk_cap in a schema version {schemas.SCHEMA_VERSION} strategy."
+            )
+    return _resolve(sizing, SIZINGS, "sizing")
+
+
+def _params_of(schema):
+    if isinstance(schema, dict):
+        return schema.get("params") or {}
+    return schema.params or {}
+
+
+# time params of averages taken over another indicator's output, whose
+# warm-up starts once that indicator has warmed up
+_chained_time_params = {"MACD_SIGNAL": ("signalEMA_period",)}
+
+
+def lookback(schema: Union[dict, BaseModel]) -> int:
+    """
+    Number of bars an indicator or sizing schema needs before it produces
+    its first value, i.e. the largest of its time params (plus any chained
+    ones, like the signal EMA of MACD_SIGNAL).
+    """
+    info = get_info(schema)
+    if not info.time_params:
+        return 0
+    params = _params_of(schema)
+    chained = _chained_time_params.get(info.name, ())
+    bars = max(
+        (int(params.get(param, 0)) for param in info.time_params if param not in chained),
+        default=0,
+    )
+    for param in chained:
+        bars += max(int(params.get(param, 0)) - 1, 0)
+    return bars
+
+
+def price_columns(schema: Union[dict, BaseModel]) -> Tuple[str, ...]:
+    """Price columns an indicator or sizing schema reads with its params."""
+    info = get_info(schema)
+    if info.uses_price_type:
+        price_type: Optional[str] = _params_of(schema).get("price_type")
+        return price_type_columns.get(price_type, info.price_columns)
+    return info.price_columns
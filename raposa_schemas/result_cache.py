@@ -0,0 +1,254 @@
+# coding: utf-8
+
+"""
+Disk-backed cache of backtest results, shared by the worker processes of
+one machine.
+Requires numpy: pip install raposa-schemas[numpy]
+
+Results are keyed by the strategy's canonical fingerprint (see
+strategy_info.fingerprint), a data-version tag and the version of the price
+data of each of its instruments, so equivalent strategies share a result
+and new data is never served old results:
+
+    cache = ResultCache("/var/cache/raposa", max_bytes=2 ** 30, data_version="2021-06-30")
+    result = cache.get_or_compute(strategy, run_backtest)  # {name: array}
+
+    cache.invalidate(["TSLA"])  # TSLA prices were corrected
+
+A result is a dict of numpy arrays (equity curve, dates, a structured array
+of trades...) stored as one compressed .npz file, written to a temporary
+file and renamed into place. An sqlite index in WAL mode holds the entries,
+their sizes and last use, so any number of processes can read and write
+and the least recently used results are evicted once the cache holds more
+than max_bytes.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from raposa_schemas import metrics, schemas, strategy_info, universe
+
+Result = Dict[str, np.ndarray]
+
+cache_requests = metrics.REGISTRY.counter(
+    "raposa_result_cache_requests_total", "Result cache lookups, by result (hit or miss).", ("result",)
+)
+
+_schema = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS entry_instruments (
+    key TEXT NOT NULL,
+    instrument TEXT NOT NULL,
+    PRIMARY KEY (instrument, key)
+);
+CREATE INDEX IF NOT EXISTS entry_instruments_key ON entry_instruments (key);
+CREATE TABLE IF NOT EXISTS instrument_versions (
+    instrument TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+class CacheKey(NamedTuple):
+    key: str
+    fingerprint: str
+    data_version: str
+    instruments: Tuple[str, ...]
+
+
+class ResultCache:
+    def __init__(self, directory: str, max_bytes: int = 2 ** 30, data_version: str = ""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.data_version = data_version
+        os.makedirs(os.path.join(directory, "results"), exist_ok=True)
+        self._local = threading.local()
+        self._db().executescript(_schema)
+
+    # sqlite connections can't cross threads or forks, so each gets its own
+    def _db(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.db = sqlite3.connect(
+                os.path.join(self.directory, "index.sqlite"), timeout=60, isolation_level=None
+            )
+            local.db.execute("PRAGMA journal_mode=WAL")
+            local.db.execute("PRAGMA synchronous=NORMAL")
+            local.pid = os.getpid()
+        return local.db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction, holding the write lock from the start."""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, "results", key[:2], key + ".npz")
+
+    def instrument_versions(self, instruments: Iterable[str]) -> Dict[str, int]:
+        instruments = list(instruments)
+        rows = self._db().execute(
+            f"SELECT instrument, version FROM instrument_versions WHERE instrument IN ({','.join('?' * len(instruments))})",
+            instruments,
+        ).fetchall()
+        versions = dict.fromkeys(instruments, 0)
+        versions.update(rows)
+        return versions
+
+    def key(self, strategy: Union[schemas.CompleteStrategy, dict]) -> CacheKey:
+        """
+        The key of a strategy's result with the data as it is now. Take it
+        before running the backtest, so a result computed while an
+        instrument was invalidated is stored under the old data's key.
+        """
+        fingerprint = strategy_info.fingerprint(strategy)
+        instruments = tuple(sorted(set(universe.instruments_of(strategy))))
+        versions = self.instrument_versions(instruments)
+        identity = [fingerprint, self.data_version, [[symbol, versions[symbol]] for symbol in instruments]]
+        key = hashlib.sha256(json.dumps(identity).encode()).hexdigest()
+        return CacheKey(key, fingerprint, self.data_version, instruments)
+
+    def get(self, key: Union[CacheKey, str]) -> Optional[Result]:
+        key = key.key if isinstance(key, CacheKey) else key
+        db = self._db()
+        if db.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is None:
+            cache_requests.inc("miss")
+            return None
+        try:
+            with np.load(self._path(key), allow_pickle=False) as f:
+                result = {name: f[name] for name in f.files}
+        except FileNotFoundError:
+            # evicted by another process since the lookup
+            cache_requests.inc("miss")
+            return None
+        with self._transaction() as db:
+            db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        cache_requests.inc("hit")
+        return result
+
+    def put(self, key: CacheKey, result: Result):
+        for name, array in result.items():
+            if np.asarray(array).dtype.hasobject:
+                raise ValueError(f"{name} holds Python objects, results must be plain or structured arrays.")
+        path = self._path(key.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **result)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key.key, key.fingerprint, key.data_version, size, now, now),
+            )
+            db.executemany(
+                "INSERT OR IGNORE INTO entry_instruments VALUES (?, ?)",
+                [(key.key, symbol) for symbol in key.instruments],
+            )
+            evicted = self._evict(db)
+        self._unlink(evicted)
+
+    def _evict(self, db) -> list:
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        evicted = []
+        if total <= self.max_bytes:
+            return evicted
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append(key)
+            total -= size
+        self._delete(db, evicted)
+        return evicted
+
+    def _delete(self, db, keys: list):
+        db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+        db.executemany("DELETE FROM entry_instruments WHERE key = ?", [(key,) for key in keys])
+
+    def _unlink(self, keys: Iterable[str]):
+        for key in keys:
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get_or_compute(
+        self,
+        strategy: Union[schemas.CompleteStrategy, dict],
+        compute: Callable[[Union[schemas.CompleteStrategy, dict]], Result],
+    ) -> Result:
+        key = self.key(strategy)
+        result = self.get(key)
+        if result is None:
+            result = compute(strategy)
+            self.put(key, result)
+        return result
+
+    def invalidate(self, instruments: Iterable[str]) -> int:
+        """
+        Drop every result that uses one of instruments, whose price data
+        changed, and move them to a new data version so results computed
+        from the old data are never stored under the new one. Returns the
+        number of results dropped.
+        """
+        instruments = sorted(set(instruments))
+        marks = ",".join("?" * len(instruments))
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT INTO instrument_versions VALUES (?, 1) "
+                "ON CONFLICT (instrument) DO UPDATE SET version = version + 1",
+                [(symbol,) for symbol in instruments],
+            )
+            keys = [
+                key for key, in db.execute(
+                    f"SELECT DISTINCT key FROM entry_instruments WHERE instrument IN ({marks})", instruments
+                )
+            ]
+            self._delete(db, keys)
+        self._unlink(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._transaction() as db:
+            keys = [key for key, in db.execute("SELECT key FROM entries")]
+            self._delete(db, keys)
+        self._unlink(keys)
+
+    def __len__(self):
+        return self._db().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """Bytes of results on disk."""
+        return self._db().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
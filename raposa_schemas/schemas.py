@@ -23,14 +23,23 @@
 #     5) update the bot garage so that it can process the indicator in new strategies
 #         update signal_translator() in apps\dash_bot_garage\dash_app_utils\utils.py 
 
-from typing import List, Type, Union, Optional
+from datetime import date
+from functools import lru_cache
+from threading import Lock
+from typing import Iterable, List, Tuple, Type, Union, Optional
 from pydantic import BaseModel, validator
 from warnings import warn
 
+from raposa_schemas import metrics
+
 # List parameters and input ranges for each
 max_signals = 3
 max_instruments = 25
 
+# Version of the stored strategy format, see migrations.py.
+# 0 means the payload was never stamped.
+SCHEMA_VERSION = 1
+
 signal_count = [
     "First",
     "Second",
@@ -48,6 +57,7 @@ signal_count = [
 # in utils.py, when assembling the list of signals, the value of the dropdown is used as the dictionary key, and the output is the name of the
 # corresponding SCHEMA class listed at the bottom of this file.
 # - NOTE: all of the keys are what will show up in the dropdown menu, so their capitalization matters
+# - registry.py maps these labels (and the class names) straight to the SCHEMA classes.
 
 
 # every_indicator is not used to directly make any dropdowns. But used often to check if an indicator exists.
@@ -133,20 +143,20 @@ position_managements = {
     "No Risk Management": "NoRiskManagement",
 }
 
+# Indicators that have to look back in time and the param(s)
+# that defines the farthest number of days to look back
 indicators_with_time_params = {
-    '''
-    Indicators that have to look back in time and the param(s)
-    that defines the farthest number of days to look back
-    '''
     "SMA": ["period"],
     "EMA": ["period"],
     "MACD": ["slowEMA_period", "fastEMA_period"],
-    "MACD_SIGNAL": ["slowEMA_period", "fastEMA_period," "signalEMA_period"],
+    "MACD_SIGNAL": ["slowEMA_period", "fastEMA_period", "signalEMA_period"],
     "RSI": ["period"],
     "ATR": ["period"],
+    "ATRP": ["period"],
     "ATR_STOP_PRICE": ["period"],
     "VOLATILITY": ["period"],
     "PSAR": ["period"],
+    "HURST": ["period", "maxLags"],
     "PRICE_WINDOW": ["period"],
     "BOLLINGER": ["period"],
     "BAND_WIDTH": ["period"],
@@ -154,6 +164,9 @@ indicators_with_time_params = {
     "DONCHIAN": ["period"],
 }
 
+# "lttb": Largest-Triangle-Three-Buckets, "minmax": low and high of each bucket
+downsample_methods = ("lttb", "minmax")
+
 relations = {"> or =": "geq", "< or =": "leq", ">": "gt", "<": "lt", "=": "eq"}
 
 """
@@ -174,14 +187,65 @@ notes about pydantic and Typing
             not really, but there are conseuquences of mixing specification and not in one model see docs)
 
     - You can make an instance of a class with this code:
-        indicator_klass = globals()['PRICE'] 
-        params = indicator_klass.__fields__['params']
-        # This will make an object of the class that is hard to work with, but can be populated with
-        temp_klass = indicator_klass()
-        print(temp_klass.params
+        from raposa_schemas import registry
+        indicator_klass = registry.get_class('PRICE')
+        params = registry.get_info(indicator_klass).default_params
+        # or validate an indicator dict straight into its class
+        indicator = registry.resolve_indicator({"name": "PRICE", "params": {"price_type": "Close"}})
+        print(indicator.params)
 
 """
 
+# SHARED DEFAULTS ============================================
+# pydantic copies a field's default into every instance. The defaults of
+# the indicator and sizing classes are read-only instead (FrozenDicts and
+# tuples), which copy as themselves, so every default instance shares one
+# object. A model that needs different params is built with them (or with
+# .copy(update=...)), which replaces the shared default.
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only.")
+
+
+class FrozenDict(dict):
+    """A dict that cannot be changed after it is created."""
+
+    __slots__ = ()
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+    __ior__ = _readonly
+
+    def __hash__(self):
+        return hash(tuple(self.items()))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __repr__(self):
+        return f"FrozenDict({dict.__repr__(self)})"
+
+
+def frozen_params(cls, value):
+    """
+    Supplied params become FrozenDicts too, so a model has the same params
+    type whether it uses the default or not. Runs after the param checks.
+    """
+    return value if isinstance(value, FrozenDict) else FrozenDict(value)
+
+
 """ all of these indicator classes have the same number of inputs
 as required to run in pyalgotrade"""
 
@@ -190,9 +254,9 @@ as required to run in pyalgotrade"""
 
 class SMA(BaseModel):
     name: str = "SMA"
-    params: dict = {"period": 10}
+    params: dict = FrozenDict({"period": 10})
     needs_comp: bool = True
-    valid_comps: list = ["SMA", "EMA", "MACD", "PRICE"]
+    valid_comps: Optional[Tuple[str, ...]] = ("SMA", "EMA", "MACD", "PRICE")
     # param bound >= 2 and < 1000
 
     @validator("params")
@@ -214,12 +278,14 @@ class SMA(BaseModel):
                     raise TypeError("SMA period must be > zero.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class EMA(BaseModel):
     name: str = "EMA"
-    params: dict = {"period": 10}
+    params: dict = FrozenDict({"period": 10})
     needs_comp: bool = True
-    valid_comps: list = ["SMA", "EMA", "MACD", "PRICE"]
+    valid_comps: Optional[Tuple[str, ...]] = ("SMA", "EMA", "MACD", "PRICE")
     # param bound >= 2 and < 1000
     @validator("params")
     def param_key_check(cls, value):
@@ -240,12 +306,14 @@ class EMA(BaseModel):
                     raise TypeError("EMA period must be > zero")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class MACD(BaseModel):
     name: str = "MACD"
-    params: dict = {"fastEMA_period": 10, "slowEMA_period": 20}
+    params: dict = FrozenDict({"fastEMA_period": 10, "slowEMA_period": 20})
     needs_comp: bool = True
-    valid_comps: list = ["SMA", "EMA", "PRICE", "MACD_SIGNAL"]
+    valid_comps: Optional[Tuple[str, ...]] = ("SMA", "EMA", "PRICE", "MACD_SIGNAL")
     # param bound >= 2 and < 1000
     # need to enforce that fastEMA period is > =slowEMAperiod
 
@@ -276,12 +344,14 @@ class MACD(BaseModel):
             )
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class MACD_SIGNAL(BaseModel):
     name: str = "MACD_SIGNAL"
-    params: dict = {"fastEMA_period": 10, "slowEMA_period": 20, "signalEMA_period": 9}
+    params: dict = FrozenDict({"fastEMA_period": 10, "slowEMA_period": 20, "signalEMA_period": 9})
     needs_comp: bool = True
-    valid_comps: list = ["MACD", "SMA", "EMA"]
+    valid_comps: Optional[Tuple[str, ...]] = ("MACD", "SMA", "EMA")
 
     @validator("params")
     def param_key_check(cls, value):
@@ -310,12 +380,14 @@ class MACD_SIGNAL(BaseModel):
             )
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class RSI(BaseModel):
     name: str = "RSI"
-    params: dict = {"period": 10}
+    params: dict = FrozenDict({"period": 10})
     needs_comp: bool = True  # will always be level
-    valid_comps: list = ["LEVEL"]
+    valid_comps: Optional[Tuple[str, ...]] = ("LEVEL",)
     # param period bound >= 2 and < 1000
     # LEVEL for RSI is always between 0 and 100
 
@@ -338,15 +410,17 @@ class RSI(BaseModel):
                     raise TypeError("RSI period must be > zero")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class STOP_PRICE(BaseModel):
     name: str = "STOP_PRICE"
-    params: dict = {
+    params: dict = FrozenDict({
         "percent_change": 10.1,
         "trailing": False,
-    }  # will be positive for stop profit and neg for stop loss
+    })  # will be positive for stop profit and neg for stop loss
     needs_comp: bool = True  # will always be price
-    valid_comps: list = ["PRICE"]
+    valid_comps: Optional[Tuple[str, ...]] = ("PRICE",)
     # param bound > -100% and < 10000%
     @validator("params")
     def param_key_check(cls, value):
@@ -370,16 +444,18 @@ class STOP_PRICE(BaseModel):
                 raise TypeError("'Trailing' value must be boolean.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class ATR_STOP_PRICE(BaseModel):
     name: str = "ATR_STOP_PRICE"
-    params: dict = dict(
+    params: dict = FrozenDict(
         period=20,
         stop_price_ATR_frac=-2.0,  # positive for stop profit, negative for stop price
         trailing=False,
     )
     needs_comp: bool = True
-    valid_comps: list = ["PRICE"]
+    valid_comps: Optional[Tuple[str, ...]] = ("PRICE",)
     # param period bound >= 2 and < 1000
     # stop price frac bound by -10 and + 10
 
@@ -408,14 +484,16 @@ class ATR_STOP_PRICE(BaseModel):
             raise TypeError("'Trailing' value must be boolean.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class PRICE(BaseModel):
     name: str = "PRICE"
-    params: dict = {
+    params: dict = FrozenDict({
         "price_type": "Close"
-    }  # must be in ["High", "Low", "Close", or "Typical"]
+    })  # must be in ["High", "Low", "Close", or "Typical"]
     needs_comp: bool = True
-    valid_comps: list = ["SMA", "EMA", "MACD", "ATR", "PRICE_WINDOW", "BOLLINGER"]
+    valid_comps: Optional[Tuple[str, ...]] = ("SMA", "EMA", "MACD", "ATR", "PRICE_WINDOW", "BOLLINGER")
 
     @validator("params")
     def param_key_check(cls, value):
@@ -434,16 +512,18 @@ class PRICE(BaseModel):
             raise ValueError("Price type must be High, Low, Close, or Typical.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class PRICE_WINDOW(BaseModel):
     name: str = "PRICE_WINDOW"
-    params: dict = {
+    params: dict = FrozenDict({
         "period": 30,  # Number of days to look back
         "max_or_min": "max",  # must be in ["max" or "min"]
         "price_type": "High",  # must be in ["High", "Low", "Close", "Typical"]
-    }
+    })
     needs_comp: bool = True
-    valid_comps: list = ["PRICE", "LEVEL"]
+    valid_comps: Optional[Tuple[str, ...]] = ("PRICE", "LEVEL")
     # param period bound >= 2 and < 1000
 
     @validator("params")
@@ -471,12 +551,14 @@ class PRICE_WINDOW(BaseModel):
             raise ValueError("Price type must be High, Low, Close, or Typical.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class ATR(BaseModel):
     name: str = "ATR"
-    params: dict = {"period": 20, "multiple": 1}
+    params: dict = FrozenDict({"period": 20, "multiple": 1})
     needs_comp: bool = True
-    valid_comps: list = ["ATR"]
+    valid_comps: Optional[Tuple[str, ...]] = ("ATR",)
     # param period bound >= 2 and < 1000
     # param multiple bound by greather than 0.25 to 10
 
@@ -507,12 +589,14 @@ class ATR(BaseModel):
             raise TypeError("ATR multiple must be > zero.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class ATRP(BaseModel):
     name: str = "ATRP"
-    params: dict = {"period": 20, "multiple": 1}
+    params: dict = FrozenDict({"period": 20, "multiple": 1})
     needs_comp: bool = True
-    valid_comps: list = ["ATRP"]
+    valid_comps: Optional[Tuple[str, ...]] = ("ATRP",)
     # param period bound >= 2 and < 1000
     # param multiple bound by greather than 0.25 to 10
 
@@ -542,12 +626,14 @@ class ATRP(BaseModel):
             raise TypeError("ATR % multiple must be > zero.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class LEVEL(BaseModel):
     name: str = "LEVEL"
-    params: dict = {"level": 10}
+    params: dict = FrozenDict({"level": 10})
     needs_comp: bool = False  # always is a comparison
-    valid_comps: list = None
+    valid_comps: Optional[Tuple[str, ...]] = None
     # param level bound by 0 and 100
     # might need to be negative for somethings
 
@@ -572,12 +658,14 @@ class LEVEL(BaseModel):
                     raise TypeError("Level must be > zero.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class BOOLEAN(BaseModel):
     name: str = "BOOLEAN"
-    params: dict = {"boolean": True}  # or False
+    params: dict = FrozenDict({"boolean": True})  # or False
     needs_comp: bool = True
-    valid_comps: list = ["PSAR"]
+    valid_comps: Optional[Tuple[str, ...]] = ("PSAR",)
 
     @validator("params")
     def param_key_check(cls, value):
@@ -596,12 +684,14 @@ class BOOLEAN(BaseModel):
                     raise TypeError("True/False must be True... or False")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class VOLATILITY(BaseModel):
     name: str = "VOLATILITY"
-    params: dict = {"period": 252, "multiple": 1}
+    params: dict = FrozenDict({"period": 252, "multiple": 1})
     needs_comp: bool = True
-    valid_comps: list = ["VOLATILITY", "LEVEL"]
+    valid_comps: Optional[Tuple[str, ...]] = ("VOLATILITY", "LEVEL")
     # param period bound >= 2 and < 1000
     # param multiple bound by greather than 0.25 to 10
 
@@ -631,6 +721,8 @@ class VOLATILITY(BaseModel):
             raise TypeError("Volatility multiple must be > zero.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class PSAR(BaseModel):
     """
@@ -638,23 +730,25 @@ class PSAR(BaseModel):
     """
 
     name: str = "PSAR"
-    params: dict = {
+    params: dict = FrozenDict({
         "type_indicator": "reversal_toUptrend",  # Either 'reversal_toUptrend', 'reversal_toDowntrend'
         "init_acceleration_factor": 0.02,
         "acceleration_factor_step": 0.02,
         "max_acceleration_factor": 0.2,
         "period": 2,  # Number of days to look back to ensure PSAR is in proper range
-    }
+    })
     needs_comp: bool = True
     # TODO: Can run PSAR vs other comps
-    valid_comps: list = ['BOOLEAN']
+    valid_comps: Optional[Tuple[str, ...]] = ('BOOLEAN',)
+
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
 
 
 class HURST(BaseModel):
     name: str = "HURST"
-    params: dict = {"period": 10, "minLags": 2, "maxLags": 20}
+    params: dict = FrozenDict({"period": 10, "minLags": 2, "maxLags": 20})
     needs_comp: bool = True
-    valid_comps: list = ["LEVEL"]
+    valid_comps: Optional[Tuple[str, ...]] = ("LEVEL",)
     # param period bound >= 2 and < 1000 for min lags and max lags as well
     # min lags must be less than max lags and both greater than one
 
@@ -685,17 +779,19 @@ class HURST(BaseModel):
             )
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class BOLLINGER(BaseModel):
     name: str = "BOLLINGER"
-    params: dict = {
+    params: dict = FrozenDict({
         "period": 20,
         "numSTD": 2,
         "band": "upper",
         "price_type": "Typical",  # price_type either "High", "Low", "Close", or "Typical"
-    }  # "band" in ["upper", "middle", "lower"]
+    })  # "band" in ["upper", "middle", "lower"]
     needs_comp: bool = True
-    valid_comps: list = ["PRICE", "LEVEL", "SMA", "EMA", "MACD"]
+    valid_comps: Optional[Tuple[str, ...]] = ("PRICE", "LEVEL", "SMA", "EMA", "MACD")
 
     @validator("params")
     def param_key_check(cls, value):
@@ -733,17 +829,19 @@ class BOLLINGER(BaseModel):
             raise ValueError("Band must be 'upper', 'middle', or 'lower'.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class BAND_WIDTH(BaseModel):
     name: str = "BAND_WIDTH"
-    params: dict = {
+    params: dict = FrozenDict({
         "period": 20,
         "numStdDevUpper": 2,
         "numStdDevLower": 2,
         "price_type": "Typical",
-    }  # price_type either "High", "Low", "Close", or "Typical"
+    })  # price_type either "High", "Low", "Close", or "Typical"
     needs_comp: bool = True
-    valid_comps: list = ["PRICE", "LEVEL"]
+    valid_comps: Optional[Tuple[str, ...]] = ("PRICE", "LEVEL")
 
     @validator("params")
     def param_key_check(cls, value):
@@ -780,12 +878,14 @@ class BAND_WIDTH(BaseModel):
             raise ValueError("Price type must be High, Low, Close, or Typical.")
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class DONCHIAN(BaseModel):
     name: str = "DONCHIAN"
-    params: dict = {"period": 20, "channel": "middle"}
+    params: dict = FrozenDict({"period": 20, "channel": "middle"})
     needs_comp: bool = True
-    valid_comps: list = ["PRICE"]
+    valid_comps: Optional[Tuple[str, ...]] = ("PRICE",)
 
     @validator("params")
     def param_key_check(cls, value):
@@ -808,12 +908,14 @@ class DONCHIAN(BaseModel):
 
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class MAD(BaseModel):
     name: str = "MAD"
-    params: dict = {"fastSMA_period": 21, "slowSMA_period": 200}
+    params: dict = FrozenDict({"fastSMA_period": 21, "slowSMA_period": 200})
     needs_comp: bool = True
-    valid_comps: list = ["PRICE", "LEVEL"]
+    valid_comps: Optional[Tuple[str, ...]] = ("PRICE", "LEVEL")
 
     @validator("params")
     def param_key_check(cls, value):
@@ -843,28 +945,34 @@ class MAD(BaseModel):
 
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 # Classes that can be initial POSITION SIZING or Risk Management (position management during rebalance) ============================================="
 
 
 class NoRiskManagement(BaseModel):
     name: str = "NoRiskManagement"
-    params: dict = {}
+    params: dict = FrozenDict({})
+
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
 
 
 class EqualAllocation(BaseModel):
     name: str = "EqualAllocation"
-    params: dict = {}
+    params: dict = FrozenDict({})
+
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
 
 
 class VOLATILITYSizing(BaseModel):
     name: str = "VOLATILITYSizing"
-    params: dict = {
+    params: dict = FrozenDict({
         "period": 256,
         "risk_coefficient": 1,
         "max_position_risk_frac": 0.02,
         "risk_cap": False
-    }
+    })
     # param period bound >= 2 and < 1000 for min lags and max lags as well
     # risk coefficient: (0,10) but not quite 0
     # max_position risk fraction (0,1) do not include 0
@@ -911,21 +1019,25 @@ class VOLATILITYSizing(BaseModel):
         if "risk_cap" not in value.keys():
             warn("Volatility Sizing modules without a risk_cap are deprecated and will not be allowed in the future.",
                 DeprecationWarning, stacklevel=2)
-            value["risk_cap"] = False
+            metrics.deprecated_risk_cap.inc("VOLATILITYSizing")
+            # params may be a read-only FrozenDict
+            value = dict(value, risk_cap=False)
         elif not isinstance(value["risk_cap"], bool):
             raise TypeError("Volatility Sizing risk cap must be boolean.")
 
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class ATRSizing(BaseModel):
     name: str = "ATRSizing"
-    params: dict = {
+    params: dict = FrozenDict({
         "period": 20,
         "risk_coefficient": 2, 
         "max_position_risk_frac": 0.02,
         "risk_cap": False
-        }
+        })
     # param period bound >= 2 and < 1000 for min lags and max lags as well
     # risk coefficient: (0,10) but not quite 0
     # max_position risk fraction (0,1) do not include 0
@@ -970,22 +1082,26 @@ class ATRSizing(BaseModel):
         if "risk_cap" not in value.keys():
             warn("ATR Sizing modules without a risk_cap are deprecated and will not be allowed in the future.",
                 DeprecationWarning, stacklevel=2)
-            value["risk_cap"] = False
+            metrics.deprecated_risk_cap.inc("ATRSizing")
+            # params may be a read-only FrozenDict
+            value = dict(value, risk_cap=False)
         elif not isinstance(value["risk_cap"], bool):
             raise TypeError("ATR Sizing risk cap must be boolean.")
 
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class TurtleUnitSizing(BaseModel):
     name: str = "TurtleUnitSizing"
-    params: dict = {
+    params: dict = FrozenDict({
         "period": 20,  # used to calculate N
         "risk_coefficient": 2,
         "max_position_risk_frac": 0.02,
         "num_turtle_units": 1,
         "risk_cap": False
-    }
+    })
     # param period bound >= 2 and < 1000 for min lags and max lags as well
     # risk coefficient: (0,10) but not quite 0
     # max_position risk fraction (0,1) do not include 0
@@ -1041,16 +1157,20 @@ class TurtleUnitSizing(BaseModel):
         if "risk_cap" not in value.keys():
             warn("Turtle Sizing modules without a risk_cap are deprecated and will not be allowed in the future.",
                 DeprecationWarning, stacklevel=2)
-            value["risk_cap"] = False
+            metrics.deprecated_risk_cap.inc("TurtleUnitSizing")
+            # params may be a read-only FrozenDict
+            value = dict(value, risk_cap=False)
         elif not isinstance(value["risk_cap"], bool):
             raise TypeError("Turtle Sizing risk cap must be boolean.")
         
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
 
 class TurtlePyramiding(BaseModel):
     name: str = "TurtlePyramiding"
-    params: dict = {
+    params: dict = FrozenDict({
         "period": 20,  # used to calculate N
         "risk_coefficient": 2,
         "max_position_risk_frac": 0.02,
@@ -1058,7 +1178,7 @@ class TurtlePyramiding(BaseModel):
         "delta_N_frac": 0.2,
         "stop_price_N_frac": -2.0,
         "risk_cap": False
-    }
+    })
     # param period bound >= 2 and < 1000 for min lags and max lags as well
     # risk coefficient: (0,10) but not quite 0
     # max_position risk fraction (0,1) do not include 0
@@ -1140,12 +1260,104 @@ class TurtlePyramiding(BaseModel):
         if "risk_cap" not in value.keys():
             warn("Turtle Pyramding modules without a risk_cap are deprecated and will not be allowed in the future.",
                 DeprecationWarning, stacklevel=2)
-            value["risk_cap"] = False
+            metrics.deprecated_risk_cap.inc("TurtlePyramiding")
+            # params may be a read-only FrozenDict
+            value = dict(value, risk_cap=False)
         elif not isinstance(value["risk_cap"], bool):
             raise TypeError("Turtle Pyramding risk cap must be boolean.")
         
         return value
 
+    _frozen_params = validator("params", allow_reuse=True)(frozen_params)
+
+
+# COMPARISON COMPATIBILITY ====================================
+
+# Every indicator schema class, including ones that are not (yet) offered
+# in the dropdowns, e.g. BOOLEAN is only used as the comparison for PSAR.
+indicator_classes = (
+    SMA,
+    EMA,
+    MACD,
+    MACD_SIGNAL,
+    RSI,
+    STOP_PRICE,
+    ATR_STOP_PRICE,
+    PRICE,
+    PRICE_WINDOW,
+    ATR,
+    ATRP,
+    LEVEL,
+    BOOLEAN,
+    VOLATILITY,
+    PSAR,
+    HURST,
+    BOLLINGER,
+    BAND_WIDTH,
+    DONCHIAN,
+    MAD,
+)
+
+
+class CompMatrix:
+    """
+    Which indicators may be compared with which.
+
+    Built once from the valid_comps and needs_comp defaults of the indicator
+    classes, so validation never depends on the lists a client sends. Every
+    indicator name gets one bit and each row is an int bitset of the
+    indicators it can be compared with.
+    """
+
+    def __init__(self, klasses):
+        self.names = tuple(klass.__fields__["name"].default for klass in klasses)
+        self.bits = {name: 1 << n for n, name in enumerate(self.names)}
+        self.needs_comp = {}
+        self.masks = {}
+        for klass, name in zip(klasses, self.names):
+            mask = 0
+            for comp in klass.__fields__["valid_comps"].default or []:
+                mask |= self.bits[comp]
+            self.masks[name] = mask
+            self.needs_comp[name] = klass.__fields__["needs_comp"].default
+        self.comps = {
+            name: tuple(comp for comp in self.names if self.masks[name] & self.bits[comp])
+            for name in self.names
+        }
+        self.pairs = tuple(
+            (name, comp) for name in self.names for comp in self.comps[name]
+        )
+
+    def is_valid(self, indicator: str, comp: str) -> bool:
+        """True if comp is a valid comparison indicator for indicator."""
+        return bool(self.masks.get(indicator, 0) & self.bits.get(comp, 0))
+
+    def mask(self, names) -> int:
+        """Bitset of a collection of indicator names, e.g. buy_indicators.values()."""
+        mask = 0
+        for name in names:
+            mask |= self.bits[name]
+        return mask
+
+    def valid_pairs(self, indicators=None, comps=None):
+        """
+        Every legal (indicator, comparison) pair, optionally restricted to
+        the given indicator and comparison names.
+        """
+        if indicators is None and comps is None:
+            return self.pairs
+        indicators = self.names if indicators is None else indicators
+        comp_mask = self.mask(self.names if comps is None else comps)
+        return tuple(
+            (name, comp)
+            for name in indicators
+            for comp in self.comps[name]
+            if comp_mask & self.bits[comp]
+        )
+
+
+comp_matrix = CompMatrix(indicator_classes)
+
 
 # SIGNALS =====================================================
 
@@ -1163,13 +1375,22 @@ class Signal(BaseModel):
 
     @validator("comp_indicator")
     def comp_indicator_check(cls, value, values, **kwargs):
+        # indicator failed its own validation, nothing to compare against
+        if "indicator" not in values:
+            return value
+
+        # needs_comp and valid_comps come from the schema (comp_matrix), not the client
+        name = values["indicator"].get("name")
+        if name not in comp_matrix.bits:
+            raise ValueError(f"{name} is not a recognized indicator.")
+
         # make sure that if the first indicator needs a comparison indicator, that one was provided
-        if value is None and values["indicator"]["needs_comp"]:
+        if value is None and comp_matrix.needs_comp[name]:
             raise ValueError("Indicator chosen needs comparison operator")
 
         # We also make sure that the provided comp indicator is valid to compare with the first indicator
         elif value is not None:
-            if value["name"] not in values["indicator"]["valid_comps"]:
+            if not comp_matrix.is_valid(name, value.get("name")):
                 raise ValueError("invalid comparison indicator chosen for indicator")
         return value
 
@@ -1182,6 +1403,259 @@ class Signal(BaseModel):
     # add check to make sure the dict for indicator and dict for comp_indicator have the same keys as the signal
 
 
+# DATES ==============================================
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> date:
+    """Date of a YYYY-MM-DD string. Strategies share few distinct dates, so they are cached."""
+    try:
+        if len(value) != 10 or value[4] != "-" or value[7] != "-":
+            raise ValueError
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{value} is not a valid date, dates must be YYYY-MM-DD.")
+
+
+class TradeDate(str):
+    """
+    A YYYY-MM-DD date, parsed once when it is validated. It is still the
+    string it was given (so dicts and JSON do not change) but also carries
+    the parsed date, its ordinal and its numpy.datetime64.
+    """
+
+    def __new__(cls, value):
+        if isinstance(value, date):
+            value = value.isoformat()
+        elif not isinstance(value, str):
+            value = str(value)  # e.g. numpy.datetime64
+        self = super().__new__(cls, value)
+        self._date = parse_date(value) if value or not cls._allow_empty else None
+        return self
+
+    _allow_empty = False
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        field_schema.update(type="string", format="date")
+
+    @classmethod
+    def validate(cls, value):
+        if type(value) is cls:
+            return value
+        if not isinstance(value, (str, date)):
+            raise TypeError("Dates must be YYYY-MM-DD strings.")
+        return cls(value)
+
+    def __reduce__(self):
+        return type(self), (str(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def date(self) -> Optional[date]:
+        return self._date
+
+    @property
+    def ordinal(self) -> Optional[int]:
+        return None if self._date is None else self._date.toordinal()
+
+    @property
+    def datetime64(self):
+        import numpy as np
+
+        return np.datetime64("NaT", "D") if self._date is None else np.datetime64(self._date, "D")
+
+
+class OptionalTradeDate(TradeDate):
+    """A TradeDate that may be empty (not set)."""
+
+    _allow_empty = True
+
+
+def check_date_range(start: TradeDate, end: TradeDate):
+    if not start.ordinal < end.ordinal:
+        raise ValueError(f"The start date ({start}) must be before the end date ({end}).")
+
+
+# INSTRUMENTS ========================================
+
+
+max_open_symbols = 100000
+
+
+class SymbolTable:
+    """
+    Interns tickers into dense integer ids (0, 1, 2... in order of first
+    use). A table built from a list of symbols is closed: tickers it does
+    not list are rejected. An open table (no symbols) assigns ids to any
+    ticker, up to max_symbols; its ids are never freed, so a long-running
+    server should load a closed table (see universe.load_symbol_table).
+    """
+
+    def __init__(self, symbols: Optional[List[str]] = None, max_symbols: int = max_open_symbols):
+        self.closed = False
+        self.max_symbols = None
+        self.ids = {}
+        self.symbols = []
+        self._lock = Lock()
+        for symbol in symbols or ():
+            self.intern(symbol)
+        self.closed = symbols is not None
+        self.max_symbols = None if self.closed else max_symbols
+
+    def check(self, symbols: Iterable[str]):
+        """Raise a ValueError if a closed table does not list one of symbols."""
+        if self.closed:
+            for symbol in symbols:
+                if symbol not in self.ids:
+                    raise ValueError(f"{symbol} is not a known instrument.")
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.ids
+
+    def __repr__(self):
+        return f"SymbolTable({len(self)} symbols{', closed' if self.closed else ''})"
+
+    def intern(self, symbol: str) -> int:
+        try:
+            return self.ids[symbol]
+        except KeyError:
+            pass
+        if self.closed:
+            raise ValueError(f"{symbol} is not a known instrument.")
+        with self._lock:
+            if symbol not in self.ids:
+                if self.max_symbols is not None and len(self.symbols) >= self.max_symbols:
+                    raise ValueError(
+                        f"The symbol table is full ({self.max_symbols} symbols), load a closed one."
+                    )
+                self.ids[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            return self.ids[symbol]
+
+    def symbol(self, id: int) -> str:
+        return self.symbols[id]
+
+
+symbol_table = SymbolTable()
+
+
+def set_symbol_table(table: SymbolTable):
+    """Validate instruments against table from now on."""
+    global symbol_table
+    symbol_table = table
+
+
+class Instruments(list):
+    """
+    A list of tickers, checked against the symbol table when it is
+    validated. It is still a plain list of strings to dicts and JSON, but
+    also carries the sorted unique ids of its tickers and their bitset (bit
+    i is set for id i), so instrument sets compare with integer operations.
+    Tickers are only interned the first time the ids are asked for, so
+    validating user input does not grow an open table.
+    """
+
+    def __init__(self, symbols=()):
+        super().__init__(symbols)
+        self._interned = None
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        field_schema.update(type="array", items={"type": "string"})
+
+    @classmethod
+    def validate(cls, value):
+        if isinstance(value, FrozenInstruments) and cls is FrozenInstruments:
+            return value
+        if isinstance(value, Instruments):
+            # already checked; a copy (keeping its ids) so that two models
+            # never share one list
+            out = cls(value)
+            out._interned = value._interned
+            return out
+        if not isinstance(value, (list, tuple)):
+            raise TypeError("Instruments must be a list of tickers.")
+        symbols = []
+        for symbol in value:
+            if isinstance(symbol, (int, float)) and not isinstance(symbol, bool):
+                symbol = str(symbol)
+            if not isinstance(symbol, str):
+                raise TypeError("Instruments must be a list of tickers.")
+            symbols.append(symbol)
+        symbol_table.check(symbols)
+        return cls(symbols)
+
+    def __reduce__(self):
+        # ids are only meaningful in the process that interned them
+        return type(self), (list(self),)
+
+    def _intern(self):
+        table = symbol_table
+        key = tuple(self)
+        if self._interned is None or self._interned[0] is not table or self._interned[1] != key:
+            ids = tuple(sorted({table.intern(symbol) for symbol in key}))
+            mask = 0
+            for id in ids:
+                mask |= 1 << id
+            self._interned = (table, key, ids, mask)
+        return self._interned
+
+    @property
+    def ids(self) -> tuple:
+        """Sorted unique ids of the tickers."""
+        return self._intern()[2]
+
+    @property
+    def mask(self) -> int:
+        return self._intern()[3]
+
+    def overlaps(self, other: "Instruments") -> bool:
+        return bool(self.mask & other.mask)
+
+
+class FrozenInstruments(Instruments):
+    """Instruments that cannot be changed, for shared models (see frozen.py)."""
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __iadd__ = _readonly
+    __imul__ = _readonly
+    append = _readonly
+    extend = _readonly
+    insert = _readonly
+    remove = _readonly
+    pop = _readonly
+    clear = _readonly
+    sort = _readonly
+    reverse = _readonly
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
 #  STRATEGY ==============================================
 
 
@@ -1216,10 +1690,10 @@ class StrategySettings(BaseModel):
     """
 
     account_size: float
-    init_date: str = ""
-    start_date: str = "2010-01-01"
-    end_date: str = "2015-12-31"
-    instruments: List[str]
+    init_date: OptionalTradeDate = OptionalTradeDate("")
+    start_date: TradeDate = TradeDate("2010-01-01")
+    end_date: TradeDate = TradeDate("2015-12-31")
+    instruments: Instruments
     trade_days: List[str] = ["mon", "tue", "wed", "thu", "fri"]
     trade_frequency: int = 1
     position_sizing_strategy: dict = {"name": "EqualAllocation", "params": {}}
@@ -1235,6 +1709,15 @@ class StrategySettings(BaseModel):
             raise TypeError("Trade frequency must be a positive integer.")
         return value
 
+    @validator("end_date")
+    def date_range_check(cls, value, values):
+        if "start_date" in values:
+            check_date_range(values["start_date"], value)
+        init_date = values.get("init_date")
+        if init_date and init_date.ordinal > value.ordinal:
+            raise ValueError(f"The init date ({init_date}) must not be after the end date ({value}).")
+        return value
+
     @validator("instruments")  # make sure this list is not empty
     def instruments_check(cls, value):
         if len(value) == 0:
@@ -1264,17 +1747,52 @@ class CompleteStrategy(BaseModel):
     buy_signals: BuySignals
     sell_signals: SellSignals
     email: str
+    schema_version: int = 0
+
+    @validator("schema_version")
+    def schema_version_check(cls, value):
+        if not 0 <= value <= SCHEMA_VERSION:
+            raise ValueError(
+                f"Schema version {value} is not supported, the current version is {SCHEMA_VERSION}."
+            )
+        return value
 
 
 ## other classes that are used to make API calls
 class PricePlot(BaseModel):
     instr: str = "GE"
-    start_date: str = "2015-03-01"
-    end_date: str = "2017-06-04"
+    start_date: TradeDate = TradeDate("2015-03-01")
+    end_date: TradeDate = TradeDate("2017-06-04")
+    points: Optional[int] = None  # None returns every bar
+    method: str = "lttb"  # see downsample.py
+
+    @validator("end_date")
+    def date_range_check(cls, value, values):
+        if "start_date" in values:
+            check_date_range(values["start_date"], value)
+        return value
+
+    @validator("points")
+    def points_check(cls, value):
+        if value is not None and (not isinstance(value, int) or not value >= 3):
+            raise TypeError("Plot points must be an integer >= 3.")
+        return value
+
+    @validator("method")
+    def method_check(cls, value):
+        if value not in downsample_methods:
+            raise ValueError(f"Downsampling method must be one of {list(downsample_methods)}.")
+        return value
 
 
 class BuyAndHold(BaseModel):
-    instr_list: List[str] = ["GE"]
+    instr_list: Instruments = Instruments(["GE"])
     account_size: int = 100000
-    start_date: str = "2015-03-01"
-    end_date: str = "2017-06-04"
+    start_date: TradeDate = TradeDate("2015-03-01")
+    end_date: TradeDate = TradeDate("2017-06-04")
+
+    @validator("end_date")
+    def date_range_check(cls, value, values):
+        if "start_date" in values:
+            check_date_range(values["start_date"], value)
+        return value
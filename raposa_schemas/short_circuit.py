@@ -0,0 +1,333 @@
+# coding: utf-8
+
+"""
+Short-circuit evaluation of a SignalPlan (see signal_plan.py). The signals
+of a side are ANDed, so once the cheap ones are False on a bar the
+expensive ones do not need to be computed there.
+Requires numpy: pip install raposa-schemas[numpy]
+
+Each node gets a cost estimate from its kind and params (per bar, roughly
+in elementwise operations). The signals of a side are evaluated cheapest
+first, each one only where the previous ones held:
+
+    buy, sell = evaluate_short_circuit(plan, prices)
+
+Window indicators (SMA, rolling deviations, PRICE_WINDOW, DONCHIAN,
+BOLLINGER, HURST...) are computed only on the bars that are still live.
+Recursive ones (EMA, RSI, ATR, PSAR) depend on every earlier bar, so they
+are always computed in full, which their cost reflects.
+
+In streaming mode bars come one at a time:
+
+    stream = StreamingSignals(plan)
+    for bar in bars:  # {"High": ..., "Low": ..., "Close": ...}
+        buy, sell = stream.update(bar)
+
+Recursive state is updated on every bar (it is O(1)) and window buffers
+are appended to, but the window reductions behind a signal are skipped on
+bars where the cheaper signals already failed.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from raposa_schemas.indicators import IndicatorEngine, Node, PsarTracker, hurst
+from raposa_schemas.signal_plan import Comparison, SignalPlan, node_inputs, relation_ufuncs
+
+# kinds of nodes computed over a trailing window of their input
+window_kinds = ("sma", "std", "max", "min", "hurst")
+# kinds of nodes that depend on every earlier bar
+recursive_kinds = ("ema", "wilder", "rsi", "psar")
+_binary_ufuncs = {"add": np.add, "sub": np.subtract, "mul": np.multiply, "div": np.divide}
+_reductions = {"sma": np.mean, "std": np.std, "max": np.max, "min": np.min}
+
+# cost per bar of one step of a Python loop, relative to one elementwise operation
+loop_cost = 20
+
+
+def node_cost(node: Node) -> float:
+    """Estimated cost per bar of computing a node from its inputs."""
+    kind = node[0]
+    if kind in ("column", "constant"):
+        return 0
+    if kind in ("sma", "std", "max", "min"):
+        return node[2]
+    if kind == "hurst":
+        _, _, window, min_lags, max_lags = node
+        return 2 * window * (max_lags - min_lags)
+    if kind == "psar":
+        return 2 * loop_cost
+    if kind in recursive_kinds:
+        return loop_cost
+    return 1
+
+
+def _dag(node: Node, out: Dict[Node, None]):
+    if node not in out:
+        for child in node_inputs(node):
+            _dag(child, out)
+        out[node] = None
+
+
+def comparison_nodes(comparison: Comparison) -> Tuple[Node, ...]:
+    out: Dict[Node, None] = {}
+    _dag(comparison.left, out)
+    if comparison.right is not None:
+        _dag(comparison.right, out)
+    return tuple(out)
+
+
+def order_by_cost(comparisons: Iterable[Comparison], computed=()) -> Tuple[Comparison, ...]:
+    """
+    Comparisons cheapest first. A comparison costs the nodes it needs that
+    no earlier comparison (or computed) already provides.
+    """
+    remaining = list(comparisons)
+    done = set(computed)
+    ordered = []
+    while remaining:
+        costs = [
+            sum(node_cost(node) for node in comparison_nodes(c) if node not in done)
+            for c in remaining
+        ]
+        best = remaining.pop(int(np.argmin(costs)))
+        done.update(comparison_nodes(best))
+        ordered.append(best)
+    return tuple(ordered)
+
+
+def _windows_at(x: np.ndarray, n: int, rows: np.ndarray, cols: tuple):
+    """Windows of n values of x ending at the given bars (rows >= n - 1)."""
+    return sliding_window_view(x, n, axis=0)[(rows - n + 1,) + cols]
+
+
+class _LiveEvaluator:
+    """Values of nodes at some positions, window nodes computed only there."""
+
+    def __init__(self, engine: IndicatorEngine):
+        self.engine = engine
+
+    def values(self, node: Node, pos: tuple) -> np.ndarray:
+        kind = node[0]
+        if node in self.engine:
+            return self.engine.node(node)[pos]
+        if kind in window_kinds:
+            return self._window(node, pos)
+        if kind == "scale":
+            return self.values(node[1], pos) * node[2]
+        if kind in _binary_ufuncs:
+            return _binary_ufuncs[kind](self.values(node[1], pos), self.values(node[2], pos))
+        return self.engine.node(node)[pos]
+
+    def _window(self, node: Node, pos: tuple) -> np.ndarray:
+        rows, cols = pos[0], pos[1:]
+        out = np.full(len(rows), np.nan)
+        x = self.engine.node(node[1])
+        if node[0] == "hurst":
+            _, _, window, min_lags, max_lags = node
+            valid = rows >= window - 1
+            if valid.any():
+                lags = np.arange(min_lags, max_lags)
+                log_lags = np.log(lags) - np.log(lags).mean()
+                log_x = np.log(x)
+                slope = 0.0
+                for lag, weight in zip(lags, log_lags):
+                    diffs = log_x[lag:] - log_x[:-lag]
+                    tau = _windows_at(diffs, window - lag, rows[valid] - lag,
+                        tuple(c[valid] for c in cols)).std(axis=-1)
+                    with np.errstate(divide="ignore"):
+                        slope = slope + weight * np.log(tau)
+                out[valid] = slope / (log_lags ** 2).sum()
+            return out
+        n = node[2]
+        valid = rows >= n - 1
+        if valid.any():
+            windows = _windows_at(x, n, rows[valid], tuple(c[valid] for c in cols))
+            out[valid] = _reductions[node[0]](windows, axis=-1)
+        return out
+
+
+def _evaluate_side(evaluator: _LiveEvaluator, comparisons, out: np.ndarray) -> np.ndarray:
+    out[...] = bool(comparisons)
+    for comparison in comparisons:
+        pos = np.nonzero(out)
+        if not len(pos[0]):
+            break
+        left = evaluator.values(comparison.left, pos)
+        if comparison.right is None:
+            holds = left != 0
+        else:
+            holds = relation_ufuncs[comparison.rel](left, evaluator.values(comparison.right, pos))
+        out[pos] = holds
+    return out
+
+
+def evaluate_short_circuit(
+    plan: SignalPlan,
+    prices: Union[IndicatorEngine, dict],
+    out: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Same masks as plan.evaluate(prices), skipping work on dead bars."""
+    engine = prices if isinstance(prices, IndicatorEngine) else IndicatorEngine(prices)
+    if out is None:
+        out = (np.empty(engine.shape, dtype=bool), np.empty(engine.shape, dtype=bool))
+    evaluator = _LiveEvaluator(engine)
+    return (
+        _evaluate_side(evaluator, order_by_cost(plan.buy), out[0]),
+        _evaluate_side(evaluator, order_by_cost(plan.sell), out[1]),
+    )
+
+
+class _Smoothed:
+    """Streaming version of indicators.smoothed."""
+
+    def __init__(self, n: int, alpha: float):
+        self.n, self.alpha = n, alpha
+        self.seed = []
+        self.value = np.nan
+
+    def update(self, x):
+        if self.seed is not None:
+            if np.isnan(x).any():
+                return self.value
+            self.seed.append(x)
+            if len(self.seed) == self.n:
+                self.value = np.mean(self.seed, axis=0)
+                self.seed = None
+            return self.value
+        self.value = self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+class StreamingSignals:
+    """
+    A SignalPlan evaluated one bar at a time. computed counts how often
+    each window node was reduced, for checking how much was skipped.
+    """
+
+    def __init__(self, plan: SignalPlan):
+        self.plan = plan
+        self.buy = order_by_cost(plan.buy)
+        self.sell = order_by_cost(plan.sell)
+        self.bars = 0
+        self.computed: Dict[Node, int] = {node: 0 for node in plan.nodes if node[0] in window_kinds}
+        self._state: Dict[Node, object] = {}
+        for node in plan.nodes:
+            kind = node[0]
+            if kind in ("sma", "std", "max", "min"):
+                self._state[node] = deque(maxlen=node[2])
+            elif kind == "hurst":
+                self._state[node] = deque(maxlen=node[2])
+            elif kind in ("ema", "wilder"):
+                n = node[2]
+                self._state[node] = _Smoothed(n, 2.0 / (n + 1) if kind == "ema" else 1.0 / n)
+            elif kind == "rsi":
+                self._state[node] = [None, _Smoothed(node[2], 1.0 / node[2]), _Smoothed(node[2], 1.0 / node[2])]
+            elif kind == "psar":
+                self._state[node] = [None, deque(maxlen=node[7])]
+            elif kind in ("true_range", "log_return"):
+                self._state[node] = None  # the previous close
+        # nodes whose state moves on every bar, inputs first
+        self._stateful = tuple(node for node in plan.nodes if node in self._state)
+
+    def _value(self, node: Node):
+        if node in self._values:
+            return self._values[node]
+        kind = node[0]
+        if kind == "column":
+            value = np.asarray(self._bar[node[1]], dtype=float)
+        elif kind == "constant":
+            value = node[1]
+        elif kind == "typical":
+            value = (self._value(node[1]) + self._value(node[2]) + self._value(node[3])) / 3
+        elif kind == "scale":
+            value = self._value(node[1]) * node[2]
+        elif kind in ("add", "sub", "mul", "div"):
+            a, b = self._value(node[1]), self._value(node[2])
+            value = _binary_ufuncs[kind](a, b)
+        elif kind in ("sma", "std", "max", "min"):
+            window = self._state[node]
+            self.computed[node] += 1
+            if len(window) < window.maxlen:
+                value = np.nan
+            else:
+                value = _reductions[kind](np.array(window), axis=0)
+        elif kind == "hurst":
+            window = self._state[node]
+            self.computed[node] += 1
+            if len(window) < window.maxlen:
+                value = np.nan
+            else:
+                value = hurst(np.array(window), node[2], node[3], node[4])[-1]
+        else:
+            raise KeyError(f"{node} was not updated on this bar.")
+        self._values[node] = value
+        return value
+
+    def _update(self, node: Node):
+        kind = node[0]
+        state = self._state[node]
+        if kind in ("sma", "std", "max", "min", "hurst"):
+            state.append(self._value(node[1]))
+            return
+        if kind in ("ema", "wilder"):
+            value = state.update(self._value(node[1]))
+        elif kind == "true_range":
+            high, low, close = (self._value(child) for child in node[1:])
+            value = high - low
+            if state is not None:
+                value = np.maximum(np.maximum(value, np.abs(high - state)), np.abs(low - state))
+            self._state[node] = close
+        elif kind == "log_return":
+            close = self._value(node[1])
+            value = np.nan if state is None else np.log(close / state)
+            self._state[node] = close
+        elif kind == "rsi":
+            close = self._value(node[1])
+            prev, gains, losses = state
+            change = np.nan if prev is None else close - prev
+            state[0] = close
+            gain = gains.update(np.where(change > 0, change, 0.0) if prev is not None else np.nan * close)
+            loss = losses.update(np.where(change < 0, -change, 0.0) if prev is not None else np.nan * close)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                value = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+            value = np.where(np.isnan(gain) | np.isnan(loss), np.nan, value)
+        elif kind == "psar":
+            _, high_node, low_node, up, init_af, step, max_af, period = node
+            high, low = np.atleast_1d(self._value(high_node)), np.atleast_1d(self._value(low_node))
+            if state[0] is None:
+                state[0] = [PsarTracker(init_af, step, max_af) for _ in high]
+            wanted = 1 if up else -1
+            state[1].append([tracker.update(h, l) == wanted for tracker, h, l in zip(state[0], high, low)])
+            if self.bars < 2 or len(state[1]) < period:
+                value = np.full(high.shape, np.nan)
+            else:
+                value = np.max(np.array(state[1], dtype=float), axis=0)
+            value = value.reshape(np.shape(self._value(high_node)))
+        self._values[node] = value
+
+    def _side(self, comparisons, shape) -> np.ndarray:
+        live = np.full(shape, bool(comparisons))
+        for comparison in comparisons:
+            if not live.any():
+                break
+            left = self._value(comparison.left)
+            if comparison.right is None:
+                holds = np.not_equal(left, 0)
+            else:
+                holds = relation_ufuncs[comparison.rel](left, self._value(comparison.right))
+            live &= holds
+        return live
+
+    def update(self, bar: Mapping[str, Union[float, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Buy and sell signals on a new bar (column -> price or prices)."""
+        self.bars += 1
+        self._bar = bar
+        self._values: Dict[Node, object] = {}
+        for node in self._stateful:
+            self._update(node)
+        shape = np.shape(next(iter(bar.values())))
+        return self._side(self.buy, shape), self._side(self.sell, shape)
@@ -0,0 +1,156 @@
+# coding: utf-8
+
+"""
+Compiles a strategy's BuySignals and SellSignals into one evaluation plan.
+Requires numpy: pip install raposa-schemas[numpy]
+
+Every indicator becomes a node of the IndicatorEngine (see indicators.py),
+so the inputs signals have in common - Typical price, True Range, moving
+averages and deviations of the same series - are computed once for both
+sides. The comparisons of a side are then fused: each one is written
+straight into a preallocated mask, ANDed into the side's output in place,
+so evaluating a plan allocates no temporary boolean arrays.
+
+    plan = compile_strategy(strategy)
+    plan.nodes  # every series the plan needs, inputs first
+    buy, sell = plan.evaluate(prices)  # bool arrays shaped like the prices
+
+A bar is True on a side when all of its signals hold. Comparisons during an
+indicator's warm-up (NaN) are False.
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from raposa_schemas import schemas
+from raposa_schemas.indicators import IndicatorEngine, Node, indicator_node
+
+relation_ufuncs = {
+    "geq": np.greater_equal,
+    "leq": np.less_equal,
+    "gt": np.greater,
+    "lt": np.less,
+    "eq": np.equal,
+}
+
+sides = ("buy_signals", "sell_signals")
+
+
+class Comparison(NamedTuple):
+    """One Signal: left rel right. right is None for a lone LEVEL."""
+
+    left: Node
+    rel: str
+    right: Optional[Node]
+    short: bool = False
+
+
+def _field(value, key, default=None):
+    if isinstance(value, dict):
+        return value.get(key, default)
+    return getattr(value, key, default)
+
+
+def compile_signal(signal: Union[schemas.Signal, dict]) -> Comparison:
+    comp = _field(signal, "comp_indicator")
+    return Comparison(
+        indicator_node(_field(signal, "indicator")),
+        _field(signal, "rel", "leq"),
+        None if comp is None else indicator_node(comp),
+        bool(_field(signal, "short", False)),
+    )
+
+
+def node_inputs(node: Node) -> Tuple[Node, ...]:
+    """The nodes a node is computed from."""
+    return tuple(part for part in node[1:] if isinstance(part, tuple) and part and isinstance(part[0], str))
+
+
+def _add_node(node: Node, order: Dict[Node, None]):
+    if node in order:
+        return
+    for child in node_inputs(node):
+        _add_node(child, order)
+    order[node] = None
+
+
+class SignalPlan:
+    """The comparisons of both sides of a strategy over shared nodes."""
+
+    def __init__(self, buy: Tuple[Comparison, ...], sell: Tuple[Comparison, ...]):
+        # a comparison repeated on one side only needs to be evaluated once
+        self.buy = tuple(dict.fromkeys(buy))
+        self.sell = tuple(dict.fromkeys(sell))
+        order: Dict[Node, None] = {}
+        for comparison in self.buy + self.sell:
+            _add_node(comparison.left, order)
+            if comparison.right is not None:
+                _add_node(comparison.right, order)
+        self.nodes: Tuple[Node, ...] = tuple(order)
+        self._scratch: Dict[tuple, np.ndarray] = {}
+
+    def __repr__(self):
+        return f"SignalPlan({len(self.buy)} buy, {len(self.sell)} sell, {len(self.nodes)} nodes)"
+
+    def _buffer(self, shape) -> np.ndarray:
+        if shape not in self._scratch:
+            self._scratch[shape] = np.empty(shape, dtype=bool)
+        return self._scratch[shape]
+
+    def _evaluate_side(self, engine: IndicatorEngine, comparisons, out: np.ndarray) -> np.ndarray:
+        if not comparisons:
+            out[...] = False
+            return out
+        scratch = self._buffer(out.shape)
+        for n, comparison in enumerate(comparisons):
+            target = out if n == 0 else scratch
+            left = engine.node(comparison.left)
+            if comparison.right is None:
+                # a lone LEVEL, which is a positive constant
+                np.not_equal(left, 0, out=target)
+            else:
+                relation_ufuncs[comparison.rel](left, engine.node(comparison.right), out=target)
+            if n:
+                np.logical_and(out, scratch, out=out)
+        return out
+
+    def evaluate(
+        self,
+        prices: Union[IndicatorEngine, dict],
+        out: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Buy and sell masks over prices (or an IndicatorEngine, to share its
+        nodes with other plans). Pass out to reuse the masks of a previous
+        evaluation.
+        """
+        engine = prices if isinstance(prices, IndicatorEngine) else IndicatorEngine(prices)
+        for node in self.nodes:
+            engine.node(node)
+        if out is None:
+            out = (np.empty(engine.shape, dtype=bool), np.empty(engine.shape, dtype=bool))
+        return (
+            self._evaluate_side(engine, self.buy, out[0]),
+            self._evaluate_side(engine, self.sell, out[1]),
+        )
+
+
+def _signal_list(signals) -> list:
+    if signals is None:
+        return []
+    return list(_field(signals, "signals"))
+
+
+def compile_signals(
+    buy_signals: Union[schemas.BuySignals, dict, None],
+    sell_signals: Union[schemas.SellSignals, dict, None] = None,
+) -> SignalPlan:
+    return SignalPlan(
+        tuple(compile_signal(signal) for signal in _signal_list(buy_signals)),
+        tuple(compile_signal(signal) for signal in _signal_list(sell_signals)),
+    )
+
+
+def compile_strategy(strategy: Union[schemas.CompleteStrategy, dict]) -> SignalPlan:
+    return compile_signals(*(_field(strategy, side) for side in sides))
@@ -0,0 +1,216 @@
+# coding: utf-8
+
+"""
+Enumerates every structurally valid BuySignals/SellSignals configuration.
+
+A structure is the choice of indicators, comparison indicators and
+relations for up to max_signals signals; params are left at the schema
+defaults for the optimizer to fill in. Only legal (indicator, comparison)
+pairs from schemas.comp_matrix are produced, and structures that only
+differ by how they are written are produced once:
+    - signals are ANDed together, so their order does not matter
+    - "SMA < EMA" is the same signal as "EMA > SMA"
+
+The space is ranked, so it can be split into contiguous shards without
+walking the skipped part:
+
+    space = SignalSpace.buy()
+    print(len(space))
+    for buy_signals in space.shard(i, n):
+        ...
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from raposa_schemas import registry, schemas
+
+# relation -> relation with the two indicators swapped
+mirrored_relations = {"geq": "leq", "leq": "geq", "gt": "lt", "lt": "gt", "eq": "eq"}
+
+# (indicator name, comparison indicator name or None, relation)
+SignalStructure = Tuple[str, Optional[str], str]
+
+
+def _n_choose_k(n: int, k: int) -> int:
+    if k < 0 or k > n:
+        return 0
+    out = 1
+    for i in range(k):
+        out = out * (n - i) // (i + 1)
+    return out
+
+
+def _unrank(rank: int, n: int, k: int) -> List[int]:
+    """rank-th k-combination of range(n) in lexicographic order"""
+    combo = []
+    x = 0
+    for i in range(k, 0, -1):
+        while True:
+            count = _n_choose_k(n - x - 1, i - 1)
+            if rank < count:
+                break
+            rank -= count
+            x += 1
+        combo.append(x)
+        x += 1
+    return combo
+
+
+def _advance(combo: List[int], n: int) -> bool:
+    """Step combo to the next k-combination in place, False when exhausted"""
+    k = len(combo)
+    i = k - 1
+    while i >= 0 and combo[i] == n - k + i:
+        i -= 1
+    if i < 0:
+        return False
+    combo[i] += 1
+    for j in range(i + 1, k):
+        combo[j] = combo[j - 1] + 1
+    return True
+
+
+def indicator_dict(name: str) -> dict:
+    """Fresh indicator dict for name with the schema defaults."""
+    info = registry.INFO_BY_NAME[name]
+    return {
+        "name": name,
+        "params": dict(info.default_params),
+        "needs_comp": info.needs_comp,
+        "valid_comps": list(info.valid_comps) if info.valid_comps else None,
+    }
+
+
+class SignalSpace:
+    """
+    All valid signal structures for one side (buy or sell) of a strategy.
+
+    indicators: names (or a label -> name dict such as buy_indicators) the
+        signal's first indicator can be drawn from.
+    max_signals: largest number of signals in a structure.
+    relations: allowed relations, defaults to every value of relations.
+    """
+
+    def __init__(
+        self,
+        indicators: Union[Dict[str, str], Iterable[str]],
+        max_signals: int = schemas.max_signals,
+        relations: Optional[Iterable[str]] = None,
+        model=None,
+    ):
+        if isinstance(indicators, dict):
+            indicators = indicators.values()
+        self.indicators = tuple(dict.fromkeys(indicators))
+        self.relations = tuple(
+            schemas.relations.values() if relations is None else relations
+        )
+        self.max_signals = max_signals
+        self.model = model
+        for name in self.indicators:
+            if name not in schemas.comp_matrix.bits:
+                raise ValueError(f"{name} is not a recognized indicator.")
+        for rel in self.relations:
+            if rel not in mirrored_relations:
+                raise ValueError(f"{rel} is not a recognized relation.")
+        self.signals = self._canonical_signals()
+        self._block_sizes = [
+            _n_choose_k(len(self.signals), k) for k in range(1, max_signals + 1)
+        ]
+        self.size = sum(self._block_sizes)
+
+    @classmethod
+    def buy(cls, **kwargs) -> "SignalSpace":
+        return cls(schemas.buy_indicators, model=schemas.BuySignals, **kwargs)
+
+    @classmethod
+    def sell(cls, **kwargs) -> "SignalSpace":
+        return cls(schemas.sell_indicators, model=schemas.SellSignals, **kwargs)
+
+    def _canonical_signals(self) -> Tuple[SignalStructure, ...]:
+        matrix = schemas.comp_matrix
+        drawable = matrix.mask(self.indicators)
+        order = {name: n for n, name in enumerate(matrix.names)}
+        rel_order = {rel: n for n, rel in enumerate(mirrored_relations)}
+
+        def key(signal):
+            return order[signal[0]], order[signal[1]], rel_order[signal[2]]
+
+        signals = []
+        for name in self.indicators:
+            if not matrix.needs_comp[name]:
+                # the relation means nothing without a comparison
+                signals.append((name, None, self.relations[0]))
+                continue
+            for comp in matrix.comps[name]:
+                for rel in self.relations:
+                    signal = (name, comp, rel)
+                    mirror = (comp, name, mirrored_relations[rel])
+                    if (
+                        drawable & matrix.bits[comp]
+                        and matrix.is_valid(comp, name)
+                        and mirror[2] in self.relations
+                        and key(mirror) < key(signal)
+                    ):
+                        continue
+                    signals.append(signal)
+        return tuple(signals)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator:
+        return self.iter_range(0, self.size)
+
+    def shard_range(self, i: int, n: int) -> Tuple[int, int]:
+        """[start, stop) ranks of shard i of n"""
+        if not 0 <= i < n:
+            raise ValueError(f"Shard {i} does not exist, there are {n} shards.")
+        return i * self.size // n, (i + 1) * self.size // n
+
+    def shard(self, i: int, n: int, as_dict: bool = True) -> Iterator:
+        """Structures in shard i of n. Every structure is in exactly one shard."""
+        start, stop = self.shard_range(i, n)
+        return self.iter_range(start, stop, as_dict)
+
+    def structures(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[SignalStructure, ...]]:
+        """Raw structures (tuples of signal triples) with ranks in [start, stop)"""
+        stop = self.size if stop is None else min(stop, self.size)
+        n = len(self.signals)
+        rank = 0
+        for k, block_size in enumerate(self._block_sizes, start=1):
+            if start >= rank + block_size:
+                rank += block_size
+                continue
+            if rank >= stop:
+                return
+            first = max(start - rank, 0)
+            combo = _unrank(first, n, k)
+            for _ in range(first, min(block_size, stop - rank)):
+                yield tuple(self.signals[x] for x in combo)
+                _advance(combo, n)
+            rank += block_size
+
+    def iter_range(self, start: int = 0, stop: Optional[int] = None, as_dict: bool = True) -> Iterator:
+        """
+        Structures with ranks in [start, stop) as {"signals": [...]} dicts,
+        or as BuySignals/SellSignals models if as_dict is False.
+        """
+        for structure in self.structures(start, stop):
+            out = self.to_dict(structure)
+            if not as_dict:
+                out = (self.model or schemas.BuySignals)(**out)
+            yield out
+
+    @staticmethod
+    def to_dict(structure: Tuple[SignalStructure, ...]) -> dict:
+        signals = []
+        for name, comp, rel in structure:
+            signals.append(
+                {
+                    "rel": rel,
+                    "short": False,
+                    "indicator": indicator_dict(name),
+                    "comp_indicator": None if comp is None else indicator_dict(comp),
+                }
+            )
+        return {"signals": signals}
@@ -0,0 +1,148 @@
+# coding: utf-8
+
+"""
+Things the back-end needs to know about a CompleteStrategy before running it:
+its fingerprint, how much warm-up data it needs, which indicators it has to
+compute and which price columns they read.
+
+Everything accepts a CompleteStrategy or its dict.
+"""
+
+import hashlib
+import json
+from typing import NamedTuple, Tuple, Union
+
+from raposa_schemas import migrations, registry, schemas
+
+# Indicator keys that the schema derives itself (see comp_matrix), so they
+# do not change what a strategy does.
+derived_indicator_keys = ("needs_comp", "valid_comps")
+
+
+class IndicatorSpec(NamedTuple):
+    """One indicator (or sizing) computation a strategy needs."""
+
+    name: str
+    params: Tuple[Tuple[str, object], ...]
+    lookback: int
+    price_columns: Tuple[str, ...]
+
+    @property
+    def key(self):
+        return self.name, self.params
+
+
+def as_dict(strategy: Union[schemas.CompleteStrategy, dict]) -> dict:
+    """The dict of a strategy, as is if it already is one."""
+    if isinstance(strategy, dict):
+        return strategy
+    return strategy.dict()
+
+
+def _indicator_key(indicator: dict) -> dict:
+    return {k: v for k, v in indicator.items() if k not in derived_indicator_keys}
+
+
+def _signal_key(signal: dict) -> dict:
+    out = dict(signal)
+    out["indicator"] = _indicator_key(signal["indicator"])
+    if signal.get("comp_indicator") is not None:
+        out["comp_indicator"] = _indicator_key(signal["comp_indicator"])
+    return out
+
+
+def _canonical_signals(signals: dict) -> list:
+    # signals are ANDed together so their order does not matter
+    return sorted(
+        (_signal_key(signal) for signal in signals["signals"]),
+        key=lambda signal: json.dumps(signal, sort_keys=True, default=str),
+    )
+
+
+def _normalize_numbers(value):
+    # 5000 and 5000.0 describe the same strategy
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: _normalize_numbers(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize_numbers(item) for item in value]
+    return value
+
+
+def canonical_form(strategy: Union[schemas.CompleteStrategy, dict]) -> dict:
+    """
+    The parts of a strategy that change its backtest, in a fixed order.
+    email, schema_version, signal order, instrument order and the derived
+    indicator keys are left out. Dicts are upgraded (see migrations.py) and
+    validated first so that defaults are filled in.
+    """
+    if isinstance(strategy, dict):
+        strategy = migrations.validate(strategy)
+    strategy = _normalize_numbers(strategy.dict())
+    settings = dict(strategy["strategy_settings"])
+    settings["instruments"] = sorted(settings["instruments"])
+    for key in ("trade_days", "rebalance_days"):
+        if key in settings:
+            settings[key] = sorted(settings[key])
+    return {
+        "strategy_settings": settings,
+        "buy_signals": _canonical_signals(strategy["buy_signals"]),
+        "sell_signals": _canonical_signals(strategy["sell_signals"]),
+    }
+
+
+def fingerprint(strategy: Union[schemas.CompleteStrategy, dict]) -> str:
+    """sha256 hex digest of the canonical form of a strategy."""
+    canonical = json.dumps(
+        canonical_form(strategy), sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _spec(schema: dict) -> IndicatorSpec:
+    params = schema.get("params") or {}
+    return IndicatorSpec(
+        name=schema["name"],
+        params=tuple(params.items()),
+        lookback=registry.lookback(schema),
+        price_columns=registry.price_columns(schema),
+    )
+
+
+def indicator_plan(strategy: Union[schemas.CompleteStrategy, dict]) -> Tuple[IndicatorSpec, ...]:
+    """
+    Every distinct indicator computation a strategy needs, in order of first
+    use: buy signals, sell signals, then position sizing and management.
+    An indicator used by several signals is only listed once.
+    """
+    strategy = as_dict(strategy)
+    schemas_used = []
+    for side in ("buy_signals", "sell_signals"):
+        for signal in strategy[side]["signals"]:
+            schemas_used.append(signal["indicator"])
+            if signal.get("comp_indicator") is not None:
+                schemas_used.append(signal["comp_indicator"])
+    settings = strategy["strategy_settings"]
+    for key in ("position_sizing_strategy", "position_management_strategy"):
+        if settings.get(key):
+            schemas_used.append(settings[key])
+
+    plan = {}
+    for schema in schemas_used:
+        spec = _spec(schema)
+        plan.setdefault(spec.key, spec)
+    return tuple(plan.values())
+
+
+def required_lookback(strategy: Union[schemas.CompleteStrategy, dict]) -> int:
+    """Bars of warm-up data needed before start_date."""
+    return max((spec.lookback for spec in indicator_plan(strategy)), default=0)
+
+
+def required_price_columns(strategy: Union[schemas.CompleteStrategy, dict]) -> Tuple[str, ...]:
+    """Price columns read by any indicator in the strategy, plus Close for fills."""
+    columns = {"Close"}
+    for spec in indicator_plan(strategy):
+        columns.update(spec.price_columns)
+    return tuple(column for column in ("Open", "High", "Low", "Close", "Volume") if column in columns)
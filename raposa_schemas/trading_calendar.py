@@ -0,0 +1,87 @@
+# coding: utf-8
+
+"""
+Trading calendars: the sorted trading days of a market, with binary search
+from a date to its bar index so that slicing prices by the dates of a
+validated strategy is integer arithmetic.
+
+    calendar = TradingCalendar.weekdays("2000-01-01", "2030-12-31", holidays)
+    bars = calendar.bars(strategy.strategy_settings)  # slice into the price arrays
+    calendar.shift("2019-01-02", -200)  # 200 trading days earlier
+
+Days can be given as YYYY-MM-DD strings, dates, TradeDates or ordinals.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Iterable, Union
+
+from raposa_schemas.schemas import TradeDate
+
+Day = Union[str, date, int]
+
+
+def ordinal(day: Day) -> int:
+    if isinstance(day, int):
+        return day
+    if isinstance(day, TradeDate):
+        return day.ordinal
+    if isinstance(day, date):
+        return day.toordinal()
+    return TradeDate(day).ordinal
+
+
+class TradingCalendar:
+    def __init__(self, days: Iterable[Day]):
+        self.ordinals = sorted({ordinal(day) for day in days})
+
+    @classmethod
+    def weekdays(cls, start: Day, end: Day, holidays: Iterable[Day] = ()) -> "TradingCalendar":
+        """Monday to Friday from start to end (inclusive), less the holidays."""
+        closed = {ordinal(day) for day in holidays}
+        return cls(
+            day
+            for day in range(ordinal(start), ordinal(end) + 1)
+            if date.fromordinal(day).weekday() < 5 and day not in closed
+        )
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __getitem__(self, index: int) -> TradeDate:
+        return TradeDate(date.fromordinal(self.ordinals[index]))
+
+    def __contains__(self, day: Day) -> bool:
+        day = ordinal(day)
+        i = bisect_left(self.ordinals, day)
+        return i < len(self.ordinals) and self.ordinals[i] == day
+
+    def index(self, day: Day) -> int:
+        """Bar of day, or of the first trading day after it."""
+        return bisect_left(self.ordinals, ordinal(day))
+
+    def bar_range(self, start: Day, end: Day) -> slice:
+        """Bars from start to end, both inclusive."""
+        return slice(bisect_left(self.ordinals, ordinal(start)), bisect_right(self.ordinals, ordinal(end)))
+
+    def bars(self, request) -> slice:
+        """Bars of anything with a start_date and end_date (StrategySettings, PricePlot...)."""
+        return self.bar_range(request.start_date, request.end_date)
+
+    def shift(self, day: Day, bars: int) -> TradeDate:
+        """
+        The trading day bars away from day (or from the first trading day
+        after it), clipped to the calendar.
+        """
+        i = min(max(self.index(day) + bars, 0), len(self.ordinals) - 1)
+        return self[i]
+
+    def datetime64(self):
+        """The trading days as a numpy datetime64[D] array."""
+        import numpy as np
+
+        return (np.array(self.ordinals, dtype=np.int64) - date(1970, 1, 1).toordinal()).astype("datetime64[D]")
+
+    def warmup(self, start: Day, bars: int) -> timedelta:
+        """Calendar time covering the bars trading days before start."""
+        return date.fromordinal(ordinal(start)) - self.shift(start, -bars).date
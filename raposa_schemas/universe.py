@@ -0,0 +1,144 @@
+# coding: utf-8
+
+"""
+The instrument universe: the symbol table that StrategySettings.instruments
+and BuyAndHold.instr_list are interned into when they are validated, and
+integer views of instrument sets for the backtester.
+
+    load_symbol_table("symbols.txt")  # reject unknown tickers from now on
+    settings = schemas.StrategySettings(...)
+    settings.instruments.ids  # sorted ids, an index into per-instrument arrays
+    settings.instruments.overlaps(other.instruments)
+    batches = batch_by_instruments(strategies, max_instruments=50)
+
+Instrument sets are Python ints as bitsets (bit i for id i), so testing
+two strategies for shared instruments is one AND. instrument_ids and
+instrument_bitsets give numpy arrays for many strategies at once and
+require numpy: pip install raposa-schemas[numpy]
+"""
+
+from typing import Iterable, List, NamedTuple, Sequence, Tuple
+
+from raposa_schemas import schemas
+from raposa_schemas.schemas import Instruments, SymbolTable, set_symbol_table
+
+
+def symbol_table() -> SymbolTable:
+    """The table instruments are validated against."""
+    return schemas.symbol_table
+
+
+def load_symbol_table(path: str, install: bool = True) -> SymbolTable:
+    """
+    A closed table of the tickers in a text file: one per line, or the first
+    column of a CSV. Blank lines and lines starting with # are skipped.
+    Instruments are validated against it from now on unless install is
+    False.
+    """
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            symbol = line.split(",", 1)[0].strip()
+            if symbol and not symbol.startswith("#"):
+                symbols.append(symbol)
+    table = SymbolTable(symbols)
+    if install:
+        set_symbol_table(table)
+    return table
+
+
+def _field(value, key):
+    if isinstance(value, dict):
+        return value[key]
+    return getattr(value, key)
+
+
+def instruments_of(strategy) -> Instruments:
+    """
+    The interned instruments of a CompleteStrategy, StrategySettings or
+    BuyAndHold, or of their dicts.
+    """
+    if isinstance(strategy, Instruments):
+        return strategy
+    if isinstance(strategy, (list, tuple)):
+        return Instruments.validate(strategy)
+    if isinstance(strategy, schemas.CompleteStrategy) or (
+        isinstance(strategy, dict) and "strategy_settings" in strategy
+    ):
+        strategy = _field(strategy, "strategy_settings")
+    try:
+        instruments = _field(strategy, "instruments")
+    except (KeyError, AttributeError):
+        instruments = _field(strategy, "instr_list")
+    return Instruments.validate(instruments)
+
+
+def instrument_ids(strategies: Iterable) -> Tuple:
+    """
+    Sorted unique ids of every strategy, as one int32 array and the offsets
+    of each strategy's ids in it (CSR layout, like columnar.py).
+    """
+    import numpy as np
+
+    sets = [instruments_of(strategy).ids for strategy in strategies]
+    offsets = np.zeros(len(sets) + 1, dtype=np.int64)
+    np.cumsum([len(ids) for ids in sets], out=offsets[1:])
+    ids = np.fromiter((id for ids in sets for id in ids), dtype=np.int32, count=int(offsets[-1]))
+    return ids, offsets
+
+
+def instrument_bitsets(strategies: Iterable, n_symbols: int = None):
+    """
+    A uint64 array of shape (strategies, words) with bit i of a row set when
+    the strategy trades id i. overlap = (a & b).any(axis=-1).
+    """
+    import numpy as np
+
+    ids, offsets = instrument_ids(strategies)
+    n_symbols = n_symbols or len(schemas.symbol_table)
+    bitsets = np.zeros((len(offsets) - 1, max(1, -(-n_symbols // 64))), dtype=np.uint64)
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    np.bitwise_or.at(bitsets, (rows, ids // 64), np.left_shift(np.uint64(1), (ids % 64).astype(np.uint64)))
+    return bitsets
+
+
+class Batch(NamedTuple):
+    members: Tuple[int, ...]  # positions of the strategies in the input
+    mask: int  # union of their instruments
+
+    @property
+    def ids(self) -> Tuple[int, ...]:
+        return tuple(id for id in range(self.mask.bit_length()) if self.mask >> id & 1)
+
+    @property
+    def symbols(self) -> Tuple[str, ...]:
+        return tuple(schemas.symbol_table.symbol(id) for id in self.ids)
+
+
+def batch_by_instruments(strategies: Sequence, max_instruments: int = None) -> List[Batch]:
+    """
+    Groups strategies so that those sharing instruments run together and
+    the data of each batch is loaded once. Strategies are placed greedily,
+    largest instrument sets first, into the batch they share the most
+    instruments with, as long as its union stays within max_instruments.
+    """
+    masks = [instruments_of(strategy).mask for strategy in strategies]
+    order = sorted(range(len(masks)), key=lambda i: (-bin(masks[i]).count("1"), i))
+    members: List[List[int]] = []
+    unions: List[int] = []
+    for i in order:
+        mask = masks[i]
+        best, shared = None, 0
+        for n, union in enumerate(unions):
+            common = bin(union & mask).count("1")
+            if common > shared and (
+                max_instruments is None or bin(union | mask).count("1") <= max_instruments
+            ):
+                best, shared = n, common
+        if best is None:
+            members.append([i])
+            unions.append(mask)
+        else:
+            members[best].append(i)
+            unions[best] |= mask
+    return [Batch(tuple(sorted(group)), union) for group, union in zip(members, unions)]
@@ -0,0 +1,136 @@
+# coding: utf-8
+
+"""
+Walk-forward analysis of one strategy: split a span of bars into train and
+test folds, compute the strategy's indicators once over the whole span and
+hand each fold views into those series.
+Requires numpy: pip install raposa-schemas[numpy]
+
+    wf = WalkForward(strategy, dates, prices, train_bars=504, test_bars=126)
+    for fold in wf.folds:
+        train, test = wf.strategies(fold)  # StrategySettings with fold dates
+        series = wf.indicators(fold, "test")  # spec.key -> view, no copies
+        close = wf.prices(fold, "test")["Close"]
+
+Folds start after the strategy's warm-up (strategy_info.required_lookback)
+so every value in a fold is fully warmed up. Because the indicators run
+over the whole span, a fold sees the same values it would in one long
+backtest; recursive averages (EMA, RSI, ATR) have simply had more bars to
+settle than in a backtest started lookback bars before the fold.
+
+Sizing strategies and the position-dependent indicators (STOP_PRICE,
+ATR_STOP_PRICE) are left to the backtester.
+"""
+
+from typing import Dict, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from raposa_schemas import migrations, registry, schemas, strategy_info
+from raposa_schemas.indicators import IndicatorEngine, position_indicators
+
+parts = ("train", "test")
+
+
+class Fold(NamedTuple):
+    number: int
+    train: slice  # bars of the full span
+    test: slice
+
+
+def fold_windows(
+    n_bars: int,
+    train_bars: int,
+    test_bars: int,
+    step_bars: Optional[int] = None,
+    anchored: bool = False,
+    warmup: int = 0,
+) -> Tuple[Fold, ...]:
+    """
+    Train/test folds over n_bars bars. Each test window follows its train
+    window and the folds advance by step_bars (test_bars by default, so
+    test windows do not overlap). Anchored folds keep their train window
+    starting at the first bar after the warm-up.
+    """
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError("train_bars and test_bars must be > zero.")
+    step_bars = step_bars or test_bars
+    if step_bars <= 0:
+        raise ValueError("step_bars must be > zero.")
+    folds = []
+    start = warmup
+    while start + train_bars + test_bars <= n_bars:
+        train_start = warmup if anchored else start
+        split = start + train_bars
+        folds.append(Fold(len(folds), slice(train_start, split), slice(split, split + test_bars)))
+        start += step_bars
+    return tuple(folds)
+
+
+class WalkForward:
+    """
+    Walk-forward folds of one strategy over one block of prices (see
+    indicators.py for the layout of prices). dates are the bars' trading
+    days.
+    """
+
+    def __init__(
+        self,
+        strategy: Union[schemas.CompleteStrategy, dict],
+        dates: Sequence,
+        prices: Mapping[str, np.ndarray],
+        train_bars: int,
+        test_bars: int,
+        step_bars: Optional[int] = None,
+        anchored: bool = False,
+    ):
+        if isinstance(strategy, dict):
+            strategy = migrations.validate(strategy)
+        self.strategy = strategy
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.engine = IndicatorEngine(prices)
+        if len(self.engine) != len(self.dates):
+            raise ValueError("prices and dates must have the same number of bars.")
+        self.lookback = strategy_info.required_lookback(strategy)
+        self.folds = fold_windows(
+            len(self.dates), train_bars, test_bars, step_bars, anchored, self.lookback
+        )
+        # every indicator the signals use, over the full span, computed once
+        self.series: Dict[tuple, np.ndarray] = {
+            spec.key: self.engine.compute({"name": spec.name, "params": dict(spec.params)})
+            for spec in strategy_info.indicator_plan(strategy)
+            if spec.name in registry.INDICATORS and spec.name not in position_indicators
+        }
+
+    def __len__(self):
+        return len(self.folds)
+
+    def _window(self, fold: Fold, part: str) -> slice:
+        if part not in parts:
+            raise ValueError(f"part must be one of {parts}.")
+        return getattr(fold, part)
+
+    def indicators(self, fold: Fold, part: str = "test") -> Dict[tuple, np.ndarray]:
+        """IndicatorSpec.key -> view of its series over the fold's train or test bars."""
+        window = self._window(fold, part)
+        return {key: series[window] for key, series in self.series.items()}
+
+    def prices(self, fold: Fold, part: str = "test") -> Dict[str, np.ndarray]:
+        """Price column -> view of it over the fold's train or test bars."""
+        window = self._window(fold, part)
+        return {column: values[window] for column, values in self.engine.prices.items()}
+
+    def dates_of(self, fold: Fold, part: str = "test") -> Tuple[schemas.TradeDate, schemas.TradeDate]:
+        window = self._window(fold, part)
+        return schemas.TradeDate(self.dates[window.start]), schemas.TradeDate(self.dates[window.stop - 1])
+
+    def strategies(self, fold: Fold) -> Tuple[schemas.CompleteStrategy, schemas.CompleteStrategy]:
+        """Train and test copies of the strategy with the fold's dates."""
+        out = []
+        for part in parts:
+            start_date, end_date = self.dates_of(fold, part)
+            settings = self.strategy.strategy_settings.copy(
+                update={"start_date": start_date, "end_date": end_date}
+            )
+            out.append(self.strategy.copy(update={"strategy_settings": settings}))
+        return tuple(out)
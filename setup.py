@@ -19,6 +19,15 @@ setup(
         'pydantic',
         'typing-extensions'
     ],
+    extras_require={
+        'numpy': ['numpy'],
+    },
+    entry_points={
+        'console_scripts': [
+            'raposa-ingest=raposa_schemas.ingest:main',
+            'raposa-loadtest=raposa_schemas.loadtest:main',
+        ],
+    },
     python_requires='>=3.7',
     classifiers=[
     'Development Status :: 3 - Alpha',
@@ -0,0 +1,46 @@
+import common
+
+common.importPath()
+
+import numpy as np
+
+from raposa_schemas import schemas
+from raposa_schemas.baseline import BaselineEngine, equity_curves
+
+
+class TestBaseline:
+    prices = common.randomPrices(300, 3)["Close"]
+    dates = np.busday_offset("2015-03-02", np.arange(300), roll="forward")
+    symbols = ("AAPL", "GE", "SPY")
+
+    def load(self, instruments, start_date, end_date):
+        self.loads.append(instruments)
+        columns = [self.symbols.index(symbol) for symbol in instruments]
+        return self.dates, self.prices[:, columns]
+
+    def testEquityCurves(self):
+        closes = self.prices.copy()
+        closes[:50, 2] = np.nan  # not trading yet
+        equity, total = equity_curves(closes, 9000)
+        assert np.allclose(equity[0], 3000)
+        assert np.allclose(equity[:, 0], 3000 * closes[:, 0] / closes[0, 0])
+        assert np.allclose(equity[:51, 2], 3000)
+        assert np.allclose(total, equity.sum(axis=1))
+
+    def testEquityAcrossGaps(self):
+        closes = np.array([[100, np.nan], [np.nan, np.nan], [110, 50], [121, np.nan], [121, 55]])
+        equity, total = equity_curves(closes, 2000)
+        assert np.allclose(equity[:, 0], [1000, 1000, 1100, 1210, 1210])
+        assert np.allclose(equity[:, 1], [1000, 1000, 1000, 1000, 1100])
+        assert np.allclose(total, [2000, 2000, 2100, 2210, 2310])
+
+    def testMemoized(self):
+        self.loads = []
+        engine = BaselineEngine(self.load)
+        first = engine.run(schemas.BuyAndHold(instr_list=["SPY", "GE"], account_size=10000))
+        second = engine.run({"instr_list": ["GE", "SPY"], "account_size": 10000})
+        assert first is second and self.loads == [("GE", "SPY")]
+        assert first.instruments == ("GE", "SPY")
+        assert not first.total.flags.writeable
+        engine.run(schemas.BuyAndHold(instr_list=["GE"], account_size=10000))
+        assert engine.cache_info().misses == 2
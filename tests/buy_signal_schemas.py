@@ -0,0 +1,121 @@
+from copy import deepcopy
+import common
+
+common.importPath()
+
+from raposa_schemas import schemas
+
+class TestBuySignal:
+    signal_dict = {
+        "rel": "lt",
+        "short": False,
+        "indicator": {
+            "name": "PRICE",
+            "params": {"price_type": "Close"},
+            "needs_comp": True,
+            "valid_comps": ["SMA", "EMA", "MACD", "ATR"],
+        },
+        "comp_indicator": {
+            "name": "EMA",
+            "params": {"period": 26},
+            "needs_comp": True,
+            "valid_comps": ["SMA", "EMA", "MACD", "PRICE"],
+        },
+    }
+
+    def testValidSchema(self):
+        out = None
+        try:
+            out = schemas.BuySignals(signals=[self.signal_dict])
+            success = True
+        except:
+            success = False
+
+        assert success, f"Valid schema returns error. Have defaults been updated?\n{out}"
+
+    def testInvalidSchema0(self):
+        '''
+        comp indicator must be valid for the indicator even if the client
+        lists it in valid_comps
+        '''
+        signal_dict = deepcopy(self.signal_dict)
+        signal_dict["comp_indicator"]["name"] = "RSI"
+        signal_dict["indicator"]["valid_comps"].append("RSI")
+        out = None
+
+        try:
+            out = schemas.Signal(**signal_dict)
+            failure = False
+        except:
+            failure = True
+
+        assert failure, f"Client valid_comps are trusted:\n{out}"
+
+    def testInvalidSchema1(self):
+        '''
+        indicator needs a comp indicator even if the client says it doesn't
+        '''
+        signal_dict = deepcopy(self.signal_dict)
+        signal_dict["comp_indicator"] = None
+        signal_dict["indicator"]["needs_comp"] = False
+        out = None
+
+        try:
+            out = schemas.Signal(**signal_dict)
+            failure = False
+        except:
+            failure = True
+
+        assert failure, f"Client needs_comp is trusted:\n{out}"
+
+    def testInvalidSchema2(self):
+        '''
+        unknown indicators are rejected
+        '''
+        signal_dict = deepcopy(self.signal_dict)
+        signal_dict["indicator"]["name"] = "NOT_AN_INDICATOR"
+        out = None
+
+        try:
+            out = schemas.Signal(**signal_dict)
+            failure = False
+        except:
+            failure = True
+
+        assert failure, f"Unknown indicator accepted:\n{out}"
+
+    def testInvalidSchema3(self):
+        '''
+        no more than max_signals signals
+        '''
+        out = None
+
+        try:
+            out = schemas.BuySignals(signals=[self.signal_dict] * (schemas.max_signals + 1))
+            failure = False
+        except:
+            failure = True
+
+        assert failure, f"max_signals not being enforced:\n{out}"
+
+
+class TestCompMatrix:
+
+    def testMatchesClassDefaults(self):
+        for klass in schemas.indicator_classes:
+            name = klass.__fields__["name"].default
+            valid_comps = klass.__fields__["valid_comps"].default or []
+            for comp in schemas.comp_matrix.names:
+                assert schemas.comp_matrix.is_valid(name, comp) == (comp in valid_comps), \
+                    f"{name} vs {comp} does not match the class defaults"
+
+    def testValidPairs(self):
+        pairs = schemas.comp_matrix.valid_pairs(
+            schemas.buy_indicators.values(), ["LEVEL"]
+        )
+        assert ("RSI", "LEVEL") in pairs
+        assert all(comp == "LEVEL" for _, comp in pairs)
+        assert len(schemas.comp_matrix.pairs) == sum(
+            len(klass.__fields__["valid_comps"].default or [])
+            for klass in schemas.indicator_classes
+        )
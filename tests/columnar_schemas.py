@@ -0,0 +1,60 @@
+from copy import deepcopy
+import tempfile
+import common
+
+common.importPath()
+
+from raposa_schemas import default_bots, strategy_info
+from raposa_schemas.columnar import StrategyColumns
+
+
+class TestStrategyColumns:
+    bots = [default_bots.get_default_bot(n) for n in range(1, 5)]
+
+    def testRoundTrip(self):
+        columns = StrategyColumns.from_strategies(self.bots)
+        for n, bot in enumerate(self.bots):
+            assert strategy_info.fingerprint(columns.strategy(n)) == strategy_info.fingerprint(bot)
+
+    def testValidate(self):
+        macd = deepcopy(self.bots[0])
+        macd["buy_signals"]["signals"][0]["indicator"] = {
+            "name": "MACD", "params": {"fastEMA_period": 30, "slowEMA_period": 20}
+        }
+        period = deepcopy(self.bots[3])
+        period["buy_signals"]["signals"][1]["comp_indicator"]["params"]["period"] = -1
+        comp = deepcopy(self.bots[0])
+        comp["sell_signals"]["signals"][0]["comp_indicator"]["name"] = "RSI"
+        risk = deepcopy(self.bots[1])
+        risk["strategy_settings"]["position_management_strategy"]["params"]["max_position_risk_frac"] = 2
+        legacy = deepcopy(self.bots[1])
+        del legacy["strategy_settings"]["position_management_strategy"]["params"]["risk_cap"]
+
+        columns = StrategyColumns.from_strategies(self.bots + [macd, period, comp, risk, legacy])
+        assert columns.validate().tolist() == [True] * 4 + [False] * 4 + [True]
+
+    def testInvalidDaysAndDates(self):
+        bad = []
+        for key, value in (
+            ("trade_days", ["mon", "funday"]),
+            ("rebalance_days", "mon"),
+            ("start_date", "2019-02-30"),
+            ("end_date", "2019-2-1"),
+            ("init_date", "soon"),
+            ("end_date", self.bots[0]["strategy_settings"]["start_date"]),
+        ):
+            strategy = deepcopy(self.bots[0])
+            strategy["strategy_settings"][key] = value
+            bad.append(strategy)
+        columns = StrategyColumns.from_strategies(self.bots + bad)
+        assert columns.validate().tolist() == [True] * 4 + [False] * len(bad)
+
+    def testSaveLoadSelect(self):
+        columns = StrategyColumns.from_strategies(self.bots)
+        with tempfile.TemporaryDirectory() as directory:
+            columns.save(directory)
+            loaded = StrategyColumns.load(directory)
+            selected = loaded.select(loaded.strategies["account_size"] > 10000)
+            assert len(selected) == 2
+            assert selected.instruments_of(1) == self.bots[3]["strategy_settings"]["instruments"]
+            assert strategy_info.fingerprint(selected.strategy(0)) == strategy_info.fingerprint(self.bots[1])
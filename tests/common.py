@@ -3,4 +3,17 @@ import sys
 
 def importPath():
     root = os.path.dirname(os.getcwd())
-    sys.path.append(root)
\ No newline at end of file
+    sys.path.append(root)
+
+
+def randomPrices(bars=600, instruments=None, seed=0):
+    """Random walk High/Low/Close prices for the numpy based tests."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    shape = (bars,) if instruments is None else (bars, instruments)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, shape), axis=0))
+    return {
+        "High": close * (1 + rng.uniform(0, 0.01, shape)),
+        "Low": close * (1 - rng.uniform(0, 0.01, shape)),
+        "Close": close,
+    }
@@ -0,0 +1,39 @@
+import common
+
+common.importPath()
+
+from raposa_schemas import compact, default_bots, schemas
+
+
+class TestCompact:
+
+    def testRoundTrip(self):
+        for bot in default_bots.default_strategies():
+            strategy = schemas.CompleteStrategy(**bot.strategy.dict())
+            out = compact.compact_strategy(strategy)
+            assert compact.to_model(out) == strategy, f"{bot.name} does not round trip"
+            assert compact.to_model(out, validate=True) == strategy
+            assert compact.to_model(out).json() == strategy.json()
+            instruments = compact.to_model(out).strategy_settings.instruments
+            assert instruments.ids == strategy.strategy_settings.instruments.ids
+
+    def testSharedPieces(self):
+        pool = compact.SharedPool()
+        first = compact.compact_strategy(default_bots.get_default_bot(4), pool)
+        second = compact.compact_strategy(default_bots.get_default_bot(4), pool)
+        assert first.buy_signals[0] is second.buy_signals[0]
+        assert first.strategy_settings.instruments is second.strategy_settings.instruments
+        pieces = len(pool)
+        compact.compact_strategy(default_bots.get_default_bot(4), pool)
+        assert len(pool) == pieces
+
+        # without a pool nothing is kept between calls
+        other = compact.compact_strategy(default_bots.get_default_bot(4))
+        assert other == first and other.buy_signals[0] is not first.buy_signals[0]
+
+    def testTypesAreKept(self):
+        pool = compact.SharedPool()
+        as_int = compact.compact_indicator({"name": "LEVEL", "params": {"level": 10}}, pool)
+        as_float = compact.compact_indicator({"name": "LEVEL", "params": {"level": 10.0}}, pool)
+        assert as_int is not as_float
+        assert type(as_float.params[0][1]) is float
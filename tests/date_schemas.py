@@ -0,0 +1,63 @@
+import common
+
+common.importPath()
+
+import pickle
+from datetime import date
+
+from raposa_schemas import default_bots, schemas
+from raposa_schemas.prefetch import data_range
+from raposa_schemas.trading_calendar import TradingCalendar
+
+
+def settings(**kwargs):
+    values = default_bots.get_default_bot(1)["strategy_settings"]
+    values.update(kwargs)
+    return values
+
+
+class TestDates:
+
+    def testParsedOnce(self):
+        out = schemas.StrategySettings(**settings(start_date="2018-01-02"))
+        assert out.start_date == "2018-01-02"
+        assert out.start_date.ordinal == date(2018, 1, 2).toordinal()
+        assert out.init_date == "" and out.init_date.ordinal is None
+        assert schemas.StrategySettings(**settings()).end_date.date == date(2019, 12, 31)
+        assert pickle.loads(pickle.dumps(out.start_date)).ordinal == out.start_date.ordinal
+        assert schemas.PricePlot().start_date.date == date(2015, 3, 1)
+        assert '"start_date": "2018-01-02"' in out.json()
+
+    def testInvalidDates(self):
+        cases = [
+            (schemas.StrategySettings, settings(start_date="2018-13-01")),
+            (schemas.StrategySettings, settings(start_date="01/02/2018")),
+            (schemas.StrategySettings, settings(start_date="2020-01-01", end_date="2019-01-01")),
+            (schemas.StrategySettings, settings(init_date="2020-06-01")),
+            (schemas.PricePlot, {"start_date": "2017-01-01", "end_date": "2016-01-01"}),
+            (schemas.BuyAndHold, {"start_date": "2017-01-01", "end_date": "2017-01-01"}),
+        ]
+        for klass, values in cases:
+            try:
+                klass(**values)
+                success = False
+            except ValueError:
+                success = True
+            assert success, f"{values} should be rejected"
+
+
+class TestTradingCalendar:
+    calendar = TradingCalendar.weekdays("2018-01-01", "2019-12-31", holidays=["2018-12-25"])
+
+    def testLookup(self):
+        assert "2018-12-25" not in self.calendar and "2018-12-24" in self.calendar
+        bars = self.calendar.bars(schemas.PricePlot(start_date="2018-01-06", end_date="2018-01-12"))
+        assert bars == slice(5, 10)
+        assert self.calendar[bars.start] == "2018-01-08"
+        assert self.calendar.shift("2018-12-27", -2) == "2018-12-24"
+        assert str(self.calendar.datetime64()[0]) == "2018-01-01"
+
+    def testPrefetchWarmup(self):
+        strategy = default_bots.get_default_bot(2)  # SMA(100)
+        start, end = data_range(strategy, calendar=self.calendar)
+        assert self.calendar.index(schemas.parse_date("2019-01-01")) - self.calendar.index(start) == 100
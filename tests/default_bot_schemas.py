@@ -0,0 +1,56 @@
+import common
+
+common.importPath()
+
+from raposa_schemas import default_bots, schemas, strategy_info
+
+
+class TestDefaultBots:
+
+    def testValidSchema(self):
+        for bot in default_bots.default_strategies():
+            assert isinstance(bot.strategy, schemas.CompleteStrategy)
+            assert default_bots.get_default_strategy(bot.name) is bot
+            assert schemas.CompleteStrategy(**default_bots.get_default_bot(bot.number)) == bot.strategy
+
+    def testStrategyIsReadOnly(self):
+        strategy = default_bots.get_default_strategy(2).strategy
+        attempts = [
+            lambda: setattr(strategy, "email", "new@test.com"),
+            lambda: strategy.strategy_settings.instruments.append("GE"),
+            lambda: strategy.buy_signals.signals[0].comp_indicator["params"].update(period=5),
+        ]
+        for attempt in attempts:
+            try:
+                attempt()
+                failure = False
+            except (TypeError, AttributeError):
+                failure = True
+
+            assert failure, "Shared default bot was modified."
+
+    def testFrozenInstruments(self):
+        instruments = default_bots.get_default_strategy(2).strategy.strategy_settings.instruments
+        assert isinstance(instruments, schemas.Instruments)
+        assert instruments.ids == schemas.Instruments(list(instruments)).ids
+        assert instruments.overlaps(instruments)
+
+    def testRawBotIsACopy(self):
+        bot = default_bots.get_default_bot(1)
+        bot["strategy_settings"]["instruments"].append("GE")
+        assert default_bots.get_default_bot(1)["strategy_settings"]["instruments"] == ["TSLA"]
+
+    def testPrecomputedInfo(self):
+        bot = default_bots.get_default_strategy(4)
+        assert bot.lookback == 60
+        assert len(bot.fingerprint) == 64
+        assert ("EMA", (("period", 26),)) in [spec.key for spec in bot.indicator_plan]
+
+    def testFingerprintIgnoresEmailAndSignalOrder(self):
+        bot = default_bots.get_default_bot(4)
+        other = default_bots.get_default_bot(4)
+        other["email"] = "someone@else.com"
+        other["buy_signals"]["signals"].reverse()
+        assert strategy_info.fingerprint(bot) == strategy_info.fingerprint(other)
+        other["buy_signals"]["signals"][0]["rel"] = "leq"
+        assert strategy_info.fingerprint(bot) != strategy_info.fingerprint(other)
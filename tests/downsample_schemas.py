@@ -0,0 +1,53 @@
+import common
+
+common.importPath()
+
+import numpy as np
+
+from raposa_schemas import schemas
+from raposa_schemas.downsample import PlotCache, PricePyramid, lttb, minmax
+
+
+class TestDownsample:
+    close = common.randomPrices(5000)["Close"]
+    dates = np.busday_offset("2000-01-03", np.arange(5000), roll="forward")
+
+    def testMethods(self):
+        idx = lttb(np.arange(5000), self.close, 500)
+        assert len(idx) == 500 and idx[0] == 0 and idx[-1] == 4999
+        assert (np.diff(idx) > 0).all()
+        idx = minmax(self.close, 500)
+        assert len(idx) <= 500 and (np.diff(idx) > 0).all()
+        assert self.close.argmax() in idx and self.close.argmin() in idx
+
+    def testPyramid(self):
+        for method in schemas.downsample_methods:
+            pyramid = PricePyramid(self.dates, self.close, method)
+            dates, values = pyramid.query("2001-01-01", "2018-01-01", 300)
+            assert 100 < len(values) <= 300
+            assert dates[0] >= np.datetime64("2001-01-01")
+            dates, values = pyramid.query("2005-01-01", "2005-03-01")
+            assert len(values) == ((self.dates >= np.datetime64("2005-01-01"))
+                & (self.dates <= np.datetime64("2005-03-01"))).sum()
+
+    def testPlotCache(self):
+        loads = []
+
+        def load(instr):
+            loads.append(instr)
+            return self.dates, self.close
+
+        plots = PlotCache(load)
+        request = schemas.PricePlot(instr="SPY", start_date="2000-01-01", end_date="2019-01-01", points=400)
+        plots.plot(request)
+        plots.plot(request.copy(update={"points": 100}))
+        assert loads == ["SPY"]
+
+    def testInvalidRequest(self):
+        for params in ({"points": 2}, {"method": "average"}):
+            try:
+                schemas.PricePlot(**params)
+                success = False
+            except ValueError:
+                success = True
+            assert success, f"{params} should be rejected"
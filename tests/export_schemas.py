@@ -0,0 +1,41 @@
+import common
+
+common.importPath()
+
+import json
+import os
+import tempfile
+
+from raposa_schemas import export
+
+
+class TestExport:
+
+    def testStableEtag(self):
+        first, second = export.build_artifact(), export.build_artifact()
+        assert export.etag(first) == export.etag(second) == f'"{first["hash"]}"'
+        assert export.artifact_json(first) == export.artifact_json(second)
+        assert "CompleteStrategy" in first["schemas"]
+        assert export.get_artifact() is export.get_artifact()
+
+    def testWriteAndLoad(self):
+        path = os.path.join(tempfile.mkdtemp(), "schemas.json")
+        artifact = export.write_artifact(path, export.build_artifact())
+        loaded = export.load_artifact(path)
+        assert export.artifact_json(loaded) == export.artifact_json(artifact)
+        assert export.etag(loaded) == export.etag(artifact)
+
+        for change in (
+            lambda content: content["limits"].update(max_signals=99),
+            lambda content: content.update(version="0.0.0"),
+        ):
+            content = json.loads(export.artifact_json(artifact))
+            change(content)
+            with open(path, "w") as f:
+                json.dump(content, f)
+            try:
+                export.load_artifact(path)
+                success = False
+            except ValueError:
+                success = True
+            assert success, "a changed artifact should not load"
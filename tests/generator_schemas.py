@@ -0,0 +1,82 @@
+import common
+
+common.importPath()
+
+import time
+import warnings
+
+from raposa_schemas import generator, migrations, registry, schemas
+
+
+def resolve_all(strategy):
+    for side in (strategy.buy_signals, strategy.sell_signals):
+        for signal in side.signals:
+            registry.resolve_indicator(signal.indicator)
+            if signal.comp_indicator:
+                registry.resolve_indicator(signal.comp_indicator)
+    registry.resolve_sizing(strategy.strategy_settings.position_sizing_strategy)
+    registry.resolve_sizing(strategy.strategy_settings.position_management_strategy)
+
+
+class TestGenerator:
+
+    def testValidPayloads(self):
+        payloads = generator.generate(2000, seed=3)
+        names, sizings, counts = set(), set(), set()
+        for payload in payloads:
+            strategy = migrations.validate(payload)
+            resolve_all(strategy)
+            names.update(
+                signal["indicator"]["name"]
+                for side in ("buy_signals", "sell_signals")
+                for signal in payload[side]["signals"]
+            )
+            sizings.add(payload["strategy_settings"]["position_management_strategy"]["name"])
+            counts.add(len(payload["strategy_settings"]["instruments"]))
+        assert names == set(schemas.buy_indicators.values()) | set(schemas.sell_indicators.values()) - {"MAD"}
+        assert sizings == set(schemas.position_managements.values())
+        assert max(counts) == schemas.max_instruments - 1
+
+    def testSeeded(self):
+        assert generator.generate(50, seed=7) == generator.generate(50, seed=7)
+        assert generator.generate(50, seed=7) != generator.generate(50, seed=8)
+
+    def testParamBounds(self):
+        for info in registry.INFO_BY_NAME.values():
+            for spec in info.param_specs:
+                if spec.kind not in ("int", "number"):
+                    continue
+                low, high = generator.param_bounds(
+                    spec, info.default_params.get(spec.name), spec.name in info.time_params
+                )
+                assert low <= high and spec.accepts(low) and spec.accepts(high), (info.name, spec.name)
+
+    def testThroughput(self):
+        payloads = generator.PayloadGenerator(seed=0).payloads()
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(5000):
+                next(payloads)
+            best = min(best, time.perf_counter() - start)
+        assert 5000 / best > 5000, f"{5000 / best:.0f} payloads/s"
+
+    def testInvalidCases(self):
+        cases = generator.invalid_cases
+        samples = generator.PayloadGenerator(seed=5, invalid={case: 1 / len(cases) for case in cases})
+        seen = set()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for case, payload in samples.samples(600):
+                seen.add(case)
+                try:
+                    resolve_all(migrations.validate(payload))
+                    success = False
+                except ValueError:
+                    success = True
+                assert success, f"{case} payload validated"
+        assert seen == set(cases)
+
+        samples = generator.PayloadGenerator(seed=5, invalid={"date_range": 0.25})
+        n_invalid = sum(case is not None for case, _ in samples.samples(2000))
+        assert 400 < n_invalid < 600
@@ -0,0 +1,101 @@
+import common
+
+common.importPath()
+
+import numpy as np
+
+from raposa_schemas import default_bots, halving
+
+buy_period = ("buy_signals", "signals", 0, "indicator", "params", "period")
+sell_period = ("sell_signals", "signals", 0, "indicator", "params", "period")
+frequencies = (("strategy_settings", "trade_frequency"), ("strategy_settings", "rebalance_frequency"))
+
+
+def strategy():
+    out = default_bots.get_default_bot(1)  # EMA vs Close, EqualAllocation
+    out["strategy_settings"].update(
+        {"instruments": ["SPY", "GE"], "start_date": "2018-01-02", "end_date": "2020-12-31"}
+    )
+    return out
+
+
+def cyclicalPrices(bars, seed=0):
+    """Noisy cycles of 50 and 80 bars, which some EMA periods follow well all along."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(bars)[:, None]
+    noise = np.cumsum(rng.normal(0, 0.005, (bars, 2)), axis=0)
+    close = 100 * np.exp(0.08 * np.sin(2 * np.pi * t / np.array([50, 80])) + noise)
+    return {"High": close * 1.005, "Low": close * 0.995, "Close": close}
+
+
+class TestSuccessiveHalving:
+    dates = np.busday_offset("2017-06-01", np.arange(950), roll="forward")
+    prices = cyclicalPrices(950, seed=3)
+
+    def testSearchSpace(self):
+        space = halving.SearchSpace.of(strategy(), bounds={buy_period: (5, 50)})
+        assert space.paths == (buy_period, sell_period) + frequencies
+        assert space.dimensions[0] == halving.Dimension(buy_period, "int", 5, 50)
+        assert space.dimensions[1].low == 2 and space.dimensions[1].high == 252
+        for point in space.sample(50, seed=0):
+            assert 5 <= point[buy_period] <= 50
+            assert 1 <= point[frequencies[0]] <= 20
+
+        space = halving.SearchSpace.of(strategy(), exclude=frequencies)
+        assert len(space.grid(4)) == 16
+        changed = space.strategy({buy_period: 7, sell_period: 9})
+        assert changed["buy_signals"]["signals"][0]["indicator"]["params"]["period"] == 7
+        assert space.base["buy_signals"]["signals"][0]["indicator"]["params"]["period"] != 7
+
+    def testOrderedParams(self):
+        macd = default_bots.get_default_bot(1)
+        macd["buy_signals"]["signals"][0]["indicator"] = {
+            "name": "MACD", "params": {"fastEMA_period": 12, "slowEMA_period": 26}
+        }
+        space = halving.SearchSpace.of(macd)
+        for point in space.sample(100, seed=0):
+            fast = point[("buy_signals", "signals", 0, "indicator", "params", "fastEMA_period")]
+            slow = point[("buy_signals", "signals", 0, "indicator", "params", "slowEMA_period")]
+            assert fast < slow, (fast, slow)
+
+        fast = ("buy_signals", "signals", 0, "indicator", "params", "fastEMA_period")
+        slow = ("buy_signals", "signals", 0, "indicator", "params", "slowEMA_period")
+        space = halving.SearchSpace.of(macd, bounds={fast: (2, 10), slow: (2, 10)})
+        points = space.sample(200, seed=0) + space.grid(9)
+        assert all(2 <= point[fast] < point[slow] <= 10 for point in points)
+        try:
+            halving.SearchSpace.of(macd, bounds={fast: (10, 20), slow: (2, 10)})
+            success = False
+        except ValueError:
+            success = True
+        assert success, "bounds without ordered values should be rejected"
+
+    def testFindsGoodParamsCheaply(self):
+        base = strategy()
+        space = halving.SearchSpace.of(base, bounds={buy_period: (2, 100), sell_period: (2, 100)}, exclude=frequencies)
+        objective = halving.LockstepObjective(self.dates, self.prices)
+        result = halving.successive_halving(base, objective, space=space, n_candidates=81, eta=3, seed=0, workers=0)
+        assert [len(stage.points) for stage in result.stages] == [81, 27, 9, 3]
+        assert [stage.window[0] for stage in result.stages] == ["2018-01-02"] * 4
+        assert result.stages[-1].window[1] == "2020-12-31"
+        assert result.best["buy_signals"]["signals"][0]["indicator"]["params"]["period"] == result.point[buy_period]
+
+        grid = space.grid(25)
+        settings = base["strategy_settings"]
+        scores = objective([space.strategy(point) for point in grid], (settings["start_date"], settings["end_date"]))
+        assert np.isclose(result.score, objective([result.best], result.stages[-1].window)[0])
+        rank = (scores > result.score).mean()
+        ratio = result.cost / halving.grid_cost(space, 25, self.dates, base)
+        assert rank < 0.05, rank
+        assert ratio < 0.05, ratio
+
+    def testProcessPool(self):
+        base = strategy()
+        space = halving.SearchSpace.of(base, exclude=frequencies)
+        objective = halving.LockstepObjective(self.dates, self.prices)
+        serial = halving.successive_halving(base, objective, space=space, n_candidates=27, seed=1, workers=0)
+        pooled = halving.successive_halving(
+            base, objective, space=space, n_candidates=27, seed=1, workers=2, chunk_size=5
+        )
+        assert pooled.point == serial.point
+        assert np.allclose(pooled.stages[0].scores, serial.stages[0].scores)
@@ -0,0 +1,51 @@
+import common
+
+common.importPath()
+
+import numpy as np
+
+from raposa_schemas import registry
+from raposa_schemas.indicators import IndicatorEngine, position_indicators
+
+
+class TestIndicators:
+    prices = common.randomPrices(600, 3)
+
+    def testWarmup(self):
+        engine = IndicatorEngine(self.prices)
+        for name, info in registry.INFO_BY_NAME.items():
+            if info.kind != "indicator" or name in position_indicators:
+                continue
+            schema = {"name": name, "params": dict(info.default_params)}
+            series = engine.compute(schema)
+            assert series.shape == self.prices["Close"].shape
+            first = int(np.argmax(~np.isnan(series).any(axis=1)))
+            assert first <= registry.lookback(schema), f"{name} warms up after its lookback"
+            assert not np.isnan(series[first:]).any(), f"{name} has gaps after its warm-up"
+
+    def testValues(self):
+        engine = IndicatorEngine({"Close": self.prices["Close"][:, 0]})
+        close = self.prices["Close"][:, 0]
+        sma = engine.compute({"name": "SMA", "params": {"period": 10}})
+        assert np.allclose(sma[9:], [close[i - 9:i + 1].mean() for i in range(9, len(close))])
+        ema = engine.compute({"name": "EMA", "params": {"period": 10}})
+        assert np.isclose(ema[10], ema[9] + 2 / 11 * (close[10] - ema[9]))
+
+    def testSharedNodes(self):
+        engine = IndicatorEngine(self.prices)
+        upper = {"name": "BOLLINGER", "params": {"period": 20, "numSTD": 2, "band": "upper", "price_type": "Typical"}}
+        lower = {"name": "BOLLINGER", "params": {"period": 20, "numSTD": 2, "band": "lower", "price_type": "Typical"}}
+        engine.compute(upper)
+        before = len(engine.computed)
+        engine.compute(lower)
+        # the mean and the scaled deviation are shared, only the band is new
+        assert len(engine.computed) == before + 1
+        assert engine.compute(upper) is engine.compute(upper)
+
+    def testPositionIndicator(self):
+        try:
+            IndicatorEngine(self.prices).compute({"name": "STOP_PRICE", "params": {}})
+            success = False
+        except ValueError:
+            success = True
+        assert success, "STOP_PRICE cannot be computed without a position"
@@ -0,0 +1,46 @@
+import common
+
+common.importPath()
+
+import io
+import json
+import os
+import tempfile
+
+from raposa_schemas import default_bots, schemas
+from raposa_schemas.ingest import IngestError, ingest, main
+
+
+def archive():
+    legacy = default_bots.get_default_bot(2)
+    del legacy["strategy_settings"]["position_management_strategy"]["params"]["risk_cap"]
+    invalid = default_bots.get_default_bot(1)
+    invalid["strategy_settings"]["trade_frequency"] = 0
+    lines = [json.dumps(default_bots.get_default_bot(n)) for n in range(1, 5)]
+    lines += ["", "{not json", json.dumps(invalid), json.dumps(legacy)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+class TestIngest:
+
+    def check(self, results):
+        assert [line_no for line_no, _ in results] == [1, 2, 3, 4, 6, 7, 8]
+        kinds = [r.kind if isinstance(r, IngestError) else "ok" for _, r in results]
+        assert kinds == ["ok"] * 4 + ["json", "validation", "ok"]
+        assert results[-1][1].schema_version == schemas.SCHEMA_VERSION
+
+    def testSerial(self):
+        self.check(list(ingest(io.BytesIO(archive()), workers=0)))
+
+    def testProcessPool(self):
+        self.check(list(ingest(io.BytesIO(archive()), workers=2, chunk_size=2, max_pending=2)))
+
+    def testMain(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "archive.ndjson")
+            output = os.path.join(directory, "valid.ndjson")
+            with open(source, "wb") as f:
+                f.write(archive())
+            assert main([source, "--output", output, "--workers", "0"]) == 1
+            with open(output) as f:
+                assert len(f.readlines()) == 5
@@ -0,0 +1,51 @@
+import common
+
+common.importPath()
+
+import http.client
+import json
+
+from raposa_schemas import metrics
+from raposa_schemas.loadtest import LocalApp, make_requests, run_load
+
+
+class TestLoadTest:
+
+    def testLocalApp(self):
+        requests = make_requests(20, {"/strategy": 1, "/price_plot": 1, "/buy_and_hold": 1}, seed=1)
+        assert {request.path for request in requests} == {"/strategy", "/price_plot", "/buy_and_hold"}
+        metrics.REGISTRY.clear()
+        with LocalApp() as app:
+            connection = http.client.HTTPConnection(app.server.server_address[0], app.server.server_address[1])
+            for request in requests:
+                connection.request("POST", request.path, request.body)
+                response = connection.getresponse()
+                body = json.loads(response.read())
+                assert response.status == 200, body
+                assert "handler;dur=" in response.getheader("Server-Timing")
+            connection.request("POST", "/price_plot", b'{"start_date": "2020-01-01", "end_date": "2019-01-01"}')
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 422
+            connection.request("POST", "/price_plot", b"not json")
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 422
+            connection.request("POST", "/nope", b"{}")
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 404
+            connection.close()
+        counted = sum(metrics.validations.value(model, "ok") for model in ("CompleteStrategy", "PricePlot", "BuyAndHold"))
+        assert counted == len(requests)
+        assert metrics.validations.value("PricePlot", "error") == 1
+
+    def testRunLoad(self):
+        requests = make_requests(200, seed=2, invalid=0.5)
+        with LocalApp() as app:
+            report = run_load(app.url, requests, clients=2, rate=100, duration=0.5)
+        assert report.errors == 0 and report.requests == sum(report.statuses.values())
+        assert 30 <= report.requests <= 60
+        assert set(report.statuses) == {200, 422}
+        assert report.p50 <= report.p99 and 0 < report.parse_share < 1
+        assert "req/s" in report.summary()
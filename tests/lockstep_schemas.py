@@ -0,0 +1,102 @@
+import common
+
+common.importPath()
+
+import numpy as np
+
+from raposa_schemas import default_bots
+from raposa_schemas.indicators import IndicatorEngine
+from raposa_schemas.lockstep import Lockstep
+from raposa_schemas.signal_plan import compile_strategy
+
+
+def strategy(buy_period, sell_period, **settings):
+    out = default_bots.get_default_bot(1)  # EMA vs Close, EqualAllocation
+    out["buy_signals"]["signals"][0]["indicator"]["params"]["period"] = buy_period
+    out["sell_signals"]["signals"][0]["indicator"]["params"]["period"] = sell_period
+    out["strategy_settings"].update({"instruments": ["SPY", "GE"], **settings})
+    return out
+
+
+def backtest(strategy, dates, prices):
+    """One strategy, one bar and instrument at a time."""
+    settings = strategy["strategy_settings"]
+    buy, sell = compile_strategy(strategy).evaluate(IndicatorEngine(prices))
+    start = np.searchsorted(dates, np.datetime64(settings["start_date"]))
+    end = np.searchsorted(dates, np.datetime64(settings["end_date"]), side="right")
+    days = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+    close = prices["Close"]
+    total = []
+    equity = [settings["account_size"] / close.shape[1]] * close.shape[1]
+    held = [False] * close.shape[1]
+    last = [np.nan] * close.shape[1]  # last close, carried across missing ones
+    for t in range(start, end):
+        tradable = (t - start) % settings["trade_frequency"] == 0 and \
+            days[dates[t].astype(object).weekday()] in settings["trade_days"]
+        for n in range(close.shape[1]):
+            if np.isfinite(close[t, n]):
+                if held[n] and np.isfinite(last[n]):
+                    equity[n] *= close[t, n] / last[n]
+                last[n] = close[t, n]
+            if tradable and buy[t, n] and not sell[t, n]:
+                held[n] = True
+            elif tradable and sell[t, n] and not buy[t, n]:
+                held[n] = False
+        total.append(sum(equity))
+    return np.array(total)
+
+
+class TestLockstep:
+    dates = np.busday_offset("2017-06-01", np.arange(700), roll="forward")
+    prices = common.randomPrices(700, 2, seed=3)
+
+    def testMatchesSingleBacktests(self):
+        strategies = [
+            strategy(3, 5),
+            strategy(10, 20),
+            strategy(3, 5, trade_frequency=3),
+            strategy(10, 20, trade_days=["mon", "wed"], account_size=20000),
+            strategy(10, 20),  # same signals as the second
+        ]
+        lockstep = Lockstep(strategies, self.dates, self.prices)
+        assert len(lockstep.plans) == 2
+        result = lockstep.run()
+        assert result.positions.shape == (5, len(result.dates), 2)
+        assert str(result.dates[0]) == "2018-01-01" and str(result.dates[-1]) == "2019-12-31"
+        for n, single in enumerate(strategies):
+            assert np.allclose(result.total[n], backtest(single, self.dates, self.prices)), n
+        assert np.array_equal(result.total[1], result.total[4])
+        assert (result.trades[2] < result.trades[0]) and result.trades[0] > 0
+
+        # missing closes: the move across the gap lands on the next price
+        gaps = dict(self.prices, Close=self.prices["Close"].copy())
+        gaps["Close"][[250, 251, 400], 0] = np.nan
+        gaps["Close"][300, 1] = np.nan
+        result = Lockstep(strategies[:2], self.dates, gaps).run()
+        for n, single in enumerate(strategies[:2]):
+            assert np.allclose(result.total[n], backtest(single, self.dates, gaps)), n
+        assert np.all(np.isfinite(result.total))
+
+    def testSharedIndicators(self):
+        lockstep = Lockstep([strategy(p, 20) for p in (5, 10, 15)], self.dates, self.prices)
+        lockstep.run()
+        ema20 = [node for node in lockstep.engine.computed if node[0] == "ema" and 20 in node]
+        assert len(ema20) == 1
+
+    def testMismatchedStrategies(self):
+        for other in (strategy(3, 5, instruments=["SPY"]), strategy(3, 5, end_date="2019-06-28")):
+            try:
+                Lockstep([strategy(3, 5), other], self.dates, self.prices)
+                success = False
+            except ValueError:
+                success = True
+            assert success, "strategies over different data should not run in lockstep"
+
+    def testUnsupportedSizing(self):
+        sizing = default_bots.get_default_bot(3)["strategy_settings"]["position_sizing_strategy"]
+        try:
+            Lockstep([strategy(3, 5, position_sizing_strategy=sizing)], self.dates, self.prices)
+            success = False
+        except ValueError:
+            success = True
+        assert success, f"{sizing['name']} should be left to the backtester"
@@ -0,0 +1,66 @@
+import common
+
+common.importPath()
+
+import os
+import tempfile
+import warnings
+
+from raposa_schemas import default_bots, metrics, migrations, registry
+
+
+class TestMetrics:
+
+    def testValidationMetrics(self):
+        metrics.REGISTRY.clear()
+        strategy = default_bots.get_default_bot(1)
+        migrations.validate(strategy)
+        bad = default_bots.get_default_bot(1)
+        bad["strategy_settings"]["trade_frequency"] = 0
+        try:
+            migrations.validate(bad)
+            success = False
+        except ValueError:
+            success = True
+        assert success, "invalid strategy validated"
+
+        assert metrics.validations.value("CompleteStrategy", "ok") == 1
+        assert metrics.validations.value("CompleteStrategy", "error") == 1
+        assert metrics.validation_seconds.count("CompleteStrategy") == 2
+        assert metrics.validation_errors.value(
+            "CompleteStrategy", "strategy_settings.trade_frequency", "Trade frequency must be a positive integer."
+        ) == 1
+        name = strategy["buy_signals"]["signals"][0]["indicator"]["name"]
+        assert metrics.indicator_uses.value(name, "buy") >= 1
+
+    def testDeprecatedRiskCap(self):
+        metrics.REGISTRY.clear()
+        sizing = {"name": "ATRSizing", "params": {"period": 20, "risk_coefficient": 2, "max_position_risk_frac": 0.02}}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            registry.resolve_sizing(sizing)
+        assert metrics.deprecated_risk_cap.value("ATRSizing") == 1
+        assert metrics.validations.value("ATRSizing", "ok") == 1
+
+    def testExposition(self):
+        metrics_registry = metrics.MetricsRegistry()
+        counter = metrics_registry.counter("errors_total", "Errors.", ("message",), max_series=2)
+        histogram = metrics_registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+        counter.inc('bad "quote"')
+        counter.inc("second")
+        counter.inc("third")  # over max_series
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+        text = metrics_registry.exposition()
+        assert '# TYPE errors_total counter' in text
+        assert 'errors_total{message="bad \\"quote\\""} 1' in text
+        assert 'errors_total{message="other"} 1' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_sum 5.55" in text and "latency_seconds_count 3" in text
+
+        path = os.path.join(tempfile.mkdtemp(), "raposa.prom")
+        metrics.write_textfile(path, metrics_registry)
+        with open(path) as f:
+            assert f.read() == text
@@ -0,0 +1,63 @@
+import common
+
+common.importPath()
+
+import copy
+import warnings
+
+from raposa_schemas import default_bots, migrations, registry, schemas
+
+
+def legacy_payload():
+    payload = default_bots.get_default_bot(3)
+    for key in ("position_sizing_strategy", "position_management_strategy"):
+        payload["strategy_settings"][key]["params"].pop("risk_cap", None)
+    return payload
+
+
+class TestMigrations:
+
+    def testUpgradeLegacy(self):
+        payload = legacy_payload()
+        original = copy.deepcopy(payload)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            out = migrations.upgrade(payload)
+            strategy = migrations.validate(payload)
+        assert payload == original, "upgrade modified its input"
+        assert out["schema_version"] == schemas.SCHEMA_VERSION
+        assert out["strategy_settings"]["position_sizing_strategy"]["params"]["risk_cap"] is False
+        assert out["buy_signals"] is payload["buy_signals"], "unchanged parts should be shared"
+        assert strategy.schema_version == schemas.SCHEMA_VERSION
+
+    def testCurrentFastPath(self):
+        payload = migrations.upgrade(legacy_payload())
+        assert migrations.upgrade(payload) is payload
+        assert not migrations.needs_upgrade(payload)
+        out = list(migrations.upgrade_many([legacy_payload(), payload]))
+        assert out[0] == payload and out[1] is payload
+
+    def testCurrentSizingSkipsLegacyFill(self):
+        sizing = legacy_payload()["strategy_settings"]["position_sizing_strategy"]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            try:
+                registry.resolve_sizing(sizing, schemas.SCHEMA_VERSION)
+                success = False
+            except ValueError:
+                success = True
+        assert success, "a current-version sizing without risk_cap should be rejected"
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            assert registry.resolve_sizing(sizing, 0).params["risk_cap"] is False
+
+    def testUnsupportedVersion(self):
+        payload = legacy_payload()
+        payload["schema_version"] = schemas.SCHEMA_VERSION + 1
+        for func in (migrations.upgrade, lambda p: schemas.CompleteStrategy(**p)):
+            try:
+                func(payload)
+                success = False
+            except ValueError:
+                success = True
+            assert success, f"schema_version {payload['schema_version']} should be rejected"
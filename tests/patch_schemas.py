@@ -0,0 +1,48 @@
+import common
+
+common.importPath()
+
+from raposa_schemas import default_bots, schemas
+from raposa_schemas.patch import apply_patch, apply_patches
+
+
+class TestPatch:
+    strategy = default_bots.get_default_strategy(4).strategy
+
+    def testValidPatch(self):
+        out = apply_patch(self.strategy, "buy_signals.signals.1.comp_indicator.params.period", 30)
+        assert out.buy_signals.signals[1].comp_indicator["params"]["period"] == 30
+        assert self.strategy.buy_signals.signals[1].comp_indicator["params"]["period"] == 26
+        # untouched parts are shared
+        assert out.strategy_settings is self.strategy.strategy_settings
+        assert out.sell_signals is self.strategy.sell_signals
+        assert out.buy_signals.signals[0] is self.strategy.buy_signals.signals[0]
+        assert schemas.CompleteStrategy(**out.dict()) == out
+
+    def testPatches(self):
+        out = apply_patches(
+            self.strategy,
+            [("email", "new@test.com"), ("strategy_settings.instruments", ["GE"])],
+        )
+        assert out.email == "new@test.com"
+        assert list(out.strategy_settings.instruments) == ["GE"]
+        assert out.buy_signals is self.strategy.buy_signals
+
+    def testInvalidPatches(self):
+        patches = [
+            ("buy_signals.signals.1.comp_indicator.params.period", -3),
+            ("buy_signals.signals.1.comp_indicator.name", "RSI"),
+            ("buy_signals.signals.5.rel", "gt"),
+            ("strategy_settings.trade_frequency", 0),
+            ("strategy_settings.position_sizing_strategy.params.risk_coefficient", -1),
+            ("not_a_field", 1),
+        ]
+        for path, value in patches:
+            out = None
+            try:
+                out = apply_patch(self.strategy, path, value)
+                failure = False
+            except ValueError:
+                failure = True
+
+            assert failure, f"Invalid patch to {path} accepted:\n{out}"
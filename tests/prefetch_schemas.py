@@ -0,0 +1,48 @@
+import common
+
+common.importPath()
+
+from datetime import date
+
+from raposa_schemas import default_bots
+from raposa_schemas.prefetch import data_range, plan_prefetch, warmup_days
+
+
+def strategy(instruments, start, end, number=1):
+    out = default_bots.get_default_bot(number)
+    out["strategy_settings"].update(instruments=instruments, start_date=start, end_date=end)
+    return out
+
+
+class TestPrefetch:
+    strategies = [
+        strategy(["GE", "AAPL"], "2015-01-01", "2016-01-01"),
+        strategy(["GE"], "2015-06-01", "2017-01-01", number=3),
+        strategy(["GE"], "2019-01-01", "2020-01-01"),
+    ]
+
+    def testDataRange(self):
+        start, end = data_range(self.strategies[0])
+        assert end == date(2016, 1, 1)
+        assert start < date(2015, 1, 1), "warm-up should start before start_date"
+        assert warmup_days(0) == 0 and warmup_days(252) > 365
+
+    def testOneReadPerInstrument(self):
+        plan = plan_prefetch(self.strategies)
+        assert [read.instrument for read in plan.reads] == ["AAPL", "GE"]
+        ge = plan.reads[1]
+        assert ge.end == date(2020, 1, 1)
+        assert "High" in ge.columns, "ATR needs High and Low"
+        assert len(plan.slices) == 3
+        for n, slices in enumerate(plan.slices):
+            start, end = data_range(self.strategies[n])
+            for data in slices:
+                read = plan.reads[data.read]
+                assert read.instrument == data.instrument
+                assert read.start <= data.start == start and data.end == end <= read.end
+                assert set(data.columns) <= set(read.columns)
+
+    def testGapSplitsReads(self):
+        plan = plan_prefetch(self.strategies, max_gap_days=30)
+        assert [read.instrument for read in plan.reads] == ["AAPL", "GE", "GE"]
+        assert plan.slices[2][0].read == 2
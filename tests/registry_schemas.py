@@ -0,0 +1,146 @@
+import common
+
+common.importPath()
+
+from raposa_schemas import generator, registry, schemas
+
+
+def with_param(info, name, value):
+    """The default params with name set to value and its ordered params moved along."""
+    params = dict(info.default_params, **{name: value})
+    for smaller, larger, strict in info.param_orderings:
+        if name == smaller:
+            params[larger] = value + 1 if strict else value
+        elif name == larger:
+            params[smaller] = value - 1 if strict else value
+    return params
+
+
+def validates(info, params):
+    try:
+        info.klass(params=params)
+        return True
+    except ValueError:
+        return False
+
+
+class TestRegistry:
+
+    def testEveryLabelResolves(self):
+        label_maps = [
+            (schemas.every_indicator, registry.INDICATOR_LABELS),
+            (schemas.buy_indicators, registry.BUY_INDICATOR_LABELS),
+            (schemas.sell_indicators, registry.SELL_INDICATOR_LABELS),
+            (schemas.position_sizings, registry.POSITION_SIZING_LABELS),
+            (schemas.position_managements, registry.POSITION_MANAGEMENT_LABELS),
+        ]
+        for label_map, resolved in label_maps:
+            for label, name in label_map.items():
+                assert resolved[label] is getattr(schemas, name), \
+                    f"{label} does not resolve to {name}"
+
+    def testRegistryIsReadOnly(self):
+        try:
+            registry.INDICATORS["FOO"] = schemas.SMA
+            failure = False
+        except TypeError:
+            failure = True
+
+        assert failure, "Registry can be modified."
+
+    def testSharedDefaults(self):
+        for klass in registry.INDICATORS.values():
+            a, b = klass(), klass()
+            assert a.params is b.params and a.valid_comps is b.valid_comps, \
+                f"{klass.__name__} copies its defaults"
+        try:
+            schemas.SMA().params["period"] = 5
+            failure = False
+        except TypeError:
+            failure = True
+        assert failure, "Default params can be modified."
+        sma = schemas.SMA(params={"period": 5})
+        assert sma.params == {"period": 5} and schemas.SMA().params == {"period": 10}
+        assert type(sma.copy(update={"params": {"period": 6}}).dict()["params"]) is dict
+
+    def testDefaultsRoundTrip(self):
+        for klass in list(registry.INDICATORS.values()) + list(registry.SIZINGS.values()):
+            default = klass()
+            supplied = klass(**default.dict())
+            assert supplied == default, f"{klass.__name__} does not round trip"
+            assert type(supplied.params) is type(default.params)
+            if "valid_comps" in klass.__fields__:
+                assert type(supplied.valid_comps) is type(default.valid_comps)
+
+    def testParamSpecsMatchValidators(self):
+        for info in registry.INFO_BY_NAME.values():
+            for spec in info.param_specs:
+                if spec.kind == "choice":
+                    for choice in spec.choices:
+                        assert validates(info, with_param(info, spec.name, choice)), (info.name, spec.name, choice)
+                    continue
+                if spec.kind == "bool":
+                    continue
+                low, high = generator.param_bounds(
+                    spec, info.default_params.get(spec.name), spec.name in info.time_params
+                )
+                step = 1 if spec.kind == "int" else 0.0001
+                # the edges of the spec, or values far out where it has none
+                inside = [low, high]
+                if spec.minimum is None:
+                    inside.append(-1000 * step)
+                else:
+                    inside.append(spec.minimum + step if spec.exclusive_minimum else spec.minimum)
+                inside.append(10 ** 6 if spec.maximum is None else spec.maximum)
+                for value in inside:
+                    params = with_param(info, spec.name, value)
+                    if not all(other.accepts(params[other.name]) for other in info.param_specs):
+                        continue  # no ordered params fit around value
+                    assert validates(info, params), (info.name, spec.name, value)
+                outside = []
+                if spec.minimum is not None:
+                    outside.append(spec.minimum if spec.exclusive_minimum else spec.minimum - step)
+                if spec.maximum is not None:
+                    outside.append(spec.maximum + step)
+                for value in outside:
+                    assert not spec.accepts(value)
+                    assert not validates(info, with_param(info, spec.name, value)), (info.name, spec.name, value)
+
+    def testMetadata(self):
+        info = registry.get_info(schemas.MACD_SIGNAL)
+        assert info.time_params == ("slowEMA_period", "fastEMA_period", "signalEMA_period")
+        assert info.valid_comps == ("MACD", "SMA", "EMA")
+        assert registry.get_info("LEVEL").valid_comps == ()
+        assert registry.get_info("BOLLINGER").price_columns == registry.HLC
+
+    def testResolveIndicator(self):
+        out = registry.resolve_indicator({"name": "SMA", "params": {"period": 20}})
+        assert isinstance(out, schemas.SMA)
+        assert registry.lookback(out) == 20
+        assert registry.price_columns({"name": "PRICE", "params": {"price_type": "High"}}) == ("High",)
+
+    def testResolveInvalidIndicator(self):
+        try:
+            registry.resolve_indicator({"name": "SMA", "params": {"period": -1}})
+            failure = False
+        except ValueError:
+            failure = True
+
+        assert failure, "Invalid SMA params were accepted."
+
+    def testResolveUnknownName(self):
+        try:
+            registry.resolve_indicator({"name": "NOT_AN_INDICATOR", "params": {}})
+            failure = False
+        except ValueError:
+            failure = True
+
+        assert failure, "Unknown indicator name was accepted."
+
+    def testResolveSizing(self):
+        out = registry.resolve_sizing(
+            {"name": "ATRSizing", "params": {"period": 15, "risk_coefficient": 0.9,
+                "max_position_risk_frac": 0.15, "risk_cap": False}}
+        )
+        assert isinstance(out, schemas.ATRSizing)
+        assert registry.lookback(out) == 15
@@ -0,0 +1,94 @@
+import common
+
+common.importPath()
+
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from raposa_schemas import default_bots
+from raposa_schemas.result_cache import ResultCache
+
+trade_dtype = np.dtype([("date", "datetime64[D]"), ("instrument", "U8"), ("shares", "i8"), ("price", "f8")])
+
+
+def strategy(instruments, period=3):
+    out = default_bots.get_default_bot(1)
+    out["strategy_settings"]["instruments"] = list(instruments)
+    out["buy_signals"]["signals"][0]["indicator"]["params"]["period"] = period
+    return out
+
+
+def backtest(strategy):
+    seed = len(strategy["strategy_settings"]["instruments"])
+    equity = 5000 * np.cumprod(1 + np.random.default_rng(seed).normal(0, 0.01, 500))
+    trades = np.array([("2018-01-02", "TSLA", 10, 300.5), ("2018-03-01", "TSLA", -10, 310.0)], dtype=trade_dtype)
+    return {"equity": equity, "trades": trades}
+
+
+def worker(args):
+    directory, n = args
+    cache = ResultCache(directory)
+    for period in range(2, 12):
+        cache.get_or_compute(strategy(["SPY", "GE"][: 1 + n % 2], period), backtest)
+    return len(cache)
+
+
+class TestResultCache:
+
+    def testRoundTrip(self):
+        cache = ResultCache(tempfile.mkdtemp(), data_version="v1")
+        calls = []
+
+        def compute(strategy):
+            calls.append(strategy)
+            return backtest(strategy)
+
+        first = cache.get_or_compute(strategy(["TSLA", "SPY"]), compute)
+        second = cache.get_or_compute(strategy(["SPY", "TSLA"]), compute)
+        assert len(calls) == 1 and len(cache) == 1
+        assert np.array_equal(first["equity"], second["equity"])
+        assert second["trades"].dtype == trade_dtype and second["trades"]["shares"][1] == -10
+        assert cache.size == os.path.getsize(cache._path(cache.key(strategy(["SPY", "TSLA"])).key))
+
+        other = ResultCache(cache.directory, data_version="v2")
+        assert other.get(other.key(strategy(["TSLA", "SPY"]))) is None
+
+    def testInvalidate(self):
+        cache = ResultCache(tempfile.mkdtemp())
+        for instruments in (["TSLA"], ["SPY"], ["SPY", "GE"]):
+            cache.get_or_compute(strategy(instruments), backtest)
+        old_key = cache.key(strategy(["SPY"]))
+        assert cache.invalidate(["SPY"]) == 2 and len(cache) == 1
+        assert cache.key(strategy(["SPY"])).key != old_key.key
+        assert cache.get(cache.key(strategy(["TSLA"]))) is not None
+        assert not os.path.exists(cache._path(old_key.key))
+
+    def testLruEviction(self):
+        cache = ResultCache(tempfile.mkdtemp())
+        keys = []
+        for period in range(2, 5):
+            keys.append(cache.key(strategy(["TSLA"], period)))
+            cache.put(keys[-1], backtest(strategy(["TSLA"])))
+        cache.max_bytes = cache.size - 1
+        cache.get(keys[0])  # now the most recently used
+        cache.put(cache.key(strategy(["TSLA"], 5)), backtest(strategy(["TSLA"])))
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None and cache.size <= cache.max_bytes
+
+    def testObjectArraysRejected(self):
+        cache = ResultCache(tempfile.mkdtemp())
+        try:
+            cache.put(cache.key(strategy(["TSLA"])), {"trades": np.array([{"a": 1}], dtype=object)})
+            success = False
+        except ValueError:
+            success = True
+        assert success, "object arrays should not be stored"
+
+    def testProcesses(self):
+        directory = tempfile.mkdtemp()
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            sizes = pool.map(worker, [(directory, n) for n in range(8)])
+        assert max(sizes) == 20 and len(ResultCache(directory)) == 20
@@ -0,0 +1,55 @@
+import common
+
+common.importPath()
+
+import numpy as np
+
+from raposa_schemas.signal_plan import compile_signals
+from raposa_schemas.short_circuit import StreamingSignals, evaluate_short_circuit, order_by_cost
+
+
+def signal(indicator, comp, rel):
+    return {"indicator": indicator, "comp_indicator": comp, "rel": rel}
+
+
+hurst = {"name": "HURST", "params": {"period": 10, "minLags": 2, "maxLags": 20}}
+level = {"name": "LEVEL", "params": {"level": 0.4}}
+price = {"name": "PRICE", "params": {"price_type": "Close"}}
+sma = {"name": "SMA", "params": {"period": 5}}
+ema = {"name": "EMA", "params": {"period": 12}}
+psar = {"name": "PSAR", "params": {"type_indicator": "reversal_toUptrend", "init_acceleration_factor": 0.02,
+    "acceleration_factor_step": 0.02, "max_acceleration_factor": 0.2, "period": 3}}
+boolean = {"name": "BOOLEAN", "params": {"boolean": True}}
+rsi = {"name": "RSI", "params": {"period": 14}}
+rsi_level = {"name": "LEVEL", "params": {"level": 50}}
+
+
+class TestShortCircuit:
+    prices = common.randomPrices(400, 2)
+    plan = compile_signals(
+        {"signals": [signal(hurst, level, "lt"), signal(price, sma, "gt"), signal(rsi, rsi_level, "lt")]},
+        {"signals": [signal(psar, boolean, "eq"), signal(ema, price, "leq")]},
+    )
+
+    def testOrder(self):
+        order = order_by_cost(self.plan.buy)
+        assert order[0].left[0] == "column" and order[-1].left[0] == "hurst"
+
+    def testSameAsFullEvaluation(self):
+        expected = self.plan.evaluate(self.prices)
+        out = evaluate_short_circuit(self.plan, self.prices)
+        assert np.array_equal(out[0], expected[0]) and np.array_equal(out[1], expected[1])
+        assert expected[0].any() and expected[1].any()
+
+    def testStreaming(self):
+        expected = self.plan.evaluate(self.prices)
+        stream = StreamingSignals(self.plan)
+        buys, sells = [], []
+        for t in range(400):
+            buy, sell = stream.update({column: values[t] for column, values in self.prices.items()})
+            buys.append(buy)
+            sells.append(sell)
+        assert np.array_equal(np.array(buys), expected[0])
+        assert np.array_equal(np.array(sells), expected[1])
+        hurst_node = [node for node in stream.computed if node[0] == "hurst"][0]
+        assert stream.computed[hurst_node] < 400, "HURST should be skipped where earlier signals fail"
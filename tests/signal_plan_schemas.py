@@ -0,0 +1,50 @@
+import common
+
+common.importPath()
+
+import numpy as np
+
+from raposa_schemas import default_bots, schemas
+from raposa_schemas.indicators import TRUE_RANGE, TYPICAL, IndicatorEngine
+from raposa_schemas.signal_plan import compile_signals, compile_strategy
+
+
+def signal(indicator, comp, rel):
+    return {"indicator": indicator, "comp_indicator": comp, "rel": rel}
+
+
+class TestSignalPlan:
+    prices = common.randomPrices(400, 2)
+    strategy = default_bots.get_default_strategy(4).strategy
+
+    def testMatchesNaive(self):
+        plan = compile_strategy(self.strategy)
+        buy, sell = plan.evaluate(self.prices)
+        engine = IndicatorEngine(self.prices)
+        ops = {"lt": np.less, "gt": np.greater}
+        expected = np.ones(buy.shape, dtype=bool)
+        for s in self.strategy.buy_signals.signals:
+            expected &= ops[s.rel](engine.compute(s.indicator), engine.compute(s.comp_indicator))
+        assert np.array_equal(buy, expected)
+        # the EMA(26) used on both sides is a single node
+        assert len([n for n in plan.nodes if n[0] == "ema"]) == 2
+
+    def testSharedInputs(self):
+        bollinger = {"name": "BOLLINGER", "params": {"period": 20, "numSTD": 2, "band": "lower", "price_type": "Typical"}}
+        width = {"name": "BAND_WIDTH", "params": {"period": 20, "numStdDevUpper": 2, "numStdDevLower": 2, "price_type": "Typical"}}
+        price = {"name": "PRICE", "params": {"price_type": "Typical"}}
+        atr = {"name": "ATR", "params": {"period": 14, "multiple": 1}}
+        atrp = {"name": "ATRP", "params": {"period": 14, "multiple": 1}}
+        level = {"name": "LEVEL", "params": {"level": 0.1}}
+        plan = compile_signals(
+            schemas.BuySignals(signals=[signal(bollinger, price, "geq"), signal(width, level, "lt")]),
+            {"signals": [signal(atr, atr, "eq"), signal(atrp, atrp, "eq")]},
+        )
+        for node in (TYPICAL, TRUE_RANGE, ("wilder", TRUE_RANGE, 14)):
+            assert plan.nodes.count(node) == 1
+        assert plan.nodes.index(TYPICAL) < plan.nodes.index(("sma", TYPICAL, 20))
+        buy, sell = plan.evaluate(self.prices)
+        out = plan.evaluate(self.prices, out=(buy, sell))
+        assert out[0] is buy and out[1] is sell
+        # warm-up bars compare False
+        assert not sell[:13].any() and sell[14:].all()
@@ -0,0 +1,45 @@
+import common
+
+common.importPath()
+
+from raposa_schemas import schemas
+from raposa_schemas.signal_space import SignalSpace
+
+
+class TestSignalSpace:
+    space = SignalSpace.buy(max_signals=2)
+
+    def testSize(self):
+        assert len(list(self.space.structures())) == len(self.space)
+
+    def testShardsCoverSpace(self):
+        everything = list(self.space.structures())
+        n = 7
+        sharded = []
+        for i in range(n):
+            sharded += list(self.space.structures(*self.space.shard_range(i, n)))
+
+        assert sharded == everything, "Shards do not split the space exactly."
+        assert len(set(everything)) == len(everything), "Duplicate structures."
+
+    def testMirroredSignalsRemoved(self):
+        signals = set(self.space.signals)
+        assert ("SMA", "EMA", "lt") in signals
+        assert ("EMA", "SMA", "gt") not in signals
+        assert ("SMA", "SMA", "leq") not in signals
+
+    def testStructuresValidate(self):
+        out = None
+        try:
+            for n, out in enumerate(self.space.iter_range(as_dict=False)):
+                if n > 2000:
+                    break
+            success = True
+        except:
+            success = False
+
+        assert success, f"Invalid structure enumerated after:\n{out}"
+
+    def testSellSpace(self):
+        out = next(iter(SignalSpace.sell(max_signals=1).shard(0, 3, as_dict=False)))
+        assert isinstance(out, schemas.SellSignals)
@@ -1,4 +1,5 @@
 from copy import copy
+import warnings
 import common
 
 common.importPath()
@@ -450,4 +451,19 @@ class TestTurtlePyramiding:
         except:
             failure = True
         
-        assert failure, f"{out}"
\ No newline at end of file
+        assert failure, f"{out}"
+
+
+class TestFrozenLegacyParams:
+
+    def testFrozenParamsWithoutRiskCap(self):
+        '''
+        Read-only params from before risk_cap was introduced get a copy with risk_cap
+        '''
+        for klass in (schemas.ATRSizing, schemas.VOLATILITYSizing, schemas.TurtleUnitSizing,
+                schemas.TurtlePyramiding):
+            params = {k: v for k, v in klass().params.items() if k != "risk_cap"}
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                out = klass(params=schemas.FrozenDict(params))
+            assert out.params["risk_cap"] is False, klass.__name__
@@ -0,0 +1,93 @@
+import common
+
+common.importPath()
+
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+from raposa_schemas import default_bots, schemas, universe
+
+
+def settings(instruments):
+    values = default_bots.get_default_bot(1)["strategy_settings"]
+    values["instruments"] = instruments
+    return schemas.StrategySettings(**values)
+
+
+class TestUniverse:
+
+    def testInterned(self):
+        a = settings(["SPY", "AAPL", "SPY"])
+        b = schemas.BuyAndHold(instr_list=["AAPL", "GE"]).instr_list
+        assert a.instruments == ["SPY", "AAPL", "SPY"] and a.dict()["instruments"] == a.instruments
+        table = universe.symbol_table()
+        assert a.instruments.ids == tuple(sorted({table.ids["SPY"], table.ids["AAPL"]}))
+        assert a.instruments.overlaps(b) and not a.instruments.overlaps(settings(["XOM"]).instruments)
+        assert pickle.loads(pickle.dumps(a)).instruments.mask == a.instruments.mask
+        a.instruments.append("XOM")
+        assert table.ids["XOM"] in a.instruments.ids
+
+    def testValidatedInstrumentsAreCopied(self):
+        a = settings(["SPY", "AAPL"])
+        b = settings(a.instruments)
+        assert b.instruments == a.instruments and b.instruments is not a.instruments
+        assert b.instruments.mask == a.instruments.mask
+        b.instruments.append("XOM")
+        assert a.instruments == ["SPY", "AAPL"]
+
+    def testClosedTable(self):
+        path = os.path.join(tempfile.mkdtemp(), "symbols.csv")
+        with open(path, "w") as f:
+            f.write("# symbol,name\nGE,General Electric\nSPY,S&P 500\n\nAAPL,Apple\n")
+        previous = universe.symbol_table()
+        table = universe.load_symbol_table(path)
+        try:
+            assert universe.symbol_table() is table
+            assert settings(["AAPL", "GE"]).instruments.ids == (0, 2)
+            try:
+                settings(["GE", "NOPE"])
+                success = False
+            except ValueError:
+                success = True
+            assert success, "unknown instruments should be rejected"
+        finally:
+            universe.set_symbol_table(previous)
+
+    def testOpenTableIsBounded(self):
+        previous = universe.symbol_table()
+        table = schemas.SymbolTable(max_symbols=2)
+        universe.set_symbol_table(table)
+        try:
+            instruments = settings(["A1", "A2", "A3"]).instruments
+            assert len(table) == 0, "validation should not intern"
+            try:
+                instruments.ids
+                success = False
+            except ValueError:
+                success = True
+            assert success, "a full open table should not grow"
+            assert len(table) == 2
+        finally:
+            universe.set_symbol_table(previous)
+
+    def testArraysAndBatches(self):
+        strategies = [
+            {"strategy_settings": {"instruments": ["GE", "SPY"]}},
+            {"instr_list": ["XOM"]},
+            settings(["SPY", "AAPL"]),
+            ["XOM", "GE"],
+        ]
+        ids, offsets = universe.instrument_ids(strategies)
+        assert list(np.diff(offsets)) == [2, 1, 2, 2]
+        assert tuple(ids[offsets[2]:offsets[3]]) == universe.instruments_of(strategies[2]).ids
+        bitsets = universe.instrument_bitsets(strategies)
+        overlap = (bitsets[:, None] & bitsets[None]).any(axis=-1)
+        expected = [[universe.instruments_of(a).overlaps(universe.instruments_of(b)) for b in strategies] for a in strategies]
+        assert (overlap == np.array(expected)).all()
+        batches = universe.batch_by_instruments(strategies, max_instruments=3)
+        assert sorted(i for batch in batches for i in batch.members) == [0, 1, 2, 3]
+        assert all(len(batch.ids) <= 3 for batch in batches)
+        assert len(universe.batch_by_instruments(strategies)) == 1
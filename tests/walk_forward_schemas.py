@@ -0,0 +1,42 @@
+import common
+
+common.importPath()
+
+import numpy as np
+
+from raposa_schemas import default_bots, strategy_info
+from raposa_schemas.indicators import IndicatorEngine
+from raposa_schemas.walk_forward import WalkForward, fold_windows
+
+
+class TestWalkForward:
+    prices = common.randomPrices(800, 2)
+    dates = np.busday_offset("2015-01-01", np.arange(800), roll="forward")
+    strategy = default_bots.get_default_strategy(4).strategy
+
+    def testFoldWindows(self):
+        folds = fold_windows(100, 40, 10, warmup=5)
+        assert [(f.train.start, f.test.start, f.test.stop) for f in folds] == \
+            [(5, 45, 55), (15, 55, 65), (25, 65, 75), (35, 75, 85), (45, 85, 95)]
+        anchored = fold_windows(100, 40, 10, anchored=True, warmup=5)
+        assert all(f.train.start == 5 for f in anchored)
+
+    def testFolds(self):
+        wf = WalkForward(self.strategy, self.dates, self.prices, train_bars=250, test_bars=60)
+        assert wf.folds[0].train.start == strategy_info.required_lookback(self.strategy)
+        full = IndicatorEngine(self.prices)
+        for fold in wf.folds:
+            for key, view in wf.indicators(fold, "train").items():
+                assert np.shares_memory(view, wf.series[key]), "fold series should be views"
+                assert not np.isnan(view).any(), "fold starts before the warm-up is done"
+            ema = wf.indicators(fold)[("EMA", (("period", 26),))]
+            assert np.array_equal(ema, full.compute({"name": "EMA", "params": {"period": 26}})[fold.test])
+
+    def testStrategies(self):
+        wf = WalkForward(self.strategy, self.dates, self.prices, train_bars=250, test_bars=60)
+        fold = wf.folds[1]
+        train, test = wf.strategies(fold)
+        assert train.strategy_settings.start_date == str(self.dates[fold.train.start])
+        assert test.strategy_settings.end_date == str(self.dates[fold.test.stop - 1])
+        assert test.buy_signals is self.strategy.buy_signals
+        assert self.strategy.strategy_settings.start_date != test.strategy_settings.start_date